@@ -0,0 +1,99 @@
+"""
+Benchmark building buttons every frame against retained buttons.
+
+Renders the home screen buttons for a number of frames, once by building new
+Button objects every frame (the old behaviour) and once by keeping the
+buttons alive and only updating their click information. Reports the time,
+the surfaces rendered and the python memory allocated per frame.
+
+Run from the repository root:
+
+    python benchmarks/bench_buttons.py --frames 600
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pygame  # noqa: E402
+
+from cryptids import settings as get  # noqa: E402
+from cryptids.button import Button  # noqa: E402
+
+# the home screen buttons as (text, x, y)
+Y = int(get.WINHEIGHT * get.HOME_BUTTON_Y_REL - get.BUTTON_DEFAULT_HEIGHT // 2)
+BUTTONS = [("PLAY", get.X25 - get.BUTTON_DEFAULT_WIDTH // 2, Y),
+           ("SETTINGS", get.X50 - get.BUTTON_DEFAULT_WIDTH // 2, Y),
+           ("QUIT", get.X75 - get.BUTTON_DEFAULT_WIDTH // 2, Y),
+           ("Don't have an account? Register now.", get.X50 - get.BUTTON_DEFAULT_WIDTH, get.Y50)]
+
+
+def frame_rebuilt(screen, retained):
+    """Draw a frame building the buttons from scratch."""
+    renders = 0
+    for text, x, y in BUTTONS:
+        button = Button(text=text, x=x, y=y)
+        screen.blit(button.surface, (x, y))
+        renders += button.renders
+    return renders
+
+
+def frame_retained(screen, retained):
+    """Draw a frame with buttons kept alive between frames."""
+    renders = 0
+    for button in retained:
+        before = button.renders
+        button.update(None, False)
+        screen.blit(button.surface, (button.x, button.y))
+        renders += button.renders - before
+    return renders
+
+
+def run(frame_func, screen, frames):
+    """Time frame_func over a number of frames."""
+    retained = [Button(text=text, x=x, y=y) for text, x, y in BUTTONS]
+    # warm up the font and surface caches
+    frame_func(screen, retained)
+
+    start = time.perf_counter()
+    renders = 0
+    for _ in range(frames):
+        renders += frame_func(screen, retained)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(frames):
+        frame_func(screen, retained)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"ms_per_frame": 1000 * elapsed / frames,
+            "surfaces_rendered_per_frame": renders / frames,
+            "peak_kib": (peak - before) / 1024}
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((get.WINWIDTH, get.WINHEIGHT))
+
+    for name, frame_func in [("rebuilt", frame_rebuilt), ("retained", frame_retained)]:
+        result = run(frame_func, screen, args.frames)
+        print(f"{name:>9}: {result['ms_per_frame']:.3f} ms/frame, "
+              f"{result['surfaces_rendered_per_frame']:.2f} surfaces rendered/frame, "
+              f"{result['peak_kib']:.1f} KiB peak python allocations")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
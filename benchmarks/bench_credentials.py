@@ -0,0 +1,116 @@
+"""
+Tune the password hash cost to a target time, and check it does not stall the frames.
+
+For each key derivation function, the cost whose hash takes the target time
+on this machine is found with credentials.calibrate, then a number of logins
+are checked at that cost whilst a 60 FPS frame loop runs on the main thread:
+
+    - inline: each hash run on the main thread between frames, as a login
+      would be without the credential workers,
+    - pool: the hashes run on the credential workers, the frames only
+      polling their futures.
+
+The median hash time, the time for all the logins and the longest frame of
+each are reported, along with the settings to paste into
+cryptids/settings.py. Run from the repository root:
+
+    python benchmarks/bench_credentials.py --target 0.25 --logins 8 --out credentials.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cryptids import credentials  # noqa: E402
+from cryptids import settings as get  # noqa: E402
+
+FRAME_SECONDS = 1 / 60
+SETTINGS = {"pbkdf2_sha256": "CREDENTIALS_PBKDF2_ITERATIONS", "scrypt": "CREDENTIALS_SCRYPT_N"}
+
+
+def frame_loop(work, step):
+    """Run frames until the work is done, calling step once a frame. Get the time taken and the longest frame in ms."""
+    start = last = time.perf_counter()
+    longest = 0.0
+    while not step(work):
+        time.sleep(max(0.0, FRAME_SECONDS - (time.perf_counter() - last)))
+        now = time.perf_counter()
+        longest = max(longest, now - last)
+        last = now
+    return 1000 * (time.perf_counter() - start), 1000 * longest
+
+
+def bench_algorithm(algorithm, target, logins, workers):
+    """Tune an algorithm to the target time and time logins at that cost."""
+    cost, seconds = credentials.calibrate(target, algorithm)
+    stored = credentials.hash_password("Password123", algorithm=algorithm, cost=cost)
+    results = {"cost": cost, "calibrated_ms": 1000 * seconds}
+
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        credentials.verify_password("Password123", stored)
+        times.append(1000 * (time.perf_counter() - start))
+    results["hash_ms"] = statistics.median(times)
+
+    # one hash between each pair of frames
+    remaining = [logins]
+
+    def inline(work):
+        if not work[0]:
+            return True
+        credentials.verify_password("Password123", stored)
+        work[0] -= 1
+        return False
+    results["inline_total_ms"], results["inline_longest_frame_ms"] = frame_loop(remaining, inline)
+
+    # the hashes run on the workers, the frames poll them
+    pool = credentials.CredentialPool(workers)
+    futures = [pool.verify("Password123", stored) for _ in range(logins)]
+    results["pool_total_ms"], results["pool_longest_frame_ms"] = frame_loop(futures, lambda work: all(f.done() for f in work))
+    assert all(future.result()[0] for future in futures)
+    pool.close()
+    return results
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", type=float, default=get.CREDENTIALS_TARGET_SECONDS, help="seconds a hash should take")
+    parser.add_argument("--algorithms", nargs="+", default=credentials.ALGORITHMS, choices=credentials.ALGORITHMS)
+    parser.add_argument("--logins", type=int, default=8, help="logins checked during the frame loop")
+    parser.add_argument("--workers", type=int, default=get.CREDENTIALS_WORKERS, help="credential worker threads")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for algorithm in args.algorithms:
+        results[algorithm] = result = bench_algorithm(algorithm, args.target, args.logins, args.workers)
+        print(f"{algorithm}: cost {result['cost']}, hash {result['hash_ms']:.1f} ms")
+        for mode in ["inline", "pool"]:
+            print(f"{mode:>16}: {args.logins} logins in {result[mode + '_total_ms']:8.1f} ms, "
+                  f"longest frame {result[mode + '_longest_frame_ms']:6.1f} ms")
+    print("settings for a hash of {:.0f} ms on this machine:".format(1000 * args.target))
+    for algorithm in args.algorithms:
+        print(f"    {SETTINGS[algorithm]} = {results[algorithm]['cost']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": {"target": args.target,
+                                "logins": args.logins,
+                                "workers": args.workers,
+                                "cpus": os.cpu_count(),
+                                "python": platform.python_version(),
+                                "platform": platform.platform(),
+                                "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                       "results": results}, f, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
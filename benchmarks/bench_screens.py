@@ -0,0 +1,235 @@
+"""
+Benchmark the frame time of every GameWrapper screen.
+
+Drives GameWrapper.render headless (SDL dummy video driver) through each
+status in settings.GAME_STATUSES for a number of frames, with a scripted
+click and key press every few frames. The scripted input misses every
+button, so no screen blocks on a click action. For each screen it reports:
+
+    - p50, p95 and p99 frame times,
+    - python memory allocated per frame (tracemalloc peak),
+    - blits per frame onto the screen,
+    - pixels marked for display update per frame.
+
+Each game logs in on its own copy of users/user_details.json in a temporary
+folder, so a run leaves the user file as it was and starts from the same
+users as the runs before it.
+
+Results are written as JSON so runs can be compared before and after a
+change. Run from the repository root:
+
+    python benchmarks/bench_screens.py --frames 300 --out before.json
+    python benchmarks/bench_screens.py --frames 300 --out after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pygame  # noqa: E402
+
+from cryptids import settings as get  # noqa: E402
+from cryptids import usermanagement  # noqa: E402
+from cryptids import userstore  # noqa: E402
+from cryptids import utils  # noqa: E402
+from cryptids.assets import asset_manager  # noqa: E402
+from cryptids.dirty import count_pixels  # noqa: E402
+from cryptids.fonts import font_registry  # noqa: E402
+from cryptids.gamewrapper import GameWrapper  # noqa: E402
+
+# scripted input, clear of every button
+CLICK_POS = (get.WINWIDTH - 2, get.WINHEIGHT // 3)
+KEY_PRESS = "a"
+# the user file the games log in from, copied for each game
+USER_FILE = usermanagement.FILEPATH
+
+
+class CountingSurface(pygame.Surface):
+    """A screen surface that counts the blits drawn onto it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.blit_count = 0
+
+    def blit(self, *args, **kwargs):
+        self.blit_count += 1
+        return super().blit(*args, **kwargs)
+
+    def blits(self, blit_sequence, *args, **kwargs):
+        blit_sequence = list(blit_sequence)
+        self.blit_count += len(blit_sequence)
+        return super().blits(blit_sequence, *args, **kwargs)
+
+
+def percentile(values, q):
+    """Get the q-th percentile (0-100) of a list, nearest rank."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def scripted_input(frame, click_every, key_every):
+    """Get the (click_pos, key_press, click_event) of a frame."""
+    click = click_every > 0 and frame % click_every == click_every - 1
+    key = key_every > 0 and frame % key_every == key_every - 1
+    return (CLICK_POS if click else None, KEY_PRESS if key else None, click)
+
+
+def new_game(status, users_folder):
+    """Build a GameWrapper at a status, logged in so gameplay can start, on its own copy of the user file."""
+    usermanagement.FILEPATH = os.path.join(users_folder, f"user_details.{len(os.listdir(users_folder))}.json")
+    shutil.copyfile(USER_FILE, usermanagement.FILEPATH)
+    game = GameWrapper(status=status)
+    return_code, user = usermanagement.load_user(get.DEFAULT_USERNAME, get.DEFAULT_PASSWORD)
+    if return_code == 0:
+        game.login_success = True
+        game.username = get.DEFAULT_USERNAME
+        game.user = user
+        game.user_deck_selection = utils.str_to_list(usermanagement.get_setting(user, "settings", "loadouts", "default"))
+    return game
+
+
+def drive(status, screen, frames, click_every, key_every, users_folder, trace=False):
+    """
+    Render a fresh game at a status for a number of frames.
+
+    Returns a dict of per frame lists, plus the error that stopped the run
+    early, if any.
+    """
+    game = new_game(status, users_folder)
+    samples = {"ms": [], "alloc_kib": [], "blits": [], "updated_px": []}
+    error = None
+    for frame in range(frames):
+        click_pos, key_press, click_event = scripted_input(frame, click_every, key_every)
+        screen.blit_count = 0
+        if trace:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            game.render(screen, click_pos, key_press, click_event)
+        except SystemExit:
+            error = "SystemExit"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        elapsed = time.perf_counter() - start
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            samples["alloc_kib"].append((peak - before) / 1024)
+        samples["ms"].append(1000 * elapsed)
+        samples["blits"].append(screen.blit_count)
+        samples["updated_px"].append(count_pixels(game.dirty.consume()))
+        if error is not None:
+            break
+    samples["error"] = error
+    samples["status_end"] = game.game_status
+    return samples
+
+
+def restart_pygame():
+    """Bring pygame back after a screen quit it (the outro does)."""
+    if not pygame.get_init():
+        pygame.init()
+        pygame.display.set_mode((get.WINWIDTH, get.WINHEIGHT))
+        # fonts and converted surfaces do not survive pygame.quit
+        font_registry.clear()
+        asset_manager.clear()
+
+
+def bench_status(status, screen, frames, click_every, key_every, users_folder):
+    """Time a screen, then measure its allocations in a second run."""
+    timed = drive(status, screen, frames, click_every, key_every, users_folder)
+    restart_pygame()
+    tracemalloc.start()
+    traced = drive(status, screen, frames, click_every, key_every, users_folder, trace=True)
+    tracemalloc.stop()
+    restart_pygame()
+
+    result = {"frames": len(timed["ms"]),
+              "status_end": timed["status_end"],
+              "error": timed["error"]}
+    if timed["ms"]:
+        result.update({"first_frame_ms": timed["ms"][0],
+                       "p50_ms": percentile(timed["ms"], 50),
+                       "p95_ms": percentile(timed["ms"], 95),
+                       "p99_ms": percentile(timed["ms"], 99),
+                       "mean_ms": statistics.fmean(timed["ms"]),
+                       "alloc_kib_per_frame": statistics.fmean(traced["alloc_kib"]),
+                       "alloc_kib_p95": percentile(traced["alloc_kib"], 95),
+                       "blits_per_frame": statistics.fmean(timed["blits"]),
+                       "updated_px_per_frame": statistics.fmean(timed["updated_px"])})
+    return result
+
+
+def compare(results, baseline_path):
+    """Print the change in p50/p95 frame time against an earlier run."""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)["screens"]
+    print(f"\nchange against {baseline_path}:")
+    for status, result in results.items():
+        before = baseline.get(status, {})
+        for key in ("p50_ms", "p95_ms"):
+            if result.get(key) and before.get(key):
+                print(f"{status:>10} {key}: {before[key]:8.3f} -> {result[key]:8.3f} ms ({result[key] / before[key]:.2f}x)")
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--click-every", type=int, default=10, help="frames between scripted clicks, 0 for none")
+    parser.add_argument("--key-every", type=int, default=15, help="frames between scripted key presses, 0 for none")
+    parser.add_argument("--status", action="append", choices=get.GAME_STATUSES, help="only these statuses, default all")
+    parser.add_argument("--out", default="bench_screens.json")
+    parser.add_argument("--compare", help="an earlier --out file to compare against")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((get.WINWIDTH, get.WINHEIGHT))
+    screen = CountingSurface((get.WINWIDTH, get.WINHEIGHT))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as users_folder:
+        for status in args.status or get.GAME_STATUSES:
+            result = bench_status(status, screen, args.frames, args.click_every, args.key_every, users_folder)
+            results[status] = result
+            if "p50_ms" in result:
+                print(f"{status:>10}: p50 {result['p50_ms']:7.3f} ms, p95 {result['p95_ms']:7.3f} ms, p99 {result['p99_ms']:7.3f} ms, "
+                      f"{result['alloc_kib_per_frame']:8.1f} KiB/frame, {result['blits_per_frame']:5.1f} blits/frame, "
+                      f"{result['updated_px_per_frame']:8.0f} px/frame over {result['frames']} frames"
+                      + (f" (stopped: {result['error']})" if result["error"] else ""))
+            else:
+                print(f"{status:>10}: no frames ({result['error']})")
+        # write what the games changed before the copies go
+        userstore.close_stores()
+        usermanagement.FILEPATH = USER_FILE
+    pygame.quit()
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": {"frames": args.frames,
+                            "click_every": args.click_every,
+                            "key_every": args.key_every,
+                            "python": platform.python_version(),
+                            "pygame": pygame.version.ver,
+                            "platform": platform.platform(),
+                            "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                   "screens": results}, f, indent=2)
+    print(f"results written to {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark the cold start of the game against its budget.
+
+Measures, each in a fresh interpreter (SDL dummy video driver):
+
+    - the import time of run.py, from `python -X importtime`, with the
+      modules that cost the most,
+    - the time from launching `python run.py` to the first frame on screen,
+      i.e. the first pygame.display.update.
+
+The medians of a number of runs are checked against the budget in
+benchmarks/startup_budget.json, and the script exits non-zero when over it.
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 5 --out startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+# run the game until its first frame is on screen, then report the time
+FIRST_FRAME_DRIVER = """
+import os, sys, time
+import pygame
+update = pygame.display.update
+def first_update(*args, **kwargs):
+    update(*args, **kwargs)
+    print("FIRST_FRAME", time.time())
+    sys.stdout.flush()
+    os._exit(0)
+pygame.display.update = first_update
+sys.argv = ["run.py", "--sync"]
+import run
+run.main()
+"""
+
+
+def environment():
+    """Get the environment of the game, headless."""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYTHONDONTWRITEBYTECODE="1")
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_times():
+    """Import run.py with -X importtime, returning {module: cumulative ms}."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import run"],
+                            cwd=ROOT, env=environment(), capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def first_frame_time():
+    """Launch the game and time its first frame, in ms."""
+    start = time.time()
+    result = subprocess.run([sys.executable, "-c", FIRST_FRAME_DRIVER],
+                            cwd=ROOT, env=environment(), capture_output=True, text=True, timeout=60)
+    for line in result.stdout.splitlines():
+        if line.startswith("FIRST_FRAME"):
+            return 1000 * (float(line.split()[1]) - start)
+    raise RuntimeError(f"The game did not draw a frame:\n{result.stderr}")
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="the number of slowest imports to list")
+    parser.add_argument("--budget", default=BUDGET_PATH)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    imports, first_frames = [], []
+    for _ in range(args.runs):
+        modules = import_times()
+        imports.append(modules)
+        first_frames.append(first_frame_time())
+
+    results = {"import_ms": statistics.median(modules["run"] for modules in imports),
+               "first_frame_ms": statistics.median(first_frames)}
+    # the slowest imports of the median run, top level packages only
+    median = sorted(imports, key=lambda modules: modules["run"])[len(imports) // 2]
+    top_level = {name: ms for name, ms in median.items() if "." not in name and name != "run"}
+    results["slowest_imports_ms"] = dict(sorted(top_level.items(), key=lambda item: -item[1])[:args.top])
+
+    with open(args.budget, "r") as f:
+        budget = json.load(f)
+    print(f"import run.py: {results['import_ms']:7.1f} ms (budget {budget['import_ms']} ms)")
+    print(f"first frame:   {results['first_frame_ms']:7.1f} ms (budget {budget['first_frame_ms']} ms)")
+    print("slowest imports:")
+    for name, ms in results["slowest_imports_ms"].items():
+        print(f"{name:>24}: {ms:7.1f} ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": {"runs": args.runs,
+                                "python": platform.python_version(),
+                                "platform": platform.platform(),
+                                "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                       "budget": budget,
+                       "results": results}, f, indent=2)
+        print(f"results written to {args.out}")
+
+    over = [key for key in ("import_ms", "first_frame_ms") if results[key] > budget[key]]
+    if over:
+        print(f"over budget: {over}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark the user stores at large user counts.
+
+For each number of users, a user file of that many users like the ones made
+by registration is generated, then each backend is driven through the
+usermanagement API:
+
+    - open: the first read, parsing the JSON file or opening the database,
+    - login: usermanagement.load_user of a random user,
+    - check email: usermanagement.check_email_exists of an unregistered email,
+    - set setting: usermanagement.set_setting of a random user, until it is
+      on disk (the JSON store is flushed),
+    - register: usermanagement.make_new_user, until it is on disk.
+
+The SQLite database is made from the user file by its migration tool, which
+is timed too. The journaled store takes the user file as its first snapshot,
+its open is that recovery. The median of a number of repeats of each operation is
+reported. The files are made in a temporary folder. Run from the repository
+root, with fewer users for a quick run:
+
+    python benchmarks/bench_userstore.py --sizes 10000 100000 1000000 --out userstore.json
+    python benchmarks/bench_userstore.py --sizes 1000 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cryptids import settings as get  # noqa: E402
+from cryptids import userjournal  # noqa: E402
+from cryptids import usermanagement  # noqa: E402
+from cryptids import usersqlite  # noqa: E402
+from cryptids import userstore  # noqa: E402
+
+BACKENDS = ["json", "sqlite", "journal"]
+PASSWORD = "Password123"
+
+
+def make_user(i):
+    """Get the username and dictionary of a generated user, as registration makes them."""
+    return f"user{i}", {"email": f"user{i}@cryptids-tcg.com",
+                        "password": PASSWORD,
+                        "settings": {"nfts": "[-1]", "loadouts": {"default": str([x + 1 for x in range(get.DECK_SIZE)])}},
+                        "records": {"wins": 0, "losses": 0}}
+
+
+def write_user_file(path, n):
+    """Write a user file of n generated users, one user at a time."""
+    with open(path, "w") as f:
+        f.write("{")
+        for i in range(n):
+            username, user = make_user(i)
+            f.write(("," if i else "") + json.dumps(username) + ":" + json.dumps(user))
+        f.write("}")
+
+
+def use_backend(backend, json_path, db_path):
+    """Point usermanagement at a backend and the files of this run."""
+    get.USER_STORE_BACKEND = backend
+    usermanagement.FILEPATH = json_path
+    usersqlite.user_db = usersqlite.SQLiteUserStore(db_path)
+    folder = os.path.dirname(json_path)
+    userjournal.user_journal = userjournal.JournalUserStore(os.path.join(folder, "user_details.journal"),
+                                                            os.path.join(folder, "user_details.snapshot.json"),
+                                                            seed_path=json_path)
+
+
+def persist(backend):
+    """Wait for the changes made to reach the disk, the other stores write them before returning."""
+    if backend == "json":
+        userstore.get_store(usermanagement.FILEPATH).flush()
+
+
+def timed(func, repeat):
+    """Get the median time of a function in ms."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(1000 * (time.perf_counter() - start))
+    return statistics.median(times)
+
+
+def bench_backend(backend, n, repeat, rng):
+    """Time the operations of a backend on n users, in ms."""
+    results = {}
+    start = time.perf_counter()
+    if backend == "sqlite":
+        usersqlite.user_db.count()
+    else:
+        usermanagement.load_all_users()
+    results["open_ms"] = 1000 * (time.perf_counter() - start)
+
+    results["login_ms"] = timed(lambda: usermanagement.load_user(f"user{rng.randrange(n)}", PASSWORD), repeat)
+    results["check_email_ms"] = timed(lambda: usermanagement.check_email_exists("nobody@cryptids-tcg.com"), repeat)
+
+    def set_setting():
+        usermanagement.set_setting(f"user{rng.randrange(n)}", rng.randrange(100), "records", "wins")
+        persist(backend)
+    results["set_setting_ms"] = timed(set_setting, repeat)
+
+    registered = iter(range(n, n + repeat))
+
+    def register():
+        i = next(registered)
+        usermanagement.make_new_user(f"user{i}", PASSWORD, f"user{i}@cryptids-tcg.com")
+        persist(backend)
+    results["register_ms"] = timed(register, repeat)
+    return results
+
+
+def bench_size(n, repeat, seed):
+    """Generate n users and time each backend on them."""
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "user_details.json")
+        db_path = os.path.join(folder, "user_details.db")
+        start = time.perf_counter()
+        write_user_file(json_path, n)
+        results["generate_s"] = time.perf_counter() - start
+        results["json_bytes"] = os.path.getsize(json_path)
+        start = time.perf_counter()
+        usersqlite.migrate(json_path, db_path)
+        results["migrate_s"] = time.perf_counter() - start
+        results["db_bytes"] = os.path.getsize(db_path)
+
+        for backend in BACKENDS:
+            use_backend(backend, json_path, db_path)
+            results[backend] = bench_backend(backend, n, repeat, random.Random(seed))
+            usersqlite.user_db.close()
+            userjournal.user_journal.close()
+        userstore.close_stores()
+    return results
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="numbers of users")
+    parser.add_argument("--repeat", type=int, default=10, help="times each operation is repeated")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for n in args.sizes:
+        results[n] = result = bench_size(n, args.repeat, args.seed)
+        print(f"{n} users: {result['json_bytes'] / 1e6:.1f} MB of JSON, {result['db_bytes'] / 1e6:.1f} MB of SQLite, "
+              f"migrated in {result['migrate_s']:.2f} s")
+        for name in ["open_ms", "login_ms", "check_email_ms", "set_setting_ms", "register_ms"]:
+            print(f"{name:>16}: " + ", ".join(f"{backend} {result[backend][name]:10.3f}" for backend in BACKENDS))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": {"sizes": args.sizes,
+                                "repeat": args.repeat,
+                                "python": platform.python_version(),
+                                "platform": platform.platform(),
+                                "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                       "results": results}, f, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Asset manager.
+
+Images are decoded, converted and scaled once and then served from a cache
+keyed by path, target size and alpha/tint. The cache holds at most a fixed
+number of bytes of surface memory and evicts the least recently used surface
+when that budget is exceeded.
+"""
+from collections import OrderedDict
+import logging
+import sys
+
+import pygame
+
+from cryptids import settings as get
+from cryptids import utils
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    """Return the number of bytes of pixel memory held by a surface."""
+    return surface.get_pitch() * surface.get_height()
+
+
+class AssetManager(object):
+    """
+    Load, convert and scale images once.
+
+    Parameters
+    ----------
+        byte_budget : int,
+            The maximum number of bytes of surface memory to keep cached.
+
+    Methods
+    -------
+        get_image(path, new_height, new_width, alpha, tint)
+            Get the (cached) surface of an image.
+
+        has_image(path)
+            Check if the unmodified image is cached.
+
+        put_image(path, surface)
+            Convert and cache an image decoded elsewhere, e.g. on a worker thread.
+
+        release(paths)
+            Drop every cached surface of some images.
+
+        bytes_of(paths)
+            Get the surface memory held by some images.
+
+        clear()
+            Drop all cached surfaces.
+
+        stats()
+            Get the hit/miss counters and memory use of the cache.
+    """
+
+    def __init__(self, byte_budget: int = get.ASSET_CACHE_BYTE_BUDGET):
+        utils.check_type(byte_budget, "byte_budget", int)
+        self.byte_budget = byte_budget
+        self._cache = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_image(self,
+                  path: str,
+                  new_height: (int, float) = None,
+                  new_width: (int, float) = None,
+                  alpha: int = None,
+                  tint: tuple = None,
+                  convert_alpha: bool = True) -> pygame.Surface:
+        """
+        Get the surface of an image, loading it on the first request only.
+
+        Parameters
+        ----------
+        path : str
+            Path to the image file.
+        new_height : (int, float), optional
+            Target height, keeping the aspect ratio. The default is None.
+        new_width : (int, float), optional
+            Target width, keeping the aspect ratio. The default is None.
+        alpha : int, optional
+            Alpha (0-255) to multiply the image by. The default is None.
+        tint : tuple, optional
+            RGB colour to multiply the image by. The default is None.
+        convert_alpha : bool, optional
+            Convert with per pixel alpha, else convert. The default is True.
+
+        Returns
+        -------
+        surface : pygame.Surface
+            The shared surface. Callers must not draw onto it.
+
+        """
+        # round the target sizes so near identical requests share an entry
+        if new_height is not None:
+            new_height = int(new_height)
+        if new_width is not None:
+            new_width = int(new_width)
+        key = (path, new_height, new_width, alpha, tint, convert_alpha)
+
+        # serve from the cache
+        surface = self._cache.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return surface
+        self.misses += 1
+
+        # build the surface from the unmodified source, which is cached too
+        if new_height is None and new_width is None and alpha is None and tint is None:
+            logger.debug(f"Loading image {path}.")
+            surface = pygame.image.load(path)
+            surface = surface.convert_alpha() if convert_alpha else surface.convert()
+        else:
+            surface = self.get_image(path, convert_alpha=convert_alpha)
+            if new_height is not None or new_width is not None:
+                surface = utils.reshape_keep_aspect(surface, new_height=new_height, new_width=new_width)
+            else:
+                surface = surface.copy()
+            if alpha is not None or tint is not None:
+                r, g, b = tint if tint is not None else (255, 255, 255)
+                a = alpha if alpha is not None else 255
+                surface.fill((r, g, b, a), None, pygame.BLEND_RGBA_MULT)
+
+        self._store(key, surface)
+        return surface
+
+    def has_image(self, path: str, convert_alpha: bool = True) -> bool:
+        """Check if the unmodified image is cached."""
+        return (path, None, None, None, None, convert_alpha) in self._cache
+
+    def put_image(self, path: str, surface: pygame.Surface, convert_alpha: bool = True) -> pygame.Surface:
+        """
+        Convert and cache an image that was decoded elsewhere.
+
+        Parameters
+        ----------
+        path : str
+            Path the image was decoded from.
+        surface : pygame.Surface
+            The decoded, unconverted image.
+        convert_alpha : bool, optional
+            Convert with per pixel alpha, else convert. The default is True.
+
+        Returns
+        -------
+        surface : pygame.Surface
+            The shared, converted surface.
+
+        """
+        key = (path, None, None, None, None, convert_alpha)
+        if key in self._cache:
+            return self._cache[key]
+        surface = surface.convert_alpha() if convert_alpha else surface.convert()
+        self._store(key, surface)
+        return surface
+
+    def _store(self, key, surface):
+        """Add a surface to the cache, evicting the least recently used."""
+        self._cache[key] = surface
+        self.bytes_used += surface_bytes(surface)
+        # always keep the newest entry, even if it alone exceeds the budget
+        while self.bytes_used > self.byte_budget and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self.bytes_used -= surface_bytes(evicted)
+            self.evictions += 1
+
+    def release(self, paths) -> None:
+        """Drop every cached surface (of any size, alpha or tint) of some images."""
+        paths = set(paths)
+        for key in [key for key in self._cache if key[0] in paths]:
+            self.bytes_used -= surface_bytes(self._cache.pop(key))
+
+    def bytes_of(self, paths) -> int:
+        """Get the bytes of surface memory held by some images, with their variants."""
+        paths = set(paths)
+        return sum(surface_bytes(surface) for key, surface in self._cache.items() if key[0] in paths)
+
+    def clear(self):
+        """Drop all cached surfaces."""
+        self._cache.clear()
+        self.bytes_used = 0
+
+    def stats(self) -> dict:
+        """Get the hit/miss counters and memory use of the cache."""
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._cache),
+                "bytes_used": self.bytes_used,
+                "byte_budget": self.byte_budget}
+
+
+# the process wide asset manager
+asset_manager = AssetManager()
@@ -0,0 +1,60 @@
+"""
+Asyncio main loop.
+
+The game is rendered one frame at a time by a coroutine on a frame timer. The
+blocking work of the screens (reading and writing the user file, reading the
+NFT details) is run in the event loop's executor by GameWrapper._offload, and
+awaited between frames, so the screen keeps animating whilst it runs.
+
+The plain loop in run.py stays available with `python run.py --sync`.
+"""
+import asyncio
+import logging
+import sys
+from typing import Callable
+
+from cryptids import settings as get
+from cryptids.frametimer import frame_timer
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+async def run_async(game, frame: Callable, scheduler) -> None:
+    """
+    Drive the game a frame at a time until a frame exits.
+
+    Parameters
+    ----------
+    game : GameWrapper
+        The game.
+    frame : Callable
+        Runs one frame of the game, `frame(game) -> (game, inputs, rects)`
+        with the input of the frame and the regions of the display updated.
+    scheduler : FrameScheduler
+        Paces the frames.
+
+    """
+    loop = asyncio.get_running_loop()
+    # the game's work and the loop's default executor share the I/O threads
+    loop.set_default_executor(game.io_executor)
+    game.loop = loop
+    logger.info("Asyncio main loop starting.")
+    try:
+        while True:
+            game, inputs, rects = frame(game)
+            with frame_timer.phase("wait"):
+                await scheduler.wait_async(game.game_status, game.is_animating(), inputs.events > 0 or bool(rects))
+    finally:
+        game.loop = None
+
+
+def run(game, frame: Callable, scheduler) -> None:
+    """Run the asyncio main loop, see run_async."""
+    asyncio.run(run_async(game, frame, scheduler))
@@ -0,0 +1,298 @@
+"""
+Card art atlas.
+
+The card images are packed offline into atlas sheets at a few fixed card
+heights (tiers), with a JSON index from card id to the sheet and sub-rect of
+the card. At runtime a card is a subsurface of an already decoded sheet, so
+no full size PNG is decoded or scaled while drawing. The card art streamer
+decodes the sheets of the cards in play in the background, see
+cryptids.streaming.
+
+Bake the atlas with
+
+    python -m cryptids.atlas
+"""
+import json
+import logging
+import os
+import sys
+from typing import Dict, Tuple
+
+import pygame
+
+from cryptids import settings as get
+from cryptids.assets import asset_manager
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def card_image_path(card_id: int, card_root: str = get.CARD_ROOT) -> str:
+    """Get the path to the full size image of a card."""
+    return os.path.join(card_root, f"{card_id}.png")
+
+
+def pack_shelves(sizes: Dict[int, Tuple[int, int]],
+                 sheet_size: int = get.ATLAS_SHEET_SIZE,
+                 padding: int = get.ATLAS_PADDING) -> Dict[int, Tuple[int, int, int, int, int]]:
+    """
+    Pack rectangles onto square sheets, row by row (shelf packing).
+
+    Parameters
+    ----------
+    sizes : Dict[int, Tuple[int, int]]
+        The (width, height) of each card, keyed by card id.
+    sheet_size : int, optional
+        The width and height of a sheet. The default is get.ATLAS_SHEET_SIZE.
+    padding : int, optional
+        Pixels left between cards. The default is get.ATLAS_PADDING.
+
+    Raises
+    ------
+    ValueError
+        If a card does not fit on an empty sheet.
+
+    Returns
+    -------
+    placements : Dict[int, Tuple[int, int, int, int, int]]
+        The (sheet, x, y, width, height) of each card, keyed by card id.
+
+    """
+    placements = {}
+    sheet, x, y, shelf_height = 0, 0, 0, 0
+    # tallest first keeps the shelves tight
+    for card_id in sorted(sizes, key=lambda c: (-sizes[c][1], c)):
+        width, height = sizes[card_id]
+        if width > sheet_size or height > sheet_size:
+            raise ValueError(f"card {card_id} of size {width}x{height} does not fit on a {sheet_size} pixel sheet.")
+        # new shelf
+        if x + width > sheet_size:
+            x, y, shelf_height = 0, y + shelf_height + padding, 0
+        # new sheet
+        if y + height > sheet_size:
+            sheet, x, y, shelf_height = sheet + 1, 0, 0, 0
+        placements[card_id] = (sheet, x, y, width, height)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    return placements
+
+
+def bake_atlas(card_root: str = get.CARD_ROOT,
+               atlas_root: str = get.ATLAS_ROOT,
+               tiers: Dict[str, int] = get.ATLAS_TIERS,
+               sheet_size: int = get.ATLAS_SHEET_SIZE,
+               padding: int = get.ATLAS_PADDING) -> dict:
+    """
+    Pack every card image into atlas sheets for each tier and write the index.
+
+    Parameters
+    ----------
+    card_root : str, optional
+        Folder of <card_id>.png images. The default is get.CARD_ROOT.
+    atlas_root : str, optional
+        Folder to write the sheets and index.json to. The default is get.ATLAS_ROOT.
+    tiers : Dict[str, int], optional
+        Card height of each tier. The default is get.ATLAS_TIERS.
+    sheet_size : int, optional
+        The width and height of a sheet. The default is get.ATLAS_SHEET_SIZE.
+    padding : int, optional
+        Pixels left between cards. The default is get.ATLAS_PADDING.
+
+    Returns
+    -------
+    index : dict
+        The atlas index, as written to index.json.
+
+    """
+    card_ids = sorted(int(fname[:-4]) for fname in os.listdir(card_root)
+                      if fname.endswith(".png") and fname[:-4].isdigit())
+    # copy onto 32 bit surfaces, smoothscale cannot scale paletted images
+    sources = {}
+    for card_id in card_ids:
+        image = pygame.image.load(card_image_path(card_id, card_root))
+        sources[card_id] = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        sources[card_id].blit(image, (0, 0))
+    os.makedirs(atlas_root, exist_ok=True)
+
+    index = {"sheet_size": sheet_size, "tiers": {}}
+    for tier, tier_height in tiers.items():
+        # scale each card to the tier height, keeping its aspect ratio
+        scaled = {}
+        for card_id, source in sources.items():
+            width = max(1, round(source.get_width() * tier_height / source.get_height()))
+            scaled[card_id] = pygame.transform.smoothscale(source, (width, tier_height))
+        placements = pack_shelves({card_id: img.get_size() for card_id, img in scaled.items()}, sheet_size, padding)
+
+        # draw the sheets
+        n_sheets = max((placement[0] for placement in placements.values()), default=-1) + 1
+        sheets = [pygame.Surface((sheet_size, sheet_size), pygame.SRCALPHA) for _ in range(n_sheets)]
+        for card_id, (sheet, x, y, _, _) in placements.items():
+            sheets[sheet].blit(scaled[card_id], (x, y))
+        sheet_names = []
+        for i, sheet in enumerate(sheets):
+            sheet_name = f"{tier}_{i}.png"
+            pygame.image.save(sheet, os.path.join(atlas_root, sheet_name))
+            sheet_names.append(sheet_name)
+
+        index["tiers"][tier] = {"height": tier_height,
+                                "sheets": sheet_names,
+                                "cards": {str(card_id): list(placement) for card_id, placement in placements.items()}}
+        logger.info(f"Baked the {tier} tier: {len(placements)} cards on {n_sheets} sheets.")
+
+    with open(os.path.join(atlas_root, "index.json"), "w") as f:
+        json.dump(index, f)
+    return index
+
+
+class CardAtlas(object):
+    """
+    Serve card art at a fixed tier from the baked atlas sheets.
+
+    Sheets are decoded on first use of their tier. Cards missing from the
+    atlas (or the whole atlas, if it has not been baked) fall back to
+    scaling the full size image through the asset manager.
+
+    Parameters
+    ----------
+        index_path : str,
+            Path to the atlas index.json.
+        card_root : str,
+            Folder of the full size card images, for the fallback.
+        tiers : Dict[str, int],
+            Card height of each tier. An atlas baked for other heights is stale.
+
+    Methods
+    -------
+        get(card_id, tier)
+            Get the art of a card at a tier.
+
+        sheet_path(card_id, tier)
+            Get the sheet holding a card, to decode it ahead with an AssetLoader.
+
+        clear()
+            Drop the decoded sheets.
+    """
+
+    def __init__(self,
+                 index_path: str = get.ATLAS_INDEX_PATH,
+                 card_root: str = get.CARD_ROOT,
+                 tiers: Dict[str, int] = get.ATLAS_TIERS):
+        self.index_path = index_path
+        self.card_root = card_root
+        self.tiers = tiers
+        self._index = None
+        self._sheets = {}
+        self._cards = {}
+        self.hits = 0
+        self.fallbacks = 0
+
+    @property
+    def index(self) -> dict:
+        """The atlas index, read on first use. Empty if it was never baked."""
+        if self._index is None:
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                logger.warning(f"No card atlas at {self.index_path}, scaling full size card images instead. Bake it with `python -m cryptids.atlas`.")
+                self._index = {"tiers": {}}
+        return self._index
+
+    def get(self, card_id: int, tier: str) -> pygame.Surface:
+        """
+        Get the art of a card at a tier.
+
+        Parameters
+        ----------
+        card_id : int
+            The id of the card.
+        tier : str
+            One of the tiers, e.g. "hand".
+
+        Returns
+        -------
+        surface : pygame.Surface
+            A subsurface of the atlas sheet. Callers must not draw onto it.
+
+        """
+        key = (int(card_id), tier)
+        surface = self._cards.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        placement = self._placement(card_id, tier)
+        if placement is None:
+            self.fallbacks += 1
+            return asset_manager.get_image(card_image_path(card_id, self.card_root), new_height=self.tiers[tier])
+
+        self.hits += 1
+        sheet, x, y, width, height = placement
+        surface = self._get_sheet(tier, sheet).subsurface((x, y, width, height))
+        self._cards[key] = surface
+        return surface
+
+    def sheet_path(self, card_id: int, tier: str):
+        """Get the path of the sheet holding a card at a tier, None if the card is not in the atlas."""
+        placement = self._placement(card_id, tier)
+        return self._sheet_path(tier, placement[0]) if placement is not None else None
+
+    def _placement(self, card_id: int, tier: str):
+        """Get the sheet and sub-rect of a card at a tier, None if the card is not in the atlas."""
+        tier_index = self.index["tiers"].get(tier)
+        # an atlas baked for other tier heights is stale
+        if tier_index is None or tier_index["height"] != self.tiers[tier]:
+            return None
+        return tier_index["cards"].get(str(card_id))
+
+    def _sheet_path(self, tier: str, sheet: int) -> str:
+        """Get the path of an atlas sheet."""
+        return os.path.join(os.path.dirname(self.index_path), self.index["tiers"][tier]["sheets"][sheet])
+
+    # an AssetLoader can decode the sheets in the background and put them here
+    def has_image(self, path: str, convert_alpha: bool = True) -> bool:
+        """Check if an atlas sheet is decoded."""
+        return path in self._sheets
+
+    def put_image(self, path: str, surface: pygame.Surface, convert_alpha: bool = True) -> pygame.Surface:
+        """Convert and keep a decoded atlas sheet."""
+        if path not in self._sheets:
+            self._sheets[path] = surface.convert_alpha()
+        return self._sheets[path]
+
+    def _get_sheet(self, tier: str, sheet: int) -> pygame.Surface:
+        """Decode and convert an atlas sheet once, if it was not decoded in the background."""
+        path = self._sheet_path(tier, sheet)
+        if path not in self._sheets:
+            logger.debug(f"Loading atlas sheet {path}.")
+            self.put_image(path, pygame.image.load(path))
+        return self._sheets[path]
+
+    def clear(self) -> None:
+        """Drop the decoded sheets and re-read the index on next use."""
+        self._index = None
+        self._sheets.clear()
+        self._cards.clear()
+
+    def stats(self) -> dict:
+        """Get the counters and memory use of the atlas."""
+        return {"hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "sheets": len(self._sheets),
+                "bytes_used": sum(sheet.get_pitch() * sheet.get_height() for sheet in self._sheets.values())}
+
+
+# the process wide card atlas
+card_atlas = CardAtlas()
+
+
+if __name__ == "__main__":
+    index = bake_atlas()
+    for tier, tier_index in index["tiers"].items():
+        print(f"{tier}: {len(tier_index['cards'])} cards on {len(tier_index['sheets'])} sheets.")
@@ -8,6 +8,7 @@ import pygame
 
 from cryptids import settings as get
 from cryptids import utils
+from cryptids.fonts import font_registry
 from cryptids.usermanagement import clean_string
 
 # get the logger
@@ -54,11 +55,23 @@ class Button():
 
     Methods
     -------
-        _create_surface()
-            Build the button surface.
+        surface
+            The (retained) surface for the current visual state.
 
-        was_selected()
-            Is the button selected.
+        update(click_pos, click_event, mouse_pos)
+            Set this frame's click information.
+
+        set_text(str)
+            Change the text, re-rendering only if it changed.
+
+        get_state()
+            Get the visual state of the button.
+
+        draw(screen)
+            Blit the button, returning its rect only if it changed.
+
+        was_clicked(click_pos)
+            Was the button clicked.
 
         toggle_access()
             Switch the access to on (if off) or off (if on).
@@ -147,92 +160,164 @@ class Button():
         self.toggleable = toggleable
         self.toggle = False
         self.click_event = click_event
+        # the mouse position of the frame, None to ask pygame
+        self.mouse_pos = None
         self.access = access
         self.allow_reshape = allow_reshape
         self.active = False
         self.private = private
 
-        self.surface = self._render()
+        # retained surfaces, one per visual state, valid for one layout
+        self._surfaces = {}
+        self._layout_key = None
+        self._drawn = None
+        self.renders = 0
+        self._layout()
+
+    @property
+    def surface(self) -> pygame.Surface:
+        """The button surface for the current visual state."""
+        if self._get_layout_key() != self._layout_key:
+            self._layout()
+        state = self.get_state()
+        surface = self._surfaces.get(state)
+        if surface is None:
+            surface = self._render(state)
+            self._surfaces[state] = surface
+        return surface
+
+    def _get_layout_key(self) -> tuple:
+        """Everything that, if changed, requires the surfaces to be rebuilt."""
+        return (self.text, self.width, self.height, self.x, self.y, self.font_name, self.max_font_size)
+
+    def _layout(self):
+        """Fit the text to the box and drop all retained surfaces."""
+        # if clean_str is active, strip bad characters
+        if self.clean_str:
+            self.text = clean_string(self.text)
+
+        # Resize the box if the text is too long, else fit the text to the box.
+        if self.allow_reshape:
+            self.font_size = self.max_font_size
+            font = font_registry.get_font(self.font_name, self.font_size)
+            self.width = font.size(self.text)[0]
+        else:
+            self.font_size = font_registry.fit_size(self.font_name, self.text, self.max_font_size, self.width)
 
-    def _render(self):
+        # make the box a property
+        self.box_surface_rect = pygame.Rect(self.x, self.y, self.width + get.BUTTON_DEFAULT_TEXT_X_BUFFER, self.height + get.BUTTON_DEFAULT_TEXT_Y_BUFFER)
 
-        if self.active:
+        self._surfaces.clear()
+        self._layout_key = self._get_layout_key()
+
+    def _render(self, state: str = None) -> pygame.Surface:
+        """Build the button surface for a visual state."""
+        if state is None:
+            state = self.get_state()
+        self.renders += 1
+
+        if state == "active":
             font_colour = self.font_colour_active
         else:
             font_colour = self.font_colour
 
-        # if clean_str is active, strip bad characters
-        if self.clean_str:
-            self.text = clean_string(self.text)
-
         # make the text surface
-        font = pygame.font.Font(self.font_name, self.font_size)
+        font = font_registry.get_font(self.font_name, self.font_size)
         text_surface = font.render(self.text, True, font_colour)
 
-        # Resize the box if the text is too long.
-        if self.allow_reshape:
-            self.width = text_surface.get_width()
-        else:
-
-            while text_surface.get_width() >= self.width:
-                self.font_size -= 2
-                font = pygame.font.Font(self.font_name, self.font_size)
-                text_surface = font.render(self.text, True, font_colour)
+        # get the box surface
+        box_surface = pygame.Surface(self.box_surface_rect.size)
+
+        # change background colour based on state
+        match state:
+            case "disabled":
+                bg_col = self.bg_colour_disabled
+            case "active":
+                bg_col = self.bg_colour_active
+            case "clicked":
+                bg_col = self.bg_colour_clicked
+            case "hover":
+                bg_col = self.bg_colour_highlighted
+            case "toggled":
+                bg_col = self.bg_colour_toggled
+            case _:
+                bg_col = self.bg_colour
 
-            while text_surface.get_width() <= self.width:
-                if self.font_size >= self.max_font_size:
-                    break
-                self.font_size += 2
-                font = pygame.font.Font(self.font_name, self.font_size)
-                text_surface = font.render(self.text, True, font_colour)
+        # Fill the surface with the background color or image
+        if self.bg_image:
+            box_surface.blit(self.bg_image, (0, 0))
+        else:
+            box_surface.fill(bg_col)
 
-            # get the box surface
-        box_surface = pygame.Surface((self.width + get.BUTTON_DEFAULT_TEXT_X_BUFFER, self.height + get.BUTTON_DEFAULT_TEXT_Y_BUFFER))
+        # blit text to centre of box
+        center_x = box_surface.get_width() // 2
+        center_y = box_surface.get_height() // 2
+        box_surface.blit(text_surface, (center_x - text_surface.get_width() // 2, center_y - text_surface.get_height() // 2))
 
-        # make the box a property
-        self.box_surface_rect = box_surface.get_rect(left=self.x, top=self.y)
+        return box_surface
 
-        # change background colour based on event
-        # events for colour in order are:
+    def draw(self, screen: pygame.Surface) -> pygame.Rect:
+        """
+        Blit the button to the screen.
+
+        Returns the button rect if it looks different to the last time it was
+        drawn, else None, so that only changed buttons are redrawn.
+        """
+        surface = self.surface
+        screen.blit(surface, (self.x, self.y))
+        if surface is self._drawn:
+            return None
+        self._drawn = surface
+        return self.box_surface_rect
+
+    def get_state(self) -> str:
+        """
+        Get the visual state of the button.
+
+        The states in order of precedence are: disabled, active, clicked,
+        hover, toggled and normal.
+        """
         if not self.access:
             # if the button is not accessible, then it is disabled.
-            bg_col = self.bg_colour_disabled
+            return "disabled"
         elif self.active:
             # if the button is actively in use (e.g. text input)
-            bg_col = self.bg_colour_active
-        elif self.was_clicked(self.click_pos):
+            return "active"
+        elif self.clicked or self.was_clicked(self.click_pos):
             # else if the button has been clicked, and we are registering a delay
-            bg_col = self.bg_colour_clicked
+            return "clicked"
         elif self.is_mouse_hovering():
             # else if th mouse is hovering over the button and we wish to show what will be clicked
-            bg_col = self.bg_colour_highlighted
-        elif self.is_mouse_hovering() and self.toggleable:
-            # likewise if the mouse is hovering, and the button can be toggled.
-            bg_col = self.bg_colour_toggle_hover
+            return "hover"
         elif self.toggle:
             # else if the button has been toggled on (default if off)
-            bg_col = self.bg_colour_toggled
+            return "toggled"
         else:
             # else no modifiers present, so default to the normal colour
-            bg_col = self.bg_colour
-
-        # Fill the surface with the background color or image
-        if self.bg_image:
-            box_surface.blit(self.bg_image, (0, 0))
-        else:
-            box_surface.fill(bg_col)
+            return "normal"
 
-        # blit text to centre of box
-        center_x = box_surface.get_width() // 2
-        center_y = box_surface.get_height() // 2
-        box_surface.blit(text_surface, (center_x - text_surface.get_width() // 2, center_y - text_surface.get_height() // 2))
-
-        return box_surface
+    def update(self, click_pos: Tuple[int, int] = None, click_event: bool = False, mouse_pos: Tuple[int, int] = None) -> object:
+        """Set this frame's click information and mouse position on a retained button."""
+        self.click_pos = click_pos
+        self.click_event = click_event
+        self.mouse_pos = mouse_pos
+        return self
+
+    def set_text(self, text: str):
+        """Set the text, re-rendering only if it changed."""
+        utils.check_type(text, "text", str)
+        if self.private:
+            text = "*" * len(text)
+        if self.clean_str:
+            text = clean_string(text)
+        if text != self.text:
+            self.text = text
 
     def is_mouse_hovering(self):
         """Return True if mouse is hovering."""
         # get current mouse position
-        return self.box_surface_rect.collidepoint(pygame.mouse.get_pos())
+        mouse_pos = self.mouse_pos if self.mouse_pos is not None else pygame.mouse.get_pos()
+        return self.box_surface_rect.collidepoint(mouse_pos)
 
     def was_clicked(self, click_pos):
         """Return True if mouse clicked on button."""
@@ -262,69 +347,43 @@ class Button():
         """Get the access."""
         return self.access
 
-    def text_input_action(self, screen, text=""):
-        """Handle text input."""
+    def text_input_task(self, text=""):
+        """
+        Handle text input, as a task advanced once per frame.
+
+        Each frame receives the InputSnapshot of that frame. Enter, escape,
+        tab or a click off the text box ends the input.
+
+        Returns
+        -------
+        text : str
+            The text entered.
+        """
         # set status to active
         self.active = True
-        # set the loop break
+        self.set_text(text)
         running = True
-
-        # Set up game clock
-        clock = pygame.time.Clock()
-        # enter the event loop
         while running:
-            events = pygame.event.get()
-            # flags
-            self.click_event = False
-            click_pos = None
-            # if we have any, process them.
-            if events:
-                for event in events:
-
-                    # check if the window is closed
-                    match event.type:
-                        case pygame.QUIT:
-                            logger.info("Quit event detected. Closing the game.")
-                            # if so, end the script by breaking the while loop
-                            running = False
-                            # Quit Pygame
-                            pygame.quit()
-                            sys.exit()
-
-                        # check if a click event occured
-                        case pygame.MOUSEBUTTONDOWN:
-                            click_pos = event.pos
-                            logger.debug(f"CLICK at {click_pos}")
-                            self.click_event = True
-                            if not self.was_clicked(click_pos):
-                                # if the click was NOT on the text box, assume end.
-                                running = False
-
-                        case pygame.KEYDOWN:
-                            logger.debug(f"KEYSTROKE with {event.unicode}")
-                            if event.key in [pygame.K_RETURN, pygame.K_ESCAPE, pygame.K_TAB]:
-                                # we assume they are content with this.
-                                running = False
-
-                            elif event.key == pygame.K_BACKSPACE:
-                                text = text[:-1]
-
-                            else:
-                                text += event.unicode
-
-            if self.private:
-                self.text = "*" * len(text)
-            else:
-                self.text = text
-            button_box = self._render()
-            screen.blit(button_box, (self.x, self.y))
-
-            # render the text to the box.
-            # Update the display
-            pygame.display.update()
+            inputs = yield
+            for click_pos in inputs.clicks:
+                logger.debug(f"CLICK at {click_pos}")
+                if not self.box_surface_rect.collidepoint(click_pos):
+                    # if the click was NOT on the text box, assume end.
+                    running = False
+
+            for key, key_press in zip(inputs.keys, inputs.key_presses):
+                logger.debug(f"KEYSTROKE with {key_press}")
+                if key in [pygame.K_RETURN, pygame.K_ESCAPE, pygame.K_TAB]:
+                    # we assume they are content with this.
+                    running = False
+                    break
+                elif key == pygame.K_BACKSPACE:
+                    text = text[:-1]
+                else:
+                    text += key_press
 
-            # Limit frame rate to set FPS
-            clock.tick(get.CLOCKSPEED)
+            # the screen draws the box, only the changed text re-renders
+            self.set_text(text)
 
         self.active = False
         return text
@@ -1,15 +1,27 @@
 """Tools to interact with the NFT data."""
 import os
 import json
+import threading
 
 from nfts.generate_nfts import TYPE_CHART
 
 # NFT details
 NFT_FNAME = os.path.join(os.getcwd(), "nfts", "nft_info.json")
-# Open the file for reading
-with open(NFT_FNAME, "r") as f:
-    # Load the contents of the file into a dictionary
-    NFTS = json.load(f)
+# loaded on first use, so it can be read off the main thread
+NFTS = None
+_nfts_lock = threading.Lock()
+
+
+def load_nfts() -> dict:
+    """Get the details of every NFT, reading nft_info.json the first time."""
+    global NFTS
+    with _nfts_lock:
+        if NFTS is None:
+            # Open the file for reading
+            with open(NFT_FNAME, "r") as f:
+                # Load the contents of the file into a dictionary
+                NFTS = json.load(f)
+    return NFTS
 
 
 class Card(object):
@@ -21,15 +33,14 @@ class Card(object):
         Initialize the card.
 
         The card information is stored in our nft_info.json.
-        it assumes that NFTS has been loaded in the init preamble such that it
-        is a global variable.
+        It is read once, the first time a card is made, into the global NFTS.
 
         This class should be usable in the game, and therefore should be able
         to derive all the influences of attack power/modifiers/spell types etc.
         which ultimately results in an attack value being applied.
         """
         self.card_id = card_id
-        details = NFTS[str(card_id)]
+        details = load_nfts()[str(card_id)]
         self.name = details["name"]
         self.type = details["card_type"]
 
@@ -0,0 +1,274 @@
+"""
+Password hashing.
+
+Passwords are stored as salted hashes made by a key derivation function from
+hashlib, with the function, its cost and the salt kept in the stored string so
+the cost can be raised without breaking the existing users:
+
+    pbkdf2_sha256$600000$<salt>$<hash>
+    scrypt$32768$8$1$<salt>$<hash>
+
+A hash costs a good fraction of a second on purpose. Hashing and checking are
+run on a small pool of worker threads, hashlib leaves the GIL whilst it
+hashes, so the frames go on rendering and at most settings.CREDENTIALS_WORKERS
+hashes run at once, however many logins are queued on the I/O threads.
+
+Users registered before hashing have their password stored as it was typed.
+verify_password accepts those, and says they need rehashing, as it does for
+hashes made with an older function or a lower cost, so usermanagement.load_user
+replaces them on the next successful login.
+
+The cost is tuned to a target time on the machine at hand with
+benchmarks/bench_credentials.py, see calibrate.
+"""
+import base64
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Tuple
+
+from cryptids import settings as get
+from cryptids.utils import check_type
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+ALGORITHMS = ["pbkdf2_sha256", "scrypt"]
+SALT_BYTES = 16
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+
+def default_cost(algorithm: str) -> int:
+    """Get the cost new hashes are made with: the PBKDF2 iterations or the scrypt n."""
+    match algorithm:
+        case "pbkdf2_sha256":
+            return get.CREDENTIALS_PBKDF2_ITERATIONS
+        case "scrypt":
+            return get.CREDENTIALS_SCRYPT_N
+        case _:
+            raise ValueError(f"Unrecognised password hash: {algorithm}")
+
+
+def _derive(password: str, algorithm: str, cost: int, salt: bytes) -> bytes:
+    """Run the key derivation function."""
+    match algorithm:
+        case "pbkdf2_sha256":
+            return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, cost)
+        case "scrypt":
+            # scrypt needs 128 * r * n bytes, more than hashlib allows by default
+            return hashlib.scrypt(password.encode(), salt=salt, n=cost, r=SCRYPT_R, p=SCRYPT_P,
+                                  maxmem=128 * SCRYPT_R * (cost + SCRYPT_P + 2) + 1024 * 1024)
+        case _:
+            raise ValueError(f"Unrecognised password hash: {algorithm}")
+
+
+def _b64(data: bytes) -> str:
+    """Encode bytes as base64 text."""
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password: str, algorithm: str = None, cost: int = None, salt: bytes = None) -> str:
+    """
+    Hash a password for storing.
+
+    Parameters
+    ----------
+        password : str,
+            The password.
+
+        algorithm : str,
+            "pbkdf2_sha256" or "scrypt", settings.CREDENTIALS_ALGORITHM by default.
+
+        cost : int,
+            The PBKDF2 iterations or the scrypt n, the one in settings by default.
+
+        salt : bytes,
+            A new random salt by default.
+
+    Returns
+    -------
+        stored : str,
+            The function, cost, salt and hash, as stored with the user.
+
+    """
+    check_type(password, "password", str)
+    algorithm = get.CREDENTIALS_ALGORITHM if algorithm is None else algorithm
+    cost = default_cost(algorithm) if cost is None else cost
+    salt = os.urandom(SALT_BYTES) if salt is None else salt
+    digest = _b64(_derive(password, algorithm, cost, salt))
+    if algorithm == "scrypt":
+        return f"scrypt${cost}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${digest}"
+    return f"{algorithm}${cost}${_b64(salt)}${digest}"
+
+
+def parse_hash(stored: str):
+    """Get the (algorithm, cost, salt, digest) of a stored hash, None for a plaintext password."""
+    parts = stored.split("$")
+    try:
+        match parts:
+            case ["pbkdf2_sha256", cost, salt, digest]:
+                return "pbkdf2_sha256", int(cost), base64.b64decode(salt, validate=True), base64.b64decode(digest, validate=True)
+            case ["scrypt", cost, r, p, salt, digest] if int(r) == SCRYPT_R and int(p) == SCRYPT_P:
+                return "scrypt", int(cost), base64.b64decode(salt, validate=True), base64.b64decode(digest, validate=True)
+    except ValueError:
+        pass
+    return None
+
+
+def verify_password(password: str, stored: str) -> Tuple[bool, bool]:
+    """
+    Check a password against the one stored with a user.
+
+    Returns
+    -------
+        (matches, needs_rehash) : Tuple[bool, bool],
+            Whether the password is right, and whether the stored password
+            should be hashed again: it is in plaintext, or hashed with another
+            function or a lower cost than in settings.
+
+    """
+    check_type(password, "password", str)
+    check_type(stored, "stored", str)
+    parsed = parse_hash(stored)
+    if parsed is None:
+        # a password stored before hashing
+        return hmac.compare_digest(password.encode(), stored.encode()), True
+    algorithm, cost, salt, digest = parsed
+    matches = hmac.compare_digest(_derive(password, algorithm, cost, salt), digest)
+    return matches, needs_rehash(stored)
+
+
+def needs_rehash(stored: str) -> bool:
+    """Check whether a stored password is in plaintext or hashed below the settings."""
+    parsed = parse_hash(stored)
+    if parsed is None:
+        return True
+    algorithm, cost = parsed[:2]
+    return algorithm != get.CREDENTIALS_ALGORITHM or cost < default_cost(algorithm)
+
+
+def calibrate(target_seconds: float = None, algorithm: str = None, start_cost: int = None) -> Tuple[int, float]:
+    """
+    Find the cost of a hash taking a target time on this machine.
+
+    The cost is doubled until a hash takes the target time. PBKDF2 takes time
+    in proportion to its iterations, so they are then scaled to the target,
+    scrypt's n must be a power of two, the largest under the target is kept.
+
+    Returns
+    -------
+        (cost, seconds) : Tuple[int, float],
+            The cost, and the time a hash took at it.
+
+    """
+    target_seconds = get.CREDENTIALS_TARGET_SECONDS if target_seconds is None else target_seconds
+    algorithm = get.CREDENTIALS_ALGORITHM if algorithm is None else algorithm
+    cost = start_cost if start_cost is not None else {"pbkdf2_sha256": 10_000, "scrypt": 2 ** 10}[algorithm]
+    salt = os.urandom(SALT_BYTES)
+
+    def timed(cost):
+        start = time.perf_counter()
+        _derive("calibrate", algorithm, cost, salt)
+        return time.perf_counter() - start
+
+    seconds, previous = timed(cost), None
+    while seconds < target_seconds:
+        previous = (cost, seconds)
+        cost *= 2
+        seconds = timed(cost)
+    if algorithm == "scrypt":
+        return previous if previous is not None else (cost, seconds)
+    # round to a thousand iterations
+    cost = max(1000, int(round(cost * target_seconds / seconds, -3)))
+    return cost, timed(cost)
+
+
+class CredentialPool(object):
+    """
+    The worker threads hashing and checking passwords.
+
+    Parameters
+    ----------
+        workers : int,
+            The number of hashes run at once.
+
+    Methods
+    -------
+        hash(password)
+            Hash a password, in a future.
+
+        verify(password, stored)
+            Check a password, in a future of (matches, needs_rehash).
+
+        close()
+            Stop the workers.
+
+        stats()
+            Get the number of hashes and their latency.
+    """
+
+    def __init__(self, workers: int = get.CREDENTIALS_WORKERS):
+        check_type(workers, "workers", int)
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.hashes = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _submit(self, func, *args) -> Future:
+        """Run a hash on the workers, starting them on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cryptids-credentials")
+            return self._executor.submit(self._timed, func, *args)
+
+    def _timed(self, func, *args):
+        """Run a hash, counting its time."""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.hashes += 1
+                self.seconds += seconds
+                self.max_seconds = max(self.max_seconds, seconds)
+
+    def hash(self, password: str) -> Future:
+        """Hash a password with the function and cost in settings, see hash_password."""
+        return self._submit(hash_password, password)
+
+    def verify(self, password: str, stored: str) -> Future:
+        """Check a password against the stored one, see verify_password."""
+        return self._submit(verify_password, password, stored)
+
+    def close(self) -> None:
+        """Stop the workers, after the hashes queued."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Get the number of hashes and their mean and longest time in ms."""
+        with self._lock:
+            return {"hashes": self.hashes,
+                    "mean_ms": 1000 * self.seconds / self.hashes if self.hashes else 0.0,
+                    "max_ms": 1000 * self.max_seconds}
+
+
+# the process wide pool, started on first use
+credential_pool = CredentialPool(get.CREDENTIALS_WORKERS)
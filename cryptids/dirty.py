@@ -0,0 +1,119 @@
+"""
+Dirty rectangle tracking.
+
+Screens report the regions of the window they changed during a frame, and the
+main loop passes only those regions to pygame.display.update.
+"""
+import logging
+import sys
+from typing import List
+
+import pygame
+
+from cryptids import settings as get
+from cryptids.fonts import font_registry
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+class DirtyRects(object):
+    """
+    Collect the regions of the window changed during a frame.
+
+    Parameters
+    ----------
+        size : Tuple[int, int],
+            The window size.
+        max_rects : int,
+            Beyond this many rects the whole window is updated instead.
+
+    Methods
+    -------
+        mark(rect)
+            Mark a region as changed. None is ignored.
+
+        mark_full()
+            Mark the whole window as changed.
+
+        consume()
+            Get the changed regions of the frame and reset.
+    """
+
+    def __init__(self,
+                 size=(get.WINWIDTH, get.WINHEIGHT),
+                 max_rects: int = get.DIRTY_RECTS_MAX):
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.max_rects = max_rects
+        self.rects = []
+        # the first frame always needs drawing in full
+        self.full = True
+
+    def mark(self, rect) -> None:
+        """Mark a region as changed."""
+        if rect is None or self.full:
+            return
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width and rect.height:
+            self.rects.append(rect)
+            if len(self.rects) > self.max_rects:
+                self.mark_full()
+
+    def mark_full(self) -> None:
+        """Mark the whole window as changed."""
+        self.full = True
+        self.rects.clear()
+
+    def consume(self) -> List[pygame.Rect]:
+        """Get the changed regions of this frame and reset for the next."""
+        if self.full:
+            rects = [self.screen_rect.copy()]
+        else:
+            rects = self.rects
+        self.rects = []
+        self.full = False
+        return rects
+
+
+def count_pixels(rects: List[pygame.Rect]) -> int:
+    """Count the pixels covered by a list of rects (overlaps count twice)."""
+    return sum(rect.width * rect.height for rect in rects)
+
+
+class DirtyRectOverlay(object):
+    """
+    Debug overlay that outlines the dirty regions of each frame.
+
+    The outlines are drawn onto the screen, so the regions outlined on the
+    previous frame are also updated to wipe their outlines.
+    """
+
+    def __init__(self, enabled: bool = get.DEBUG_DIRTY_RECTS):
+        self.enabled = enabled
+        self.previous = []
+        self.pixels = 0
+
+    def draw(self, screen: pygame.Surface, rects: List[pygame.Rect]) -> List[pygame.Rect]:
+        """Outline the rects and return the rects that now need updating."""
+        self.pixels = count_pixels(rects)
+        if not self.enabled:
+            return rects
+        for rect in rects:
+            pygame.draw.rect(screen, get.DIRTY_RECT_OVERLAY_COLOUR, rect, 1)
+
+        # pixel count label
+        font = font_registry.get_font(get.DIRTY_RECT_OVERLAY_FONT, get.DIRTY_RECT_OVERLAY_FONT_SIZE)
+        text = font.render(f"{len(rects)} rects, {self.pixels} px", True, get.DIRTY_RECT_OVERLAY_COLOUR, get.BLACK)
+        textRect = text.get_rect()
+        textRect.topright = (screen.get_width(), 0)
+        screen.blit(text, textRect)
+
+        updated = rects + self.previous + [textRect]
+        self.previous = [rect.copy() for rect in rects]
+        return updated
@@ -0,0 +1,148 @@
+"""
+Font registry.
+
+Building a pygame Font parses the font file and sets up the rasteriser, so
+fonts are built once per (path, size) and shared between every caller.
+"""
+import logging
+import sys
+from typing import List, Tuple
+
+import pygame
+
+from cryptids import settings as get
+from cryptids import utils
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+class FontRegistry(object):
+    """
+    Shared pygame Font objects keyed by (path, size).
+
+    Methods
+    -------
+        get_font(path, size)
+            Get the shared Font, building it on the first request only.
+
+        preload(fonts)
+            Build a list of (path, size) fonts ahead of time.
+
+        fit_size(path, text, max_size, max_width)
+            Get the largest font size for text to fit inside a width.
+
+        stats()
+            Get the hit/miss counters and how often each font was opened.
+    """
+
+    def __init__(self):
+        self._fonts = {}
+        self._fits = {}
+        self.opens = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, path: str, size: int) -> pygame.font.Font:
+        """
+        Get the shared Font for a font file and size.
+
+        Parameters
+        ----------
+        path : str
+            Path to the .ttf/.otf font file (or None for the pygame default).
+        size : int
+            The font size.
+
+        Returns
+        -------
+        font : pygame.font.Font
+            The shared font.
+
+        """
+        key = (path, int(size))
+        font = self._fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+        self.misses += 1
+
+        # build the font, this is the only place a Font should be opened.
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(path, key[1])
+        self._fonts[key] = font
+        self.opens[key] = self.opens.get(key, 0) + 1
+        return font
+
+    def preload(self, fonts: List[Tuple[str, int]] = get.PRELOAD_FONTS) -> None:
+        """Build a list of (path, size) fonts ahead of time."""
+        utils.check_type(fonts, "fonts", list)
+        for path, size in fonts:
+            self.get_font(path, size)
+        logger.debug(f"Preloaded {len(fonts)} fonts.")
+
+    def fit_size(self, path: str, text: str, max_size: int, max_width: int) -> int:
+        """
+        Get the largest font size no bigger than max_size for text to fit.
+
+        The size is found by a binary search over the text metrics alone, no
+        text is rendered. Results are memoised per (font, text, width).
+
+        Parameters
+        ----------
+        path : str
+            Path to the .ttf/.otf font file.
+        text : str
+            The text to fit.
+        max_size : int
+            The largest font size allowed.
+        max_width : int
+            The text must be narrower than this (pixels).
+
+        Returns
+        -------
+        size : int
+            The fitted font size. At least 1, even if that does not fit.
+
+        """
+        key = (path, text, max_size, max_width)
+        size = self._fits.get(key)
+        if size is not None:
+            return size
+
+        # search for the largest size that fits in [low, high].
+        low, high = 1, max(1, max_size)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.get_font(path, mid).size(text)[0] < max_width:
+                low = mid
+            else:
+                high = mid - 1
+
+        self._fits[key] = low
+        return low
+
+    def clear(self):
+        """Drop all shared fonts and fitted sizes."""
+        self._fonts.clear()
+        self._fits.clear()
+
+    def stats(self) -> dict:
+        """Get the hit/miss counters and how often each font was opened."""
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "fonts": len(self._fonts),
+                "fitted_texts": len(self._fits),
+                "max_opens_per_font": max(self.opens.values(), default=0),
+                "opens": dict(self.opens)}
+
+
+# the process wide font registry
+font_registry = FontRegistry()
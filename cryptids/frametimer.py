@@ -0,0 +1,266 @@
+"""
+Per phase frame timing.
+
+The main loop times each phase of a frame, the event pump, the render of the
+game status, the buttons, the display update and the wait for the next frame,
+into a fixed size ring buffer of the latest frames:
+
+    frame_timer.start_frame()
+    with frame_timer.phase("events"):
+        inputs = poll_inputs()
+
+The buffer can be shown as an overlay (F3 in game) and dumped to CSV or JSON
+(F4 in game) for offline analysis. The buttons are timed within the render, so
+the render time includes them.
+"""
+from array import array
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from typing import List
+
+import pygame
+
+from cryptids import settings as get
+from cryptids import utils
+from cryptids.fonts import font_registry
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+PHASES = ["events", "render", "buttons", "display", "wait"]
+
+
+class _Phase(object):
+    """Reusable context manager adding the time spent in it to a phase."""
+
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.current[self.name] += time.perf_counter() - self.start
+        return False
+
+
+class _NoPhase(object):
+    """Context manager that times nothing, whilst the timer is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FrameTimer(object):
+    """
+    Time the phases of each frame into a ring buffer.
+
+    Parameters
+    ----------
+        size : int,
+            The number of frames kept.
+        enabled : bool,
+            Whether the phases are timed.
+
+    Methods
+    -------
+        start_frame(status)
+            Record the frame before and start a new one.
+
+        phase(name)
+            Context manager timing a phase of the frame.
+
+        stats()
+            Get the mean, p95 and max time of each phase in ms.
+
+        dump(path)
+            Write the buffer to a .csv or .json file.
+
+        draw(screen)
+            Draw the overlay, if it is shown.
+    """
+
+    def __init__(self, size: int = get.FRAME_TIMER_FRAMES, enabled: bool = get.FRAME_TIMER_ENABLED):
+        utils.check_type(size, "size", int)
+        self.size = size
+        self.enabled = enabled
+        self.show_overlay = False
+        self._phases = {name: _Phase(self, name) for name in PHASES}
+        self._no_phase = _NoPhase()
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self._status = None
+        self._start = None
+        # the ring buffer, one column of seconds per phase
+        self._columns = {name: array("d", [0.0]) * size for name in PHASES + ["total"]}
+        self._statuses = [None] * size
+        self.frames = 0
+        # the overlay surface, re-rendered a few times a second
+        self._overlay = None
+        self._overlay_time = 0.0
+
+    def start_frame(self, status: str = None) -> None:
+        """Record the frame before, if any, and start timing a new one."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._start is not None:
+            i = self.frames % self.size
+            for name, seconds in self.current.items():
+                self._columns[name][i] = seconds
+                self.current[name] = 0.0
+            self._columns["total"][i] = now - self._start
+            self._statuses[i] = self._status
+            self.frames += 1
+        self._start = now
+        self._status = status
+
+    def phase(self, name: str):
+        """Context manager timing a phase of the frame."""
+        return self._phases[name] if self.enabled else self._no_phase
+
+    def _recent(self) -> List[int]:
+        """Indices into the buffer of the recorded frames, oldest first."""
+        count = min(self.frames, self.size)
+        first = self.frames - count
+        return [i % self.size for i in range(first, self.frames)]
+
+    def stats(self, last: int = None) -> dict:
+        """
+        Get the mean, p95 and max time of each phase in ms.
+
+        Parameters
+        ----------
+        last : int, optional
+            Only the latest number of frames. The default is every frame kept.
+
+        Returns
+        -------
+        stats : dict
+            {phase: {"mean_ms", "p95_ms", "max_ms"}}, empty before any frames.
+
+        """
+        indices = self._recent()
+        if last is not None:
+            indices = indices[-last:]
+        if not indices:
+            return {}
+        stats = {}
+        for name, column in self._columns.items():
+            values = sorted(column[i] for i in indices)
+            stats[name] = {"mean_ms": 1000 * sum(values) / len(values),
+                           "p95_ms": 1000 * values[min(len(values) - 1, int(0.95 * len(values)))],
+                           "max_ms": 1000 * values[-1]}
+        return stats
+
+    def rows(self) -> List[dict]:
+        """Get the recorded frames, oldest first, with each phase in ms."""
+        rows = []
+        for frame, i in enumerate(self._recent(), start=max(0, self.frames - self.size)):
+            row = {"frame": frame, "status": self._statuses[i]}
+            row.update({f"{name}_ms": 1000 * column[i] for name, column in self._columns.items()})
+            rows.append(row)
+        return rows
+
+    def dump(self, path: str) -> str:
+        """
+        Write the recorded frames to a file.
+
+        Parameters
+        ----------
+        path : str
+            A .json file, or else CSV.
+
+        Returns
+        -------
+        path : str
+            The file written.
+
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        rows = self.rows()
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"phases": PHASES, "stats": self.stats(), "frames": rows}, f, indent=1)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["frame", "status"] + [f"{name}_ms" for name in self._columns])
+                writer.writeheader()
+                writer.writerows(rows)
+        logger.info(f"Wrote the timing of {len(rows)} frames to {path}.")
+        return path
+
+    def toggle_overlay(self) -> bool:
+        """Show or hide the overlay, returning whether it is shown."""
+        self.show_overlay = not self.show_overlay
+        self._overlay = None
+        return self.show_overlay
+
+    def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        """
+        Draw the overlay, if it is shown.
+
+        The overlay shows the mean time of each phase over the latest second
+        of frames and is re-rendered every settings.FRAME_TIMER_OVERLAY_REFRESH
+        seconds. It is blitted every frame, as the screen may draw over it.
+
+        Returns
+        -------
+        rects : List[pygame.Rect]
+            The region of the overlay if it changed, to update the display.
+
+        """
+        if not self.show_overlay:
+            return []
+        rects = []
+        now = time.perf_counter()
+        if self._overlay is None or now - self._overlay_time >= get.FRAME_TIMER_OVERLAY_REFRESH:
+            self._overlay = self._build_overlay()
+            self._overlay_time = now
+            rects = [self._overlay.get_rect()]
+        screen.blit(self._overlay, (0, 0))
+        return rects
+
+    def _build_overlay(self) -> pygame.Surface:
+        """Render the mean time of each phase over the latest second."""
+        stats = self.stats(last=get.CLOCKSPEED)
+        font = font_registry.get_font(get.FRAME_TIMER_OVERLAY_FONT, get.FRAME_TIMER_OVERLAY_FONT_SIZE)
+        lines = [f"{self._status}: {stats['total']['mean_ms']:.2f} ms" if stats else f"{self._status}: -"]
+        for name in PHASES:
+            if stats:
+                lines.append(f"{name}: {stats[name]['mean_ms']:.2f} (p95 {stats[name]['p95_ms']:.2f}) ms")
+        texts = [font.render(line, True, get.FRAME_TIMER_OVERLAY_COLOUR) for line in lines]
+        width = max(text.get_width() for text in texts)
+        height = sum(text.get_height() for text in texts)
+        overlay = pygame.Surface((width, height))
+        overlay.fill(get.BLACK)
+        y = 0
+        for text in texts:
+            overlay.blit(text, (0, y))
+            y += text.get_height()
+        return overlay
+
+
+# the frame timer of the main loop
+frame_timer = FrameTimer()
@@ -3,17 +3,32 @@ The main Game class.
 
 This controls all the sequences of the game and deals with their rendering.
 """
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from random import randint
 import sys
 import textwrap
+import time
 
 import pygame
 
 import cryptids.settings as get
 from cryptids import utils
+from cryptids.assets import asset_manager
+from cryptids.fonts import font_registry
 from cryptids.button import Button
+from cryptids.dirty import DirtyRects
+from cryptids.frametimer import frame_timer
+from cryptids.inputs import InputSnapshot
+from cryptids import tasks
+from cryptids.tasks import TaskRunner
+from cryptids.layers import LayerCache
+from cryptids.loader import AssetLoader
+from cryptids.screens import Screen, ScreenRegistry
+from cryptids.timeline import Timeline
+from cryptids.streaming import CardArtStreamer
 from cryptids import usermanagement
+from cryptids import card
 from cryptids import gameplay
 
 # get the logger
@@ -29,47 +44,214 @@ if get.VERBOSE:
 class GameWrapper(object):
     """Wrapper that renders the game."""
 
-    def __init__(self, status: str = get.DEFAULT_STATUS):
+    def __init__(self, status: str = get.DEFAULT_STATUS, clock=time.monotonic, io_executor=None):
         self.game_status = status
-        self.intro_sequence_position = 1
-        self.outro_sequence_position = 1
-        self.intro_counter = 0
-        self.outro_counter = 0
+        # the intro and outro play by elapsed time on the clock
+        self.intro = Timeline([("title", get.TITLE_DURATION), ("credit", get.CREDIT_DURATION), ("logo", get.LOGO_DURATION)], clock=clock)
+        self.outro = Timeline([("logo", get.LOGO_DURATION), ("thanks", get.OUTRO_DURATION)], clock=clock)
         self.focus_pos = [0, 0]
         self.login_success = False
         self.game_started = False
+        self.loading_started = False
         self.register_attempt = False
         self.username = None
         self.user = None
+        self.user_deck_selection = []
         self.username_text = get.DEFAULT_USERNAME
         self.password_text = get.DEFAULT_PASSWORD
         self.email_text = get.DEFAULT_EMAIL
-
-    def render(self, screen, click_pos, key_press, click_event: bool) -> object:
-        """Select the game status to render."""
-        match self.game_status:
-            case get.STATUS_INTRO:
-                self._render_intro(screen, click_pos, key_press, click_event)
-            case get.STATUS_HOME:
-                self._render_home_screen(screen, click_pos, key_press, click_event)
-            case get.STATUS_SETTINGS:
-                self._render_settings_screen(screen, click_pos, key_press, click_event)
-            case get.STATUS_PREPLAY:
-                self._render_pre_play_mode(screen, click_pos, key_press, click_event)
-            case get.STATUS_REGISTER:
-                self._render_register(screen, click_pos, key_press, click_event)
-            case get.STATUS_OUTRO:
-                self._render_outro(screen, click_pos, key_press, click_event)
-            case get.STATUS_GAMEPLAY:
-                self._render_gameplay(screen, click_pos, key_press, click_event)
-            case get.STATUS_PAUSE:
-                self._render_pause_menu(screen, click_pos, key_press, click_event)
-            case get.STATUS_POPUP:
-                self._render_status_menu
-            case _:
-                raise ValueError(f"Unrecognised game_status: {self.game_status}")
+        # retained buttons, built once per screen and kept alive.
+        self.buttons = {}
+        # the regions of the window changed this frame
+        self.dirty = DirtyRects()
+        # the pre-composited static content of each screen
+        self.layers = LayerCache()
+        # the card art of the cards in play, decoded in the background
+        self.card_art = CardArtStreamer()
+        # the images of the menus, preloaded in the background
+        self.asset_loader = AssetLoader()
+        # each game status, its hooks and resources
+        self.screens = ScreenRegistry(self.layers, clock=clock)
+        self._register_screens()
+        self.player1 = None
+        self._scene = None
+        # the input of the frame being rendered
+        self.inputs = InputSnapshot()
+        self._input_blocked = False
+        self.renders = 0
+        # behaviour spanning several frames: click delays, popups and text entry
+        self.tasks = TaskRunner()
+        # the user and NFT files are read and written off the main thread
+        if io_executor is None:
+            io_executor = ThreadPoolExecutor(max_workers=get.IO_WORKERS, thread_name_prefix="cryptids-io")
+        self.io_executor = io_executor
+        # the asyncio event loop driving the game, None for the plain loop
+        self.loop = None
+
+        # build every font the screens use once, up front.
+        font_registry.preload(get.PRELOAD_FONTS)
+        # and read the NFT details whilst the intro plays
+        self._offload(card.load_nfts, name="load nfts", modal=False)
+
+    def render(self, screen, click_pos, key_press, click_event: bool, inputs: InputSnapshot = None) -> object:
+        """Select the game status to render, once per frame."""
+        # the whole input of the frame, for the buttons' mouse position
+        self.inputs = inputs if inputs is not None else InputSnapshot()
+        self.renders += 1
+        # popups, text entry and click delays take the input from the screen
+        self._input_blocked = self.tasks.modal
+        if self._input_blocked:
+            click_pos, key_press, click_event = None, None, False
+        # anything other than the buttons changing needs a full redraw
+        scene = self._get_scene()
+        if scene != self._scene:
+            self.dirty.mark_full()
+            self._scene = scene
+
+        # enter the screen of the game status, then draw it
+        current = self.screens.switch(self.game_status)
+        self.screens.update()
+        current.draw(screen, click_pos, key_press, click_event)
+
+        # advance the tasks, drawing over the screen
+        self._input_blocked = False
+        self.tasks.step(self.inputs)
         return self
 
+    def _register_screens(self) -> None:
+        """Declare the hooks and resources of each game status, and the screens likely to follow it."""
+        logo = [get.LOGO_SCREEN_IMAGE_PATH]
+        for screen in [Screen(get.STATUS_INTRO, self._render_intro, layers=["intro.title", "intro.credit", "logo"],
+                              images=logo, loader=self.asset_loader, next_screens=[get.STATUS_HOME]),
+                       Screen(get.STATUS_HOME, self._render_home_screen, layers=["logo"],
+                              images=logo, loader=self.asset_loader, next_screens=[get.STATUS_PREPLAY, get.STATUS_SETTINGS, get.STATUS_OUTRO]),
+                       # the settings may have changed what the screens look like
+                       Screen(get.STATUS_SETTINGS, self._render_settings_screen, layers=["settings"],
+                              images=logo, loader=self.asset_loader, next_screens=[get.STATUS_HOME], exit=self.layers.invalidate),
+                       Screen(get.STATUS_PREPLAY, self._render_pre_play_mode, layers=["play"],
+                              images=logo, loader=self.asset_loader, next_screens=[get.STATUS_GAMEPLAY, get.STATUS_REGISTER, get.STATUS_HOME]),
+                       Screen(get.STATUS_REGISTER, self._render_register, layers=["register"],
+                              images=logo, loader=self.asset_loader, next_screens=[get.STATUS_PREPLAY]),
+                       Screen(get.STATUS_OUTRO, self._render_outro, layers=["logo", "outro.thanks"],
+                              images=logo, loader=self.asset_loader),
+                       # only the art the streamer keeps, none before the deck is shuffled
+                       Screen(get.STATUS_GAMEPLAY, self._render_gameplay,
+                              images=lambda: self.card_art.wanted_paths(self.player1) if self.player1 is not None else [],
+                              loader=self.card_art.loader, next_screens=[get.STATUS_PAUSE]),
+                       Screen(get.STATUS_PAUSE, self._render_pause_menu, layers=["pause"],
+                              images=logo, loader=self.asset_loader, next_screens=[get.STATUS_GAMEPLAY, get.STATUS_HOME]),
+                       # popups are drawn by their task, over the screen they opened on
+                       Screen(get.STATUS_POPUP, lambda *args: None, layers=["popup"],
+                              images=logo, loader=self.asset_loader)]:
+            self.screens.register(screen)
+
+    def is_animating(self) -> bool:
+        """Whether the current screen changes without input."""
+        return self.game_status in get.ANIMATED_STATUSES or self.tasks.animating
+
+    def _get_scene(self) -> tuple:
+        """Get the state that decides what is drawn apart from the buttons."""
+        return (self.game_status,
+                self.intro.current,
+                self.outro.current,
+                self.login_success,
+                self.game_started)
+
+    def _button(self, name: str, click_pos, click_event: bool, **kwargs) -> Button:
+        """
+        Get a retained button, building it the first time it is asked for.
+
+        Only the text and access of an existing button are updated from the
+        kwargs, all other styling is fixed when the button is first built.
+        The button surface is only re-rendered when one of these changes.
+        """
+        with frame_timer.phase("buttons"):
+            button = self.buttons.get(name)
+            if button is None:
+                button = Button(**kwargs)
+                self.buttons[name] = button
+            else:
+                # whilst typing, the text box owns its text
+                if "text" in kwargs and not button.active:
+                    button.set_text(kwargs["text"])
+                if "access" in kwargs:
+                    button.set_access(kwargs["access"])
+            # under a modal task the screen's buttons do not see the mouse
+            mouse_pos = (-1, -1) if self._input_blocked else self.inputs.mouse_pos
+            return button.update(click_pos, click_event, mouse_pos)
+
+    def _click(self, button: Button, action) -> None:
+        """Show a button as clicked for a moment, then run its action."""
+        self.tasks.start(self._click_task(button, action), name="click", modal=True)
+
+    def _click_task(self, button: Button, action):
+        """Hold the clicked look of a button for the click delay."""
+        button.clicked = True
+        yield from tasks.delay(get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED)
+        button.clicked = False
+        action()
+
+    def _offload(self, func, *args, name: str = "io", modal: bool = True, on_done=None):
+        """
+        Run blocking work, e.g. reading the user file, off the main thread.
+
+        Under the asyncio loop the work is run in the loop's executor,
+        otherwise it is submitted to the I/O threads. Either way the frames go
+        on rendering whilst a task waits for it, then on_done gets its result.
+        Modal work takes the input from the screen until it finishes.
+        """
+        if self.loop is not None:
+            future = self.loop.run_in_executor(self.io_executor, func, *args)
+        else:
+            future = self.io_executor.submit(func, *args)
+        return self.tasks.start(tasks.wait_for(future), name=name, modal=modal, on_done=on_done)
+
+    def _text_input(self, textbox: Button, attribute: str, text: str = None) -> None:
+        """Type into a text box, storing the text in an attribute when done."""
+        if text is None:
+            text = getattr(self, attribute)
+        self.tasks.start(textbox.text_input_task(text), name="text input", modal=True, animated=False,
+                         on_done=lambda text: setattr(self, attribute, text))
+
+    def _blit_layer(self, screen, name: str, builder, *args, pos=(0, 0), opacity: float = 1.0) -> None:
+        """Blit the pre-composited static layer of a screen, faded to black below full opacity."""
+        layer = self.layers.get(name, screen.get_size(), builder, *args)
+        if opacity >= 1:
+            screen.blit(layer, pos)
+            return
+        screen.fill(get.BLACK)
+        layer.set_alpha(int(255 * opacity))
+        screen.blit(layer, pos)
+        layer.set_alpha(None)
+        self.dirty.mark_full()
+
+    @staticmethod
+    def _blit_text(surface, font_name, font_size, text, colour, **position) -> None:
+        """Render text and blit it, positioned by pygame.Rect keywords."""
+        font = font_registry.get_font(font_name, font_size)
+        text = font.render(text, True, colour)
+        surface.blit(text, text.get_rect(**position))
+
+    def _build_text_layer(self, size, background, lines) -> pygame.Surface:
+        """Composite lines of (font, font size, text, colour, centre) text."""
+        layer = pygame.Surface(size)
+        layer.fill(background)
+        for font_name, font_size, text, colour, centre in lines:
+            self._blit_text(layer, font_name, font_size, text, colour, center=centre)
+        return layer
+
+    def _build_logo_layer(self, size, alpha=None, labels=()) -> pygame.Surface:
+        """Composite the background, logo and (font, size, text, colour, left, top) labels."""
+        layer = pygame.Surface(size)
+        layer.fill(get.LOGO_SCREEN_BACKGROUND_COLOR)
+        logo = asset_manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=get.WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT, alpha=alpha)
+        logoRect = logo.get_rect()
+        logoRect.center = get.CENTRE
+        layer.blit(logo, logoRect)
+        for font_name, font_size, text, colour, left, top in labels:
+            self._blit_text(layer, font_name, font_size, text, colour, left=left, top=top)
+        return layer
+
     def _render_intro(self, screen, click_pos, key_press, click_event):
         """
         "Draw the intro.
@@ -80,56 +262,34 @@ class GameWrapper(object):
             sequence 2) Developer credit
             sequence 3) Cryptid logo
 
+        Each plays for its duration in settings, by elapsed time, fading in
+        and out.
         """
-        # if we are in the title screen
-        match self.intro_sequence_position:
-            case 1:
-                if self.intro_counter < get.CLOCKSPEED * get.TITLE_DURATION:
-                    # title text
-                    screen.fill(get.TITLE_SCREEN_BACKGROUND_COLOR)
-                    font = pygame.font.Font(get.TITLE_SCREEN_FONT, get.TITLE_SCREEN_FONT_SIZE)
-                    text = font.render(get.TITLE_SCREEN_TEXT, True, get.TITLE_SCREEN_TEXT_COLOUR)
-                    textRect = text.get_rect()
-                    textRect.center = (get.WINWIDTH // 2, get.WINHEIGHT // 2)
-                    screen.blit(text, textRect)
-                    self.intro_counter += 1
-                else:
-                    # else the title sequence must end
-                    logger.info("Moving to the title screen.")
-                    self.intro_sequence_position += 1
-                    self.intro_counter = 0
-
-        # else if we are on the developer credit
-            case 2:
-                if self.intro_counter < get.CLOCKSPEED * get.CREDIT_DURATION:
-                    screen.fill(get.CREDIT_SCREEN_BACKGROUND_COLOR)
-                    font = pygame.font.Font(get.CREDIT_SCREEN_FONT, get.CREDIT_SCREEN_FONT_SIZE)
-                    text = font.render(get.CREDIT_SCREEN_TEXT, True, get.CREDIT_SCREEN_TEXT_COLOUR)
-                    textRect = text.get_rect()
-                    textRect.center = get.CENTRE
-                    screen.blit(text, textRect)
-                    self.intro_counter += 1
-                else:
-                    # else the title sequence must end
-                    logger.info("Moving to logo screen.")
-                    self.intro_sequence_position += 1
-                    self.intro_counter = 0
-
-        # else if we are on the logo screen.
-            case 3:
-                if self.intro_counter < get.CLOCKSPEED * get.LOGO_DURATION:
-                    screen.fill(get.LOGO_SCREEN_BACKGROUND_COLOR)
-                    logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-                    logo = utils.reshape_keep_aspect(logo, new_height=get.WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-                    logoRect = logo.get_rect()
-                    logoRect.center = get.CENTRE
-                    screen.blit(logo, logoRect)
-
-                    self.intro_counter += 1
-                else:
-                    # else the title sequence must end
-                    logger.info("Moving to home screen.")
-                    self.game_status = get.STATUS_HOME
+        # any click or key press skips the intro
+        if click_event or key_press is not None:
+            self.intro.skip()
+
+        match self.intro.update():
+            case "title":
+                # title text
+                self._blit_layer(screen, "intro.title", self._build_text_layer, get.TITLE_SCREEN_BACKGROUND_COLOR,
+                                 ((get.TITLE_SCREEN_FONT, get.TITLE_SCREEN_FONT_SIZE, get.TITLE_SCREEN_TEXT, get.TITLE_SCREEN_TEXT_COLOUR, get.CENTRE),),
+                                 opacity=self.intro.fade(get.SEQUENCE_FADE_DURATION))
+
+            # developer credit
+            case "credit":
+                self._blit_layer(screen, "intro.credit", self._build_text_layer, get.CREDIT_SCREEN_BACKGROUND_COLOR,
+                                 ((get.CREDIT_SCREEN_FONT, get.CREDIT_SCREEN_FONT_SIZE, get.CREDIT_SCREEN_TEXT, get.CREDIT_SCREEN_TEXT_COLOUR, get.CENTRE),),
+                                 opacity=self.intro.fade(get.SEQUENCE_FADE_DURATION))
+
+            # logo
+            case "logo":
+                self._blit_layer(screen, "logo", self._build_logo_layer, opacity=self.intro.fade(get.SEQUENCE_FADE_DURATION))
+
+            # the intro has finished
+            case None:
+                logger.info("Moving to home screen.")
+                self.game_status = get.STATUS_HOME
         return self
 
     def _render_home_screen(self, screen, click_pos, key_press, click_event):
@@ -147,46 +307,38 @@ class GameWrapper(object):
             self.game_status = get.STATUS_SETTINGS
 
         #  background imagery
-        screen.fill(get.LOGO_SCREEN_BACKGROUND_COLOR)
-        logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-        logo = utils.reshape_keep_aspect(logo, new_height=get.WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-        logoRect = logo.get_rect()
-        logoRect.center = get.CENTRE
-        screen.blit(logo, logoRect)
+        self._blit_layer(screen, "logo", self._build_logo_layer)
 
         # play button -> move to play screen
         x = get.X25 - get.BUTTON_DEFAULT_WIDTH // 2
         y = int(get.WINHEIGHT * get.HOME_BUTTON_Y_REL - get.BUTTON_DEFAULT_HEIGHT // 2)
-        play_button = Button(text="PLAY", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(play_button.surface, (x, y))
+        play_button = self._button("home.play_button", click_pos, click_event, text="PLAY", x=x, y=y)
+        self.dirty.mark(play_button.draw(screen))
 
         # settings button -> move to settings screen
         x = get.X50 - get.BUTTON_DEFAULT_WIDTH // 2
-        settings_button = Button(text="SETTINGS", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(settings_button.surface, (x, y))
+        settings_button = self._button("home.settings_button", click_pos, click_event, text="SETTINGS", x=x, y=y)
+        self.dirty.mark(settings_button.draw(screen))
 
         # quit button -> exit the game
         x = get.X75 - get.BUTTON_DEFAULT_WIDTH // 2
-        quit_button = Button(text="QUIT", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(quit_button.surface, (x, y))
+        quit_button = self._button("home.quit_button", click_pos, click_event, text="QUIT", x=x, y=y)
+        self.dirty.mark(quit_button.draw(screen))
 
         # if logged in, say so
         if self.login_success:
             x = 0
             y = 0
-            logged_in_user_status = Button(text=f"Logged in as {self.username}.", x=x, y=y, click_pos=click_pos, click_event=click_event, access=False, width=get.WINWIDTH // 5, height=get.WINHEIGHT // 22, font_colour=get.RED, bg_colour_disabled=get.SLATE_GRAY)
-            screen.blit(logged_in_user_status.surface, (x, y))
+            logged_in_user_status = self._button("home.logged_in_user_status", click_pos, click_event, text=f"Logged in as {self.username}.", x=x, y=y, access=False, width=get.WINWIDTH // 5, height=get.WINHEIGHT // 22, font_colour=get.RED, bg_colour_disabled=get.SLATE_GRAY)
+            self.dirty.mark(logged_in_user_status.draw(screen))
 
         # click actions
         if quit_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _quit_button_action()
+            self._click(quit_button, _quit_button_action)
         elif play_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _play_button_action()
+            self._click(play_button, _play_button_action)
         elif settings_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _settings_button_action()
+            self._click(settings_button, _settings_button_action)
         # keyboard actions
         if key_press in get.K_BACK:
             pass
@@ -199,50 +351,43 @@ class GameWrapper(object):
             logger.info("SETTINGS SCREEN: Back button pressed.")
             self.game_status = get.STATUS_HOME
 
-        #  background imagery
-        screen.fill(get.LOGO_SCREEN_BACKGROUND_COLOR)
-        logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-        logo.fill((255, 255, 255, get.SETTINGS_LOGO_IMG_ALPHA), None, pygame.BLEND_RGBA_MULT)
-        logo = utils.reshape_keep_aspect(logo, new_height=get.WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-        logoRect = logo.get_rect()
-        logoRect.center = get.CENTRE
-        screen.blit(logo, logoRect)
+        #  background imagery and option labels
+        self._blit_layer(screen, "settings", self._build_settings_layer)
 
         # buttons
         # back button -> move to home screen
         x = get.X25 - get.BUTTON_DEFAULT_WIDTH // 2
         y = int(get.WINHEIGHT * get.HOME_BUTTON_Y_REL - get.BUTTON_DEFAULT_HEIGHT // 2)
-        back_button = Button(text="BACK", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(back_button.surface, (x, y))
+        back_button = self._button("settings.back_button", click_pos, click_event, text="BACK", x=x, y=y)
+        self.dirty.mark(back_button.draw(screen))
 
         # option toggles
-        # AI difficulty
-        font = pygame.font.Font(get.BUTTON_DEFAULT_FONTNAME, get.BUTTON_DEFAULT_FONTSIZE)
-        text = font.render("AI Difficulty", True, get.CREDIT_SCREEN_TEXT_COLOUR)
-        textRect = text.get_rect()
-        textRect.right = get.X25
-        textRect.top = get.Y75
-        screen.blit(text, textRect)
         # easy toggleable -> store a setting
         x, y = get.X50, get.Y50
-        easy_button = Button(text="EASY", x=x, y=y, click_pos=click_pos, toggleable=True, click_event=click_event)
-        screen.blit(easy_button.surface, (x, y))
+        easy_button = self._button("settings.easy_button", click_pos, click_event, text="EASY", x=x, y=y, toggleable=True)
+        self.dirty.mark(easy_button.draw(screen))
 
         # if logged in, say so
         if self.login_success:
             x = 0
             y = 0
-            logged_in_user_status = Button(text=f"Logged in as {self.username}.", x=x, y=y, click_pos=click_pos, click_event=click_event, access=False, width=get.WINWIDTH // 5, height=get.WINHEIGHT // 22, font_colour=get.RED, bg_colour_disabled=get.SLATE_GRAY)
-            screen.blit(logged_in_user_status.surface, (x, y))
+            logged_in_user_status = self._button("settings.logged_in_user_status", click_pos, click_event, text=f"Logged in as {self.username}.", x=x, y=y, access=False, width=get.WINWIDTH // 5, height=get.WINHEIGHT // 22, font_colour=get.RED, bg_colour_disabled=get.SLATE_GRAY)
+            self.dirty.mark(logged_in_user_status.draw(screen))
 
         # click actions
         if back_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _back_button_action()
+            self._click(back_button, _back_button_action)
         # keyboard actions
         if key_press in get.K_BACK:
             _back_button_action()
 
+    def _build_settings_layer(self, size) -> pygame.Surface:
+        """Composite the settings screen background and option labels."""
+        layer = self._build_logo_layer(size, get.SETTINGS_LOGO_IMG_ALPHA)
+        # AI difficulty
+        self._blit_text(layer, get.BUTTON_DEFAULT_FONTNAME, get.BUTTON_DEFAULT_FONTSIZE, "AI Difficulty", get.CREDIT_SCREEN_TEXT_COLOUR, right=get.X25, top=get.Y75)
+        return layer
+
     def _render_outro(self, screen, click_pos, key_press, click_event):
         """
         "Draw the outtro.
@@ -252,58 +397,29 @@ class GameWrapper(object):
             sequence 1) Cryptid logo
             sequence 2) Thank you + credit
 
+        Each plays for its duration in settings, by elapsed time, fading in
+        and out.
         """
-        # if we are in the title screen
-        match self.outro_sequence_position:
-            case 1:
-                if self.outro_counter < get.CLOCKSPEED * get.LOGO_DURATION:
-                    # Logo only
-                    screen.fill(get.LOGO_SCREEN_BACKGROUND_COLOR)
-                    logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-                    logo = utils.reshape_keep_aspect(logo, new_height=get.WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-                    logoRect = logo.get_rect()
-                    logoRect.center = get.CENTRE
-                    screen.blit(logo, logoRect)
-                    self.outro_counter += 1
-                else:
-                    # else the title sequence must end
-                    logging.info("moving to thanks scren.")
-                    self.outro_sequence_position += 1
-                    self.outro_counter = 0
-
-            # else if we are on the developer credit
-            case 2:
-                if self.outro_counter < get.CLOCKSPEED * get.OUTRO_DURATION:
-                    screen.fill(get.OUTRO_SCREEN_BACKGROUND_COLOR)
-                    # first line
-                    font1 = pygame.font.Font(get.OUTRO_SCREEN_FONT, get.OUTRO_SCREEN_FONT_SIZE1)
-                    text1 = font1.render(get.OUTRO_SCREEN_TEXT1, True, get.OUTRO_SCREEN_TEXT_COLOUR)
-                    textRect1 = text1.get_rect()
-                    textRect1.center = (get.X50, get.Y75)
-                    screen.blit(text1, textRect1)
-
-                    # second line
-                    font2 = pygame.font.Font(get.OUTRO_SCREEN_FONT, get.OUTRO_SCREEN_FONT_SIZE2)
-                    text2 = font2.render(get.OUTRO_SCREEN_TEXT2, True, get.OUTRO_SCREEN_TEXT_COLOUR)
-                    textRect2 = text2.get_rect()
-                    textRect2.center = (get.X50, get.Y50)
-                    screen.blit(text2, textRect2)
-
-                    # third line
-                    font3 = pygame.font.Font(get.OUTRO_SCREEN_FONT, get.OUTRO_SCREEN_FONT_SIZE3)
-                    text3 = font3.render(get.OUTRO_SCREEN_TEXT3, True, get.OUTRO_SCREEN_TEXT_COLOUR)
-                    textRect3 = text3.get_rect()
-                    textRect3.center = (get.X50, get.Y25)
-                    screen.blit(text3, textRect3)
-
-                    self.outro_counter += 1
-
-                else:
-                    logging.info("exiting")
-                    self.outro_sequence_position += 1
-                    self.outro_counter
-
-            case 3:
+        # any click or key press skips the outro
+        if click_event or key_press is not None:
+            self.outro.skip()
+
+        match self.outro.update():
+            case "logo":
+                # Logo only
+                self._blit_layer(screen, "logo", self._build_logo_layer, opacity=self.outro.fade(get.SEQUENCE_FADE_DURATION))
+
+            # thank you, title and credit lines
+            case "thanks":
+                self._blit_layer(screen, "outro.thanks", self._build_text_layer, get.OUTRO_SCREEN_BACKGROUND_COLOR,
+                                 ((get.OUTRO_SCREEN_FONT, get.OUTRO_SCREEN_FONT_SIZE1, get.OUTRO_SCREEN_TEXT1, get.OUTRO_SCREEN_TEXT_COLOUR, (get.X50, get.Y75)),
+                                  (get.OUTRO_SCREEN_FONT, get.OUTRO_SCREEN_FONT_SIZE2, get.OUTRO_SCREEN_TEXT2, get.OUTRO_SCREEN_TEXT_COLOUR, (get.X50, get.Y50)),
+                                  (get.OUTRO_SCREEN_FONT, get.OUTRO_SCREEN_FONT_SIZE3, get.OUTRO_SCREEN_TEXT3, get.OUTRO_SCREEN_TEXT_COLOUR, (get.X50, get.Y25))),
+                                 opacity=self.outro.fade(get.SEQUENCE_FADE_DURATION))
+
+            # the outro has finished
+            case None:
+                logging.info("exiting")
                 pygame.quit()
                 sys.exit()
 
@@ -320,57 +436,61 @@ class GameWrapper(object):
                 self.game_status = get.STATUS_GAMEPLAY
             else:
                 logger.info("PRE-PLAY SCREEN: Start button pressed without sucessful login")
-                self._render_popup(screen, click_pos, key_press, click_event, "Warning", "Cannot start the game without logging in. This is because we must be able to access your deck. Make an account and register your NFTs or log in to play.")
+                self._popup(screen, "Warning", "Cannot start the game without logging in. This is because we must be able to access your deck. Make an account and register your NFTs or log in to play.")
 
                 pass
 
         def _login_button_action():
             logger.info("PRE-PLAY SCREEN: login button pressed.")
-            # check login
-            (return_code, user) = usermanagement.load_user(self.username_text, self.password_text)
+            # check login, reading the user file off the main thread
+            self._offload(usermanagement.load_user, self.username_text, self.password_text, name="login", on_done=_login_done)
+
+        def _login_done(result):
+            (return_code, user) = result
             match return_code:
                 case 0:
                     self.login_success = True
                     self.username = self.username_text
                     self.user = user
+                    self.user_deck_selection = utils.str_to_list(usermanagement.get_setting(self.user, "settings", "loadouts", "default"))
                 case 1:
                     logger.info("PRE-PLAY SCREEN: Login attempted but unrecognised username")
-                    self._render_popup(screen, click_pos, key_press, click_event, "Warning", "Unrecognised username")
+                    self._popup(screen, "Warning", "Unrecognised username")
                 case 2:
                     logger.info("PRE-PLAY SCREEN: Login attempted but incorrect password")
-                    self._render_popup(screen, click_pos, key_press, click_event, "Warning", "Incorrect password")
+                    self._popup(screen, "Warning", "Incorrect password")
 
         def _logout_button_action():
             logger.info("PRE-PLAY SCREEN: logout button pressed.")
             self.login_success = False
             self.username = None
+            self.user_deck_selection = []
             self.password_text = self.password_text
 
         def _register_button_action():
             logger.info("PRE-PLAY SCREEN: register button pressed.")
             self.game_status = get.STATUS_REGISTER
 
-        #  background imagery
-        screen.fill(get.LOGO_SCREEN_BACKGROUND_COLOR)
-        logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-        logo.fill((255, 255, 255, get.SETTINGS_LOGO_IMG_ALPHA), None, pygame.BLEND_RGBA_MULT)
-        logo = utils.reshape_keep_aspect(logo, new_height=get.WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-        logoRect = logo.get_rect()
-        logoRect.center = get.CENTRE
-        screen.blit(logo, logoRect)
+        #  background imagery, and the login labels when logged out
+        if self.login_success:
+            labels = ()
+        else:
+            labels = ((get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE, "USERNAME:", get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR, get.X25, get.Y50 - 25),
+                      (get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE, "PASSWORD:", get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR, get.X25, get.Y50 + 25))
+        self._blit_layer(screen, "play", self._build_logo_layer, get.SETTINGS_LOGO_IMG_ALPHA, labels)
 
         # buttons
         # back button -> move to home screen
         x = get.X25 - get.BUTTON_DEFAULT_WIDTH // 2
         y = int(get.WINHEIGHT * get.HOME_BUTTON_Y_REL - get.BUTTON_DEFAULT_HEIGHT // 2)
-        back_button = Button(text="BACK", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(back_button.surface, (x, y))
+        back_button = self._button("play.back_button", click_pos, click_event, text="BACK", x=x, y=y)
+        self.dirty.mark(back_button.draw(screen))
 
         # start game button -> move to main game loop
         x = get.X75 - get.BUTTON_DEFAULT_WIDTH // 2
         y = int(get.WINHEIGHT * get.HOME_BUTTON_Y_REL - get.BUTTON_DEFAULT_HEIGHT // 2)
-        start_button = Button(text="START", x=x, y=y, click_pos=click_pos, click_event=click_event, access=self.login_success)
-        screen.blit(start_button.surface, (x, y))
+        start_button = self._button("play.start_button", click_pos, click_event, text="START", x=x, y=y, access=self.login_success)
+        self.dirty.mark(start_button.draw(screen))
 
         if self.login_success:
             # LOGGED IN SCREEN
@@ -378,16 +498,15 @@ class GameWrapper(object):
             # login button -> move to main game loop
             x = get.X50 - get.BUTTON_DEFAULT_WIDTH // 2
             y = int(get.WINHEIGHT * get.HOME_BUTTON_Y_REL - get.BUTTON_DEFAULT_HEIGHT // 2)
-            log_button = Button(text="LOG OUT", x=x, y=y, click_pos=click_pos, click_event=click_event)
-            screen.blit(log_button.surface, (x, y))
+            log_button = self._button("play.logout_button", click_pos, click_event, text="LOG OUT", x=x, y=y)
+            self.dirty.mark(log_button.draw(screen))
 
             x = 0
             y = 0
-            logged_in_user_status = Button(text=f"Logged in as {self.username}.", x=x, y=y, click_pos=click_pos, click_event=click_event, access=False, width=get.WINWIDTH // 5, height=get.WINHEIGHT // 22, font_colour=get.RED, bg_colour_disabled=get.SLATE_GRAY)
-            screen.blit(logged_in_user_status.surface, (x, y))
+            logged_in_user_status = self._button("play.logged_in_user_status", click_pos, click_event, text=f"Logged in as {self.username}.", x=x, y=y, access=False, width=get.WINWIDTH // 5, height=get.WINHEIGHT // 22, font_colour=get.RED, bg_colour_disabled=get.SLATE_GRAY)
+            self.dirty.mark(logged_in_user_status.draw(screen))
 
-            # !!! pick deck
-            self.user_deck_selection = utils.str_to_list(usermanagement.get_setting(self.user, "settings", "loadouts", "default"))
+            # !!! pick deck, the default loadout is read once on log in
             # user settings
 
         else:
@@ -396,64 +515,48 @@ class GameWrapper(object):
             # log in button -> move to main game loop
             x = get.X50 - get.BUTTON_DEFAULT_WIDTH // 2
             y = get.Y25
-            log_button = Button(text="LOG IN", x=x, y=y, click_pos=click_pos, click_event=click_event)
-            screen.blit(log_button.surface, (x, y))
+            log_button = self._button("play.login_button", click_pos, click_event, text="LOG IN", x=x, y=y)
+            self.dirty.mark(log_button.draw(screen))
 
             # register button -> move to registration page
             x = get.X50 - get.BUTTON_DEFAULT_WIDTH
             y = get.Y50 - 50 - get.BUTTON_DEFAULT_HEIGHT
-            register_button = Button(text="Don't have an account? Register now.", x=x, y=y, click_pos=click_pos, click_event=click_event, font_colour=get.BLACK, width=get.BUTTON_DEFAULT_WIDTH * 2, height=get.BUTTON_DEFAULT_HEIGHT // 2)
-            screen.blit(register_button.surface, (x, y))
+            register_button = self._button("play.register_button", click_pos, click_event, text="Don't have an account? Register now.", x=x, y=y, font_colour=get.BLACK, width=get.BUTTON_DEFAULT_WIDTH * 2, height=get.BUTTON_DEFAULT_HEIGHT // 2)
+            self.dirty.mark(register_button.draw(screen))
 
             # login text boxes
-            font = pygame.font.Font(get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE)
-            text = font.render("USERNAME:", True, get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR)
-            textRect = text.get_rect()
-            textRect.left = get.X25
-            textRect.top = get.Y50 - 25
-            screen.blit(text, textRect)
             x, y = get.X50, get.Y50 - 25
-            username_textbox = Button(x=x, y=y, click_pos=click_pos, click_event=click_event, input_text=True, text=self.username_text, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR)
-            screen.blit(username_textbox.surface, (x, y))
-
-            font = pygame.font.Font(get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE)
-            text = font.render("PASSWORD:", True, get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR)
-            textRect = text.get_rect()
-            textRect.left = get.X25
-            textRect.top = get.Y50 + 25
+            username_textbox = self._button("play.username_textbox", click_pos, click_event, x=x, y=y, input_text=True, text=self.username_text, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR)
+            self.dirty.mark(username_textbox.draw(screen))
+
             x, y = get.X50, get.Y50 + 25
-            password_textbox = Button(x=x, y=y, click_pos=click_pos, click_event=click_event, input_text=True, text=self.password_text, private=True, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR)
-            screen.blit(password_textbox.surface, (x, y))
-            screen.blit(text, textRect)
+            password_textbox = self._button("play.password_textbox", click_pos, click_event, x=x, y=y, input_text=True, text=self.password_text, private=True, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR)
+            self.dirty.mark(password_textbox.draw(screen))
 
             # login specific buttons
             if username_textbox.was_clicked(click_pos) and click_event:
-                self.username_text = username_textbox.text_input_action(screen)
+                self._text_input(username_textbox, "username_text", text="")
 
             if password_textbox.was_clicked(click_pos) and click_event:
-                self.password_text = password_textbox.text_input_action(screen)
+                self._text_input(password_textbox, "password_text", text="")
 
             if register_button.was_clicked(click_pos) and click_event:
-                utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-                _register_button_action()
+                self._click(register_button, _register_button_action)
 
         # click actions
         if back_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _back_button_action()
+            self._click(back_button, _back_button_action)
 
         if start_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _start_button_action()
+            self._click(start_button, _start_button_action)
 
         if log_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
             if self.login_success:
                 # if we are logged in, we need the logout action
-                _logout_button_action()
+                self._click(log_button, _logout_button_action)
             else:
                 # if we are not logged in, we need the login button
-                _login_button_action()
+                self._click(log_button, _login_button_action)
 
         # keyboard actions
         if key_press in get.K_BACK:
@@ -466,43 +569,28 @@ class GameWrapper(object):
             self.game_status = get.STATUS_PREPLAY
 
         def _register_button_action():
-            logger.info(f"REGISTRATION SCREEN: Register button pressed for {self.email_text} and {self.username_text} and {self.password_text}.")
-
-            # check email
-            email_check = False
-            if usermanagement.check_email_exists(self.email_text):
-                self._render_popup(screen, click_pos, key_press, click_event, "Warning", "Email address already registered")
-            else:
-                email_check = True
-
-            # check username
-            username_check = False
-            if usermanagement.check_user_exists(self.username_text):
-                self._render_popup(screen, click_pos, key_press, click_event, "Warning", "Username already registered")
-            else:
-                username_check = True
-
-            # check password
-            password_check = False
-            if len(self.password_text) < 8:
-                self._render_popup(screen, click_pos, key_press, click_event, "Warning", "Password must be at least 8 letters long.")
+            logger.info(f"REGISTRATION SCREEN: Register button pressed for {self.email_text} and {self.username_text}.")
+            # the checks and the new account read and write the user file, off the main thread
+            self._offload(usermanagement.register_user, self.email_text, self.username_text, self.password_text, name="register", on_done=_register_done)
+
+        def _register_done(result):
+            (email_check, username_check, password_check, status_code) = result
+            if not email_check:
+                self._popup(screen, "Warning", "Email address already registered")
+            if not username_check:
+                self._popup(screen, "Warning", "Username already registered")
+            if not password_check:
+                self._popup(screen, "Warning", "Password must be at least 8 letters long.")
                 self.password_text = ""
-            else:
-                password_check = True
-
-            # if all the checks were passed...
-            if email_check and username_check and password_check:
-                # make the account
-                (status_code, status_msg) = usermanagement.make_new_user(self.username_text, self.password_text, self.email_text)
-
-                if status_code == 0:
-                    logger.info(f"REGISTRATION SCREEN: registration successful for {self.email_text} and {self.username_text} and {self.password_text}.")
-                    # and reset the registration attempt
-                    self.register_attempt = False
-                    self.game_status = get.STATUS_PREPLAY
-                    self._render_popup(screen, click_pos, key_press, click_event, "New registration", f"Successfully created the user {self.username_text}")
-                else:
-                    logger.fatal(f"REGISTRATION SCREEN: registration unsuccessful for {self.email_text} and {self.username_text} and {self.password_text}.")
+
+            if status_code == 0:
+                logger.info(f"REGISTRATION SCREEN: registration successful for {self.email_text} and {self.username_text}.")
+                # and reset the registration attempt
+                self.register_attempt = False
+                self.game_status = get.STATUS_PREPLAY
+                self._popup(screen, "New registration", f"Successfully created the user {self.username_text}")
+            elif status_code is not None:
+                logger.fatal(f"REGISTRATION SCREEN: registration unsuccessful for {self.email_text} and {self.username_text}.")
 
         # if the username
         if not self.register_attempt:
@@ -511,81 +599,59 @@ class GameWrapper(object):
             self.email_text = ""
             self.register_attempt = True
 
-        #  background imagery
-        screen.fill(get.LOGO_SCREEN_BACKGROUND_COLOR)
-        logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-        logo.fill((255, 255, 255, get.SETTINGS_LOGO_IMG_ALPHA), None, pygame.BLEND_RGBA_MULT)
-        logo = utils.reshape_keep_aspect(logo, new_height=get.WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-        logoRect = logo.get_rect()
-        logoRect.center = get.CENTRE
-        screen.blit(logo, logoRect)
+        # registration text boxes
+        root_y = get.Y75 + get.BUTTON_DEFAULT_HEIGHT
+        offset = get.BUTTON_DEFAULT_HEIGHT // 2
+        but_height = get.BUTTON_DEFAULT_HEIGHT
+
+        #  background imagery and text box labels
+        labels = ((get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE, "EMAIL:", get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR, get.X25, root_y),
+                  (get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE, "USERNAME:", get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR, get.X25, root_y + but_height + offset),
+                  (get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE, "PASSWORD:", get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR, get.X25, root_y + but_height * 2 + offset * 2))
+        self._blit_layer(screen, "register", self._build_logo_layer, get.SETTINGS_LOGO_IMG_ALPHA, labels)
 
         # buttons
         # back button -> move to home screen
         x = get.X25 - get.BUTTON_DEFAULT_WIDTH // 2
         y = int(get.WINHEIGHT * get.HOME_BUTTON_Y_REL - get.BUTTON_DEFAULT_HEIGHT // 2)
-        back_button = Button(text="BACK", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(back_button.surface, (x, y))
+        back_button = self._button("register.back_button", click_pos, click_event, text="BACK", x=x, y=y)
+        self.dirty.mark(back_button.draw(screen))
 
         # register button -> move to main game loop
         x = get.X50 - get.BUTTON_DEFAULT_WIDTH // 2
         y = get.Y25
-        register_button = Button(text="REGISTER", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(register_button.surface, (x, y))
+        register_button = self._button("register.register_button", click_pos, click_event, text="REGISTER", x=x, y=y)
+        self.dirty.mark(register_button.draw(screen))
 
         # registration text boxes
-        root_y = get.Y75 + get.BUTTON_DEFAULT_HEIGHT
-        offset = get.BUTTON_DEFAULT_HEIGHT // 2
-        but_height = get.BUTTON_DEFAULT_HEIGHT
-
-        font = pygame.font.Font(get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE)
-        text = font.render("EMAIL:", True, get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR)
-        textRect = text.get_rect()
-        textRect.left = get.X25
-        textRect.top = root_y
-        screen.blit(text, textRect)
         x, y = get.X50, root_y
-        email_textbox = Button(x=x, y=y, click_pos=click_pos, click_event=click_event, input_text=True, text=self.email_text, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_textbox=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_active=get.PREPLAY_LOGIN_TEXT_COLOUR)
-        screen.blit(email_textbox.surface, (x, y))
-
-        font = pygame.font.Font(get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE)
-        text = font.render("USERNAME:", True, get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR)
-        textRect = text.get_rect()
-        textRect.left = get.X25
-        textRect.top = root_y + but_height + offset
-        screen.blit(text, textRect)
+        email_textbox = self._button("register.email_textbox", click_pos, click_event, x=x, y=y, input_text=True, text=self.email_text, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_textbox=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_active=get.PREPLAY_LOGIN_TEXT_COLOUR)
+        self.dirty.mark(email_textbox.draw(screen))
+
         x, y = get.X50, root_y + but_height + offset
-        username_textbox = Button(x=x, y=y, click_pos=click_pos, click_event=click_event, input_text=True, text=self.username_text, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_textbox=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_active=get.PREPLAY_LOGIN_TEXT_COLOUR, clean_str=True)
-        screen.blit(username_textbox.surface, (x, y))
-
-        font = pygame.font.Font(get.PREPLAY_LOGIN_TEXT_FONT, get.PREPLAY_LOGIN_TEXT_FONTSIZE)
-        text = font.render("PASSWORD:", True, get.PREPLAY_USERNAME_PASSWORD_TEXT_COLOUR)
-        textRect = text.get_rect()
-        textRect.left = get.X25
-        textRect.top = root_y + but_height * 2 + offset * 2
+        username_textbox = self._button("register.username_textbox", click_pos, click_event, x=x, y=y, input_text=True, text=self.username_text, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_textbox=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_active=get.PREPLAY_LOGIN_TEXT_COLOUR, clean_str=True)
+        self.dirty.mark(username_textbox.draw(screen))
+
         x, y = get.X50, root_y + but_height * 2 + offset * 2
-        password_textbox = Button(x=x, y=y, click_pos=click_pos, click_event=click_event, input_text=True, text=self.password_text, private=True, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_textbox=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_active=get.PREPLAY_LOGIN_TEXT_COLOUR)
-        screen.blit(password_textbox.surface, (x, y))
-        screen.blit(text, textRect)
+        password_textbox = self._button("register.password_textbox", click_pos, click_event, x=x, y=y, input_text=True, text=self.password_text, private=True, font_colour=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_textbox=get.PREPLAY_LOGIN_TEXT_COLOUR, font_colour_active=get.PREPLAY_LOGIN_TEXT_COLOUR)
+        self.dirty.mark(password_textbox.draw(screen))
 
         # login specific buttons
         if email_textbox.was_clicked(click_pos) and click_event:
-            self.email_text = email_textbox.text_input_action(screen, text=self.email_text)
+            self._text_input(email_textbox, "email_text")
 
         if username_textbox.was_clicked(click_pos) and click_event:
-            self.username_text = username_textbox.text_input_action(screen, text=self.username_text)
+            self._text_input(username_textbox, "username_text")
 
         if password_textbox.was_clicked(click_pos) and click_event:
-            self.password_text = password_textbox.text_input_action(screen, text=self.password_text)
+            self._text_input(password_textbox, "password_text")
 
         # click actions
         if back_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _back_button_action()
+            self._click(back_button, _back_button_action)
 
         if register_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _register_button_action()
+            self._click(register_button, _register_button_action)
 
     def _render_pause_menu(self, screen, click_pos, key_press, click_event):
         """Draw the pause menu."""
@@ -597,145 +663,163 @@ class GameWrapper(object):
             logger.info("PAUSE SCREEN: Quit button pressed.")
             self.game_status = get.STATUS_HOME
 
-        # make a transparent background
+        # transparent menu with the logo and pause text
         xoffset = (get.WINWIDTH - get.PAUSE_WINWIDTH) // 2
         yoffset = (get.WINHEIGHT - get.PAUSE_WINHEIGHT) // 2
-        menu = pygame.Surface((get.PAUSE_WINWIDTH, get.PAUSE_WINHEIGHT))
-        menu.fill(get.PAUSE_MENU_BACKGROUND_COLOUR)
-        menu.set_alpha(get.PAUSE_MENU_BACKGROUND_TRANSPARENCY)
-        # pull up the logo
-        logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-        logo.fill((255, 255, 255, get.SETTINGS_LOGO_IMG_ALPHA), None, pygame.BLEND_RGBA_MULT)
-        logo = utils.reshape_keep_aspect(logo, new_height=get.PAUSE_WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-        logoRect = logo.get_rect()
-        logoRect.center = get.PAUSE_CENTRE
-        menu.blit(logo, logoRect)
-        screen.blit(menu, (xoffset, yoffset))
-
-        # pause text
-        font = pygame.font.Font(get.PAUSE_SCREEN_PAUSE_TEXT_FONT, get.PAUSE_SCREEN_PAUSE_TEXT_FONTSIZE)
-        text = font.render("PAUSED", True, get.PAUSE_SCREEN_PAUSE_TEXT_COLOUR)
-        textRect = text.get_rect()
-        textRect.center = (get.X50, get.Y50)
-        screen.blit(text, textRect)
+        self._blit_layer(screen, "pause", self._build_pause_layer, pos=(xoffset, yoffset))
 
         # resume button -> return to game
         x = get.PAUSE_X25 - get.BUTTON_DEFAULT_WIDTH // 2
         y = get.PAUSE_Y75
-        resume_button = Button(text="RESUME", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(resume_button.surface, (x, y))
+        resume_button = self._button("pause.resume_button", click_pos, click_event, text="RESUME", x=x, y=y)
+        self.dirty.mark(resume_button.draw(screen))
 
         # quit button -> exit the game
         x = get.PAUSE_X75 - get.BUTTON_DEFAULT_WIDTH // 2
         y = get.PAUSE_Y75
-        quit_button = Button(text="QUIT", x=x, y=y, click_pos=click_pos, click_event=click_event)
-        screen.blit(quit_button.surface, (x, y))
+        quit_button = self._button("pause.quit_button", click_pos, click_event, text="QUIT", x=x, y=y)
+        self.dirty.mark(quit_button.draw(screen))
 
         # click actions
         if resume_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _resume_button_action()
+            self._click(resume_button, _resume_button_action)
 
         if quit_button.was_clicked(click_pos) and click_event:
-            utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-            _quit_button_action()
+            self._click(quit_button, _quit_button_action)
 
-    def _render_popup(self, screen, click_pos, key_press, click_event, heading, body):
-        """Draw a popup."""
-        # set the loop break
-        ok_pressed = False
-
-        # Set up game clock
-        clock = pygame.time.Clock()
-        # enter the event loop
-        while not ok_pressed:
-            events = pygame.event.get()
-            # flags
-            click_event = False
-            # if we have any, process them.
-            if events:
-                for event in events:
-
-                    # check if the window is closed
-                    if event.type == pygame.QUIT:
-                        logger.info("Quit event detected. Closing the game.")
-                        # if so, end the script by breaking the while loop
-                        ok_pressed = True
-                        # Quit Pygame
-                        pygame.quit()
-                        sys.exit()
-
-                    # check if a click event occured
-                    if event.type == pygame.MOUSEBUTTONUP:
-                        click_pos = event.pos
-                        click_event = True
-                        logger.debug(f"CLICK at {click_pos}")
-                    else:
-                        click_pos = None
-
-            # make a transparent background
-            xoffset = (get.WINWIDTH - get.POPUP_WINWIDTH) // 2
-            yoffset = (get.WINHEIGHT - get.POPUP_WINHEIGHT) // 2
-            popup = pygame.Surface((get.POPUP_WINWIDTH, get.POPUP_WINHEIGHT))
-            popup.fill(get.POPUP_MENU_BACKGROUND_COLOUR)
-            popup.set_alpha(get.POPUP_MENU_BACKGROUND_TRANSPARENCY)
-            # pull up the logo
-            logo = pygame.image.load(get.LOGO_SCREEN_IMAGE_PATH).convert_alpha()
-            logo.fill((255, 255, 255, get.SETTINGS_LOGO_IMG_ALPHA), None, pygame.BLEND_RGBA_MULT)
-            logo = utils.reshape_keep_aspect(logo, new_height=get.POPUP_WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT)
-            logoRect = logo.get_rect()
-            logoRect.center = get.POPUP_CENTRE
-            popup.blit(logo, logoRect)
-
-            # heading text
-            font = pygame.font.Font(get.POPUP_SCREEN_POPUP_HEADING_FONT, get.POPUP_SCREEN_POPUP_HEADING_FONTSIZE)
-            head = font.render(heading.upper(), True, get.POPUP_SCREEN_POPUP_HEADING_COLOUR)
-            headingRect = head.get_rect()
-            headingRect.center = (get.POPUP_X50, get.POPUP_HEADING_Y)
-            popup.blit(head, headingRect)
-
-            # body text
-            font = pygame.font.Font(get.POPUP_SCREEN_POPUP_BODY_FONT, get.POPUP_SCREEN_POPUP_BODY_FONTSIZE)
-            # wrap the text
-            pixel_width = get.POPUP_WINWIDTH - get.POPUP_BODY_TEXT_OFFSET
-            char_width = get.POPUP_SCREEN_POPUP_BODY_FONTSIZE * 0.8
-            lines = textwrap.wrap(body.upper(), width=pixel_width // char_width)
-            # make a surface per line
-            line_surfaces = []
-            for line in lines:
-                line_surfaces.append(font.render(line, True, get.POPUP_SCREEN_POPUP_BODY_COLOUR))
-            # find the box dimensions
-            box_width = max(line_surface.get_width() for line_surface in line_surfaces)
-            box_height = sum(line_surface.get_height() for line_surface in line_surfaces)
-            # build the text box
-            text_box = pygame.Surface((box_width, box_height))
-            # render the lines to the text box
-            y_offset = 0
-            for line_surface in line_surfaces:
-                text_box.blit(line_surface, (0, y_offset))
-                y_offset += line_surface.get_height()
-            # render the textbox to the popup
-            textRect = text_box.get_rect()
-            textRect.center = get.POPUP_CENTRE
-            popup.blit(text_box, textRect)
+    def _build_pause_layer(self, size) -> pygame.Surface:
+        """Composite the transparent pause menu, its logo and the pause text."""
+        menu = pygame.Surface((get.PAUSE_WINWIDTH, get.PAUSE_WINHEIGHT))
+        menu.fill(get.PAUSE_MENU_BACKGROUND_COLOUR)
+        # pull up the logo
+        logo = asset_manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=get.PAUSE_WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT, alpha=get.SETTINGS_LOGO_IMG_ALPHA)
+        logoRect = logo.get_rect()
+        logoRect.center = get.PAUSE_CENTRE
+        menu.blit(logo, logoRect)
+        # make the menu transparent, the pause text on top stays opaque
+        layer = menu.convert_alpha()
+        layer.fill((255, 255, 255, get.PAUSE_MENU_BACKGROUND_TRANSPARENCY), None, pygame.BLEND_RGBA_MULT)
+        self._blit_text(layer, get.PAUSE_SCREEN_PAUSE_TEXT_FONT, get.PAUSE_SCREEN_PAUSE_TEXT_FONTSIZE, "PAUSED", get.PAUSE_SCREEN_PAUSE_TEXT_COLOUR, center=get.PAUSE_CENTRE)
+        return layer
+
+    def _build_popup_layer(self, size, heading, body) -> pygame.Surface:
+        """Composite the transparent popup with its logo, heading and body."""
+        # make a transparent background
+        popup = pygame.Surface((get.POPUP_WINWIDTH, get.POPUP_WINHEIGHT))
+        popup.fill(get.POPUP_MENU_BACKGROUND_COLOUR)
+        popup.set_alpha(get.POPUP_MENU_BACKGROUND_TRANSPARENCY)
+        # pull up the logo
+        logo = asset_manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=get.POPUP_WINHEIGHT * get.LOGO_HEIGHT_RELATIVE_TO_SCREEN_HEIGHT, alpha=get.SETTINGS_LOGO_IMG_ALPHA)
+        logoRect = logo.get_rect()
+        logoRect.center = get.POPUP_CENTRE
+        popup.blit(logo, logoRect)
+
+        # heading text
+        self._blit_text(popup, get.POPUP_SCREEN_POPUP_HEADING_FONT, get.POPUP_SCREEN_POPUP_HEADING_FONTSIZE, heading.upper(), get.POPUP_SCREEN_POPUP_HEADING_COLOUR, center=(get.POPUP_X50, get.POPUP_HEADING_Y))
+
+        # body text
+        font = font_registry.get_font(get.POPUP_SCREEN_POPUP_BODY_FONT, get.POPUP_SCREEN_POPUP_BODY_FONTSIZE)
+        # wrap the text
+        pixel_width = get.POPUP_WINWIDTH - get.POPUP_BODY_TEXT_OFFSET
+        char_width = get.POPUP_SCREEN_POPUP_BODY_FONTSIZE * 0.8
+        lines = textwrap.wrap(body.upper(), width=pixel_width // char_width)
+        # make a surface per line
+        line_surfaces = []
+        for line in lines:
+            line_surfaces.append(font.render(line, True, get.POPUP_SCREEN_POPUP_BODY_COLOUR))
+        # find the box dimensions
+        box_width = max(line_surface.get_width() for line_surface in line_surfaces)
+        box_height = sum(line_surface.get_height() for line_surface in line_surfaces)
+        # build the text box
+        text_box = pygame.Surface((box_width, box_height))
+        # render the lines to the text box
+        y_offset = 0
+        for line_surface in line_surfaces:
+            text_box.blit(line_surface, (0, y_offset))
+            y_offset += line_surface.get_height()
+        # render the textbox to the popup
+        textRect = text_box.get_rect()
+        textRect.center = get.POPUP_CENTRE
+        popup.blit(text_box, textRect)
+        return popup
+
+    def _popup(self, screen, heading, body) -> None:
+        """Open a popup over the current screen, which gets no input until it closes."""
+        self.tasks.start(self._popup_task(screen, heading, body), name="popup", modal=True, animated=False)
+
+    def _popup_task(self, screen, heading, body):
+        """Draw a popup each frame until its OK button is clicked."""
+        # the popup is static, so only its first frame is drawn in full
+        xoffset = (get.WINWIDTH - get.POPUP_WINWIDTH) // 2
+        yoffset = (get.WINHEIGHT - get.POPUP_WINHEIGHT) // 2
+        self.dirty.mark((xoffset, yoffset, get.POPUP_WINWIDTH, get.POPUP_WINHEIGHT))
+
+        # frames left showing the OK button clicked, None until it is
+        closing = None
+        while closing != 0:
+            inputs = yield closing is not None
 
             # ok button -> return to previous state
             x = get.X50 - get.BUTTON_DEFAULT_WIDTH // 2
             y = get.POPUP_WINHEIGHT - get.POPUP_BODY_TEXT_OFFSET
-            ok_button = Button(text="OK", x=x, y=y, click_pos=click_pos, click_event=click_event, width=get.BUTTON_DEFAULT_WIDTH)
-
-            screen.blit(popup, (xoffset, yoffset))
-            screen.blit(ok_button.surface, (x, y))
+            ok_button = self._button("popup.ok_button", inputs.click_pos, inputs.click_event, text="OK", x=x, y=y, width=get.BUTTON_DEFAULT_WIDTH)
 
             # click actions
-            if ok_button.was_clicked(click_pos) and click_event:
-                utils.delay_n_frames(num_frames=get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-                ok_pressed = True
+            if closing is None and ok_button.was_clicked(inputs.click_pos) and inputs.click_event:
+                ok_button.clicked = True
+                closing = int(get.DEFAULT_BUTTON_DELAY_ON_CLICK * get.CLOCKSPEED)
+            elif closing:
+                closing -= 1
+
+            self._blit_layer(screen, "popup", self._build_popup_layer, heading, body, pos=(xoffset, yoffset))
+            self.dirty.mark(ok_button.draw(screen))
+
+        ok_button.clicked = False
+        # the screen underneath must be redrawn once the popup closes
+        self.dirty.mark_full()
+
+    def _render_loading(self, screen, click_pos, click_event):
+        """Draw the loading screen whilst the card art is decoded in the background."""
+        if not self.loading_started:
+            logging.debug("First time the gameplay has been called. Loading assets and core classes.")
+            # initialise the players
+            logging.debug(f"Loading player class for {self.username}, and for the selected deck: {self.user_deck_selection}")
+            # making the player updates the user's NFTs in the user file, off the main thread
+            self.player1 = None
+            self._offload(gameplay.Player, self.username, self.user, self.user_deck_selection, name="load player", modal=False,
+                          on_done=lambda player: setattr(self, "player1", player))
+            # self.opponent = gameplay.PlayerAI()
+
+            # build the game board
+            # self.gameboard = gameplay.GameBoard()
+
+            # decode the art of the cards in play and on top of the deck on the worker threads
+            self.card_art.loader.reset()
+            self.card_art.sheet_loader.reset()
+            self.loading_started = True
 
-            # tick the clock
-            clock.tick(get.CLOCKSPEED)
-            # Update the display
-            pygame.display.update()
+            # blit a loading message to screen
+            screen.fill(get.LOADING_SCREEN_BG_COLOUR)
+            x, y = get.X50 - get.BUTTON_DEFAULT_WIDTH // 2, get.Y50 - get.BUTTON_DEFAULT_HEIGHT // 2
+            loading = self._button("gameplay.loading", click_pos, click_event, text="LOADING...", x=x, y=y, width=get.BUTTON_DEFAULT_WIDTH, access=False, font_colour=get.LOADING_SCREEN_FONT_COLOUR, font_size=get.LOADING_SCREEN_FONT_SIZE, font_name=get.LOADING_SCREEN_FONT, bg_colour_disabled=get.LOADING_SCREEN_BUTTON_BG_COLOUR)
+            self.dirty.mark(loading.draw(screen))
+
+        # convert whatever finished decoding this frame, once the player is made
+        progress = self.card_art.update(self.player1) if self.player1 is not None else 0.0
+
+        # progress bar
+        bar = pygame.Rect(0, 0, get.LOADING_SCREEN_PROGRESS_BAR_WIDTH, get.LOADING_SCREEN_PROGRESS_BAR_HEIGHT)
+        bar.center = (get.X50, get.Y25)
+        filled = bar.copy()
+        filled.width = int(bar.width * progress)
+        pygame.draw.rect(screen, get.LOADING_SCREEN_PROGRESS_BAR_COLOUR, filled)
+        pygame.draw.rect(screen, get.LOADING_SCREEN_PROGRESS_BAR_COLOUR, bar, get.LOADING_SCREEN_PROGRESS_BAR_BORDER)
+        self.dirty.mark(bar)
+
+        # start the game once the assets are ready
+        if self.player1 is not None and self.card_art.is_done():
+            logger.info(f"Loaded the art of {self.card_art.loader.loaded} cards ({self.card_art.loader.failed} failed).")
+            self.game_started = True
 
     def _render_gameplay(self, screen, click_pos, key_press, click_event):
         """Draw gameplay."""
@@ -745,32 +829,11 @@ class GameWrapper(object):
 
         # costly initialisations, only desire to do this ONCE at start of game.
         if not self.game_started:
-            # blit a loading message to screen
-            screen.fill(get.LOADING_SCREEN_BG_COLOUR)
-            x, y = get.X50 - get.BUTTON_DEFAULT_WIDTH // 2, get.Y50 - get.BUTTON_DEFAULT_HEIGHT // 2
-            loading = Button(text="LOADING...", x=x, y=y, click_pos=click_pos, click_event=click_event, width=get.BUTTON_DEFAULT_WIDTH, access=False, font_colour=get.LOADING_SCREEN_FONT_COLOUR, font_size=get.LOADING_SCREEN_FONT_SIZE, font_name=get.LOADING_SCREEN_FONT, bg_colour_disabled=get.LOADING_SCREEN_BUTTON_BG_COLOUR)
-            screen.blit(loading.surface, (x, y))
+            self._render_loading(screen, click_pos, click_event)
+            return
 
-            logging.debug("First time the gameplay has been called. Loading assets and core classes.")
-            # initialise the players
-            # !!! render a loading screen.
-            logging.debug(f"Loading player class for {self.username}, and for the selected deck: {self.user_deck_selection}")
-            print(self.user)
-            print(self.username)
-            print(self.user_deck_selection)
-
-            # self.player1 = gameplay.Player(self.username, self.user, self.user_deck_selection)
-            # self.opponent = gameplay.PlayerAI()
-
-            # build the game board
-            # self.gameboard = gameplay.GameBoard()
-
-            # introduce a short delay just for aesthetics of load screen.
-
-            utils.delay_n_frames(num_frames=get.LOADING_SCREEN_ENFORCED_DELAY * get.CLOCKSPEED, clockspeed=get.CLOCKSPEED)
-
-            # update game started status.
-            self.game_started = True
+        # keep the art of the cards in play decoded, prefetch the deck top
+        self.card_art.update(self.player1)
 
         # process new changes
         x, y = pygame.mouse.get_pos()
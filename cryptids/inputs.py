@@ -0,0 +1,135 @@
+"""
+Input snapshots.
+
+All of the events of a frame are folded into one InputSnapshot, so the game
+is rendered exactly once per frame however many events arrived.
+"""
+import logging
+import sys
+from typing import List, Tuple
+
+import pygame
+
+from cryptids import settings as get
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+class InputSnapshot(object):
+    """
+    The input of one frame.
+
+    Parameters
+    ----------
+        mouse_pos : Tuple[int, int],
+            The mouse position at the start of the frame.
+
+    Attributes
+    ----------
+        clicks : List[Tuple[int, int]]
+            Positions of the mouse button releases, oldest first.
+        keys : List[int]
+            Key codes of the key presses, oldest first.
+        key_presses : List[str]
+            Characters of the key presses, oldest first.
+        text : str
+            The text typed.
+        mouse_pos : Tuple[int, int]
+            The latest mouse position.
+        quit : bool
+            Whether the window was closed.
+        expose : bool
+            Whether the window was uncovered and must be redrawn in full.
+        events : int
+            The number of events folded into the snapshot.
+    """
+
+    def __init__(self, mouse_pos: Tuple[int, int] = None):
+        self.clicks: List[Tuple[int, int]] = []
+        self.keys: List[int] = []
+        self.key_presses: List[str] = []
+        self.text = ""
+        self.mouse_pos = mouse_pos
+        self.quit = False
+        self.expose = False
+        self.events = 0
+
+    @classmethod
+    def from_events(cls, events, mouse_pos: Tuple[int, int] = None) -> object:
+        """Fold a list of events into a snapshot."""
+        snapshot = cls(mouse_pos)
+        for event in events:
+            snapshot.add(event)
+        return snapshot
+
+    def add(self, event) -> None:
+        """Fold an event into the snapshot."""
+        self.events += 1
+        if event.type == pygame.QUIT:
+            self.quit = True
+        elif event.type in [pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED]:
+            self.expose = True
+        elif event.type == pygame.MOUSEMOTION:
+            self.mouse_pos = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.clicks.append(event.pos)
+            self.mouse_pos = event.pos
+        elif event.type == pygame.KEYDOWN:
+            self.keys.append(event.key)
+            self.key_presses.append(event.unicode)
+            self.text += event.unicode
+
+    @property
+    def click_pos(self) -> Tuple[int, int]:
+        """The position of the latest click, None if there was none."""
+        return self.clicks[-1] if self.clicks else None
+
+    @property
+    def click_event(self) -> bool:
+        """Whether there was a click."""
+        return bool(self.clicks)
+
+    @property
+    def key_press(self) -> str:
+        """The character of the latest key press, None if there was none."""
+        return self.key_presses[-1] if self.key_presses else None
+
+
+def poll_inputs() -> InputSnapshot:
+    """Take the pending events off the queue and fold them into a snapshot."""
+    return InputSnapshot.from_events(pygame.event.get(), pygame.mouse.get_pos())
+
+
+class InputCounters(object):
+    """Count the events and renders of each frame."""
+
+    def __init__(self):
+        self.frames = 0
+        self.events = 0
+        self.renders = 0
+        self.max_events_per_frame = 0
+        self.max_renders_per_frame = 0
+
+    def record(self, snapshot: InputSnapshot, renders: int) -> None:
+        """Record a frame."""
+        self.frames += 1
+        self.events += snapshot.events
+        self.renders += renders
+        self.max_events_per_frame = max(self.max_events_per_frame, snapshot.events)
+        self.max_renders_per_frame = max(self.max_renders_per_frame, renders)
+
+    def stats(self) -> dict:
+        """Get the mean and max events and renders per frame."""
+        frames = max(1, self.frames)
+        return {"frames": self.frames,
+                "events_per_frame": self.events / frames,
+                "max_events_per_frame": self.max_events_per_frame,
+                "renders_per_frame": self.renders / frames,
+                "max_renders_per_frame": self.max_renders_per_frame}
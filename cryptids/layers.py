@@ -0,0 +1,106 @@
+"""
+Layer cache.
+
+The static content of a screen (background, logo, titles and labels) is
+composited into a single surface the first time the screen is shown. Later
+frames blit only that surface, with the dynamic widgets drawn on top.
+"""
+import logging
+import sys
+from typing import Callable, Tuple
+
+import pygame
+
+from cryptids import settings as get
+from cryptids.assets import surface_bytes
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+class LayerCache(object):
+    """
+    Pre-composited static layers keyed by name and window size.
+
+    Methods
+    -------
+        get(name, size, builder, *args)
+            Get the layer, calling builder(size, *args) on the first request.
+
+        invalidate()
+            Drop every layer, e.g. when the settings change.
+
+        release(names)
+            Drop the layers of some names, e.g. of a screen not shown lately.
+
+        bytes_of(names)
+            Get the surface memory held by the layers of some names.
+    """
+
+    def __init__(self):
+        self._layers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self,
+            name: str,
+            size: Tuple[int, int],
+            builder: Callable[..., pygame.Surface],
+            *args) -> pygame.Surface:
+        """
+        Get a static layer, compositing it on the first request only.
+
+        Parameters
+        ----------
+        name : str
+            The name of the layer.
+        size : Tuple[int, int]
+            The window size the layer is built for.
+        builder : Callable[..., pygame.Surface]
+            Called as builder(size, *args) to composite the layer.
+        *args :
+            Anything else the layer depends on, e.g. a popup's text.
+
+        Returns
+        -------
+        layer : pygame.Surface
+            The composited layer.
+
+        """
+        key = (name, tuple(size)) + args
+        layer = self._layers.get(key)
+        if layer is not None:
+            self.hits += 1
+            return layer
+        self.misses += 1
+        logger.debug(f"Compositing the {name} layer.")
+        layer = builder(size, *args)
+        self._layers[key] = layer
+        return layer
+
+    def invalidate(self) -> None:
+        """Drop every layer so they are rebuilt on next use."""
+        self._layers.clear()
+
+    def release(self, names) -> None:
+        """Drop every layer (of any size or arguments) of some names."""
+        names = set(names)
+        for key in [key for key in self._layers if key[0] in names]:
+            del self._layers[key]
+
+    def bytes_of(self, names) -> int:
+        """Get the bytes of surface memory held by the layers of some names."""
+        names = set(names)
+        return sum(surface_bytes(layer) for key, layer in self._layers.items() if key[0] in names)
+
+    def stats(self) -> dict:
+        """Get the hit/miss counters of the cache."""
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "layers": len(self._layers)}
@@ -0,0 +1,172 @@
+"""
+Background asset loader.
+
+Images are decoded from disk on a pool of worker threads (pygame releases the
+GIL while decoding). Converting a surface to the display format must happen
+on the main thread, so the main loop polls the loader once per frame, which
+converts a few finished images into the asset manager and reports progress.
+"""
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import sys
+from typing import Iterable
+
+import pygame
+
+from cryptids import settings as get
+from cryptids import utils
+from cryptids.assets import asset_manager
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+class AssetLoader(object):
+    """
+    Decode images on worker threads and hand them to the asset manager.
+
+    Parameters
+    ----------
+        max_workers : int,
+            The number of decoding threads.
+        converts_per_frame : int,
+            The most decoded images converted by a single poll.
+        manager : AssetManager,
+            Where converted images are put. Anything with has_image(path) and
+            put_image(path, surface) will do.
+
+    Methods
+    -------
+        submit(paths)
+            Queue images to be decoded. Cached, queued or failed images are skipped.
+
+        poll()
+            Convert finished images into the asset manager. Call once a frame.
+
+        wait(path)
+            Block until a queued image is decoded and convert it now.
+
+        settle()
+            Block until every queued image is decoded.
+
+        is_done()
+            Check if every queued image has been loaded.
+
+        shutdown()
+            Stop the worker threads.
+    """
+
+    def __init__(self,
+                 max_workers: int = get.ASSET_LOADER_WORKERS,
+                 converts_per_frame: int = get.ASSET_LOADER_CONVERTS_PER_FRAME,
+                 manager=asset_manager):
+        utils.check_type(max_workers, "max_workers", int)
+        utils.check_type(converts_per_frame, "converts_per_frame", int)
+        self.max_workers = max_workers
+        self.converts_per_frame = converts_per_frame
+        self.manager = manager
+        self._executor = None
+        self._pending = {}
+        # images that could not be loaded are not queued again
+        self.failed_paths = set()
+        self.total = 0
+        self.loaded = 0
+        self.failed = 0
+
+    @property
+    def progress(self) -> float:
+        """The fraction (0-1) of the queued images that are finished."""
+        if self.total == 0:
+            return 1.0
+        return (self.loaded + self.failed) / self.total
+
+    def submit(self, paths: Iterable[str]) -> None:
+        """Queue images to be decoded on the worker threads."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asset-loader")
+        for path in paths:
+            if path in self._pending or path in self.failed_paths or self.manager.has_image(path):
+                continue
+            self._pending[path] = self._executor.submit(pygame.image.load, path)
+            self.total += 1
+
+    def poll(self) -> float:
+        """
+        Convert finished images into the asset manager.
+
+        Returns
+        -------
+        progress : float
+            The fraction (0-1) of the queued images that are finished.
+
+        """
+        converted = 0
+        for path, future in list(self._pending.items()):
+            if converted >= self.converts_per_frame:
+                break
+            if not future.done():
+                continue
+            del self._pending[path]
+            self._finish(path, future)
+            converted += 1
+        return self.progress
+
+    def wait(self, path: str):
+        """
+        Block until a queued image is decoded and convert it now.
+
+        Parameters
+        ----------
+        path : str
+            Path of the queued image.
+
+        Returns
+        -------
+        surface : (pygame.Surface, None)
+            The converted image, None if it was not queued or failed to load.
+
+        """
+        future = self._pending.pop(path, None)
+        if future is None:
+            return None
+        return self._finish(path, future)
+
+    def settle(self) -> None:
+        """Block until every queued image is decoded, leaving poll to convert them."""
+        concurrent.futures.wait(list(self._pending.values()))
+
+    def _finish(self, path, future):
+        """Convert a decoded image into the manager."""
+        try:
+            surface = self.manager.put_image(path, future.result())
+            self.loaded += 1
+            return surface
+        except (FileNotFoundError, pygame.error) as error:
+            logger.warning(f"Could not load {path}: {error}")
+            self.failed_paths.add(path)
+            self.failed += 1
+            return None
+
+    def is_done(self) -> bool:
+        """Check if every queued image has been loaded (or failed to)."""
+        return not self._pending
+
+    def reset(self) -> None:
+        """Reset the progress counters, e.g. for the next loading screen."""
+        self.total = len(self._pending)
+        self.loaded = 0
+        self.failed = 0
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, dropping anything still queued."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
@@ -0,0 +1,133 @@
+"""
+Profiling split by game status.
+
+Opt in with `python run.py --profile` or the CRYPTIDS_PROFILE environment
+variable. Every GameWrapper.render is then run under the cProfile profiler of
+the game status being rendered, so each screen is profiled apart from the
+others. F9 stops and restarts collection in game, to capture just one slow
+interaction. On exit one pstats file per screen is written to
+settings.PROFILE_DIR, e.g. logs/profiles/play.pstats, which can be read with
+pstats or drawn as a flamegraph with tools such as snakeviz.
+
+Only the main thread is profiled, not the work offloaded to the I/O and asset
+loading threads.
+"""
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import sys
+from typing import List
+
+from cryptids import settings as get
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def profiling_requested(argv: List[str] = None, environ: dict = None) -> bool:
+    """Check for the --profile switch or a CRYPTIDS_PROFILE environment variable."""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    return "--profile" in argv or environ.get(get.PROFILE_ENV_VAR, "") not in ["", "0"]
+
+
+class StatusProfiler(object):
+    """
+    Profile the rendering of each game status separately.
+
+    Parameters
+    ----------
+        out_dir : str,
+            Folder the pstats files are written to.
+
+    Methods
+    -------
+        enable()
+            Opt in to profiling, collecting from now.
+
+        toggle()
+            Stop or restart collection, if profiling is enabled.
+
+        profile(status)
+            Context manager profiling a render of a status.
+
+        dump()
+            Write one pstats file per status.
+    """
+
+    def __init__(self, out_dir: str = get.PROFILE_DIR):
+        self.out_dir = out_dir
+        self.enabled = False
+        self.collecting = False
+        self._profiles = {}
+        self._off = contextlib.nullcontext()
+
+    def enable(self) -> None:
+        """Opt in to profiling, collecting from now."""
+        self.enabled = True
+        self.collecting = True
+        logger.info(f"Profiling each game status, pstats will be written to {self.out_dir}.")
+
+    def toggle(self) -> bool:
+        """Stop or restart collection, returning whether it is collecting."""
+        if self.enabled:
+            self.collecting = not self.collecting
+            logger.info(f"Profiling {'started' if self.collecting else 'stopped'}.")
+        return self.collecting
+
+    def profile(self, status: str):
+        """Context manager profiling a render of a status, whilst collecting."""
+        if not self.collecting:
+            return self._off
+        return self._profile(status)
+
+    @contextlib.contextmanager
+    def _profile(self, status):
+        profile = self._profiles.get(status)
+        if profile is None:
+            profile = self._profiles[status] = cProfile.Profile()
+        profile.enable()
+        try:
+            yield profile
+        finally:
+            profile.disable()
+
+    def summary(self, status: str, limit: int = 20) -> str:
+        """Get the functions of a status with the most cumulative time."""
+        import pstats
+        stream = io.StringIO()
+        pstats.Stats(self._profiles[status], stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> List[str]:
+        """
+        Write one pstats file per profiled status.
+
+        Returns
+        -------
+        paths : List[str]
+            The files written.
+
+        """
+        paths = []
+        if not self._profiles:
+            return paths
+        os.makedirs(self.out_dir, exist_ok=True)
+        for status, profile in self._profiles.items():
+            path = os.path.join(self.out_dir, f"{status}.pstats")
+            profile.dump_stats(path)
+            paths.append(path)
+        logger.info(f"Wrote the profiles of {list(self._profiles)} to {self.out_dir}.")
+        return paths
+
+
+# the profiler of the main loop
+status_profiler = StatusProfiler()
@@ -0,0 +1,301 @@
+"""
+Session recording and replay.
+
+`python run.py --record session.jsonl.gz` records the input of every frame of
+a session, with the time of the frame and the random seed of the session, as
+gzipped JSON lines. The first line is a header, then one line per frame:
+
+    {"version": 1, "seed": 1234, "status": "intro", "size": [800, 500]}
+    {"t": 0.0}
+    {"t": 0.0167, "m": [400, 250], "c": [[400, 250]], "n": 2}
+
+Replaying a session drives GameWrapper headless, as fast as it will go, with
+its clock set to the recorded time of each frame. Work that runs on other
+threads in game (the user file, the card art) is finished within the frame,
+so a replay renders the same frames every time. Run from the repository root:
+
+    python -m cryptids.replay session.jsonl.gz --out replay.json
+
+The replay logs in and plays on a copy of the user file in a temporary
+folder, made afresh for each replay, so replaying leaves the user file as it
+was and every replay of a session starts from the same users. Pass the user
+file as it was when the session was recorded with --users, by default it is
+users/user_details.json.
+"""
+import argparse
+from concurrent.futures import Executor, Future
+import gzip
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Iterator, Tuple
+
+import pygame
+
+from cryptids import settings as get
+from cryptids import usermanagement
+from cryptids import userstore
+from cryptids.gamewrapper import GameWrapper
+from cryptids.inputs import InputSnapshot
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+REPLAY_VERSION = 1
+
+
+def snapshot_to_record(inputs: InputSnapshot, t: float, mouse_pos=None) -> dict:
+    """Get the compact record of a frame's input, leaving out what is empty or unchanged."""
+    record = {"t": round(t, 6)}
+    if inputs.mouse_pos is not None and tuple(inputs.mouse_pos) != mouse_pos:
+        record["m"] = list(inputs.mouse_pos)
+    if inputs.clicks:
+        record["c"] = [list(pos) for pos in inputs.clicks]
+    if inputs.keys:
+        record["k"] = inputs.keys
+        record["u"] = inputs.key_presses
+    if inputs.quit:
+        record["q"] = 1
+    if inputs.expose:
+        record["x"] = 1
+    if inputs.events:
+        record["n"] = inputs.events
+    return record
+
+
+def snapshot_from_record(record: dict, mouse_pos=None) -> InputSnapshot:
+    """Rebuild the input of a frame from its record, and the mouse position before it."""
+    inputs = InputSnapshot(tuple(record["m"]) if "m" in record else mouse_pos)
+    inputs.clicks = [tuple(pos) for pos in record.get("c", [])]
+    inputs.keys = record.get("k", [])
+    inputs.key_presses = record.get("u", [])
+    inputs.text = "".join(inputs.key_presses)
+    inputs.quit = bool(record.get("q"))
+    inputs.expose = bool(record.get("x"))
+    inputs.events = record.get("n", 0)
+    return inputs
+
+
+class SessionRecorder(object):
+    """
+    Record the input of every frame of a session.
+
+    Parameters
+    ----------
+        path : str,
+            The gzipped JSON lines file to write.
+        seed : int,
+            The seed of the random module for the session.
+        status : str,
+            The game status the session starts in.
+        clock : Callable,
+            The clock of the game, the frames are timed from the first.
+
+    Methods
+    -------
+        record(inputs)
+            Record the input of a frame.
+
+        close()
+            Finish the file.
+    """
+
+    def __init__(self, path: str, seed: int, status: str = get.DEFAULT_STATUS, clock=time.monotonic):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.clock = clock
+        self.frames = 0
+        self._start = None
+        self._mouse_pos = None
+        self._file = gzip.open(path, "wt")
+        self._write({"version": REPLAY_VERSION, "seed": seed, "status": status, "size": [get.WINWIDTH, get.WINHEIGHT]})
+        logger.info(f"Recording the session to {path} with seed {seed}.")
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def record(self, inputs: InputSnapshot) -> None:
+        """Record the input of a frame, at the start of the frame."""
+        now = self.clock()
+        if self._start is None:
+            self._start = now
+        self._write(snapshot_to_record(inputs, now - self._start, self._mouse_pos))
+        if inputs.mouse_pos is not None:
+            self._mouse_pos = tuple(inputs.mouse_pos)
+        self.frames += 1
+
+    def close(self) -> None:
+        """Finish the file."""
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"Recorded {self.frames} frames to {self.path}.")
+
+
+def load_session(path: str) -> Tuple[dict, Iterator[dict]]:
+    """
+    Read a recorded session.
+
+    Returns
+    -------
+    header : dict
+        The version, seed, starting status and window size of the session.
+    frames : Iterator[dict]
+        The record of each frame.
+
+    """
+    f = gzip.open(path, "rt")
+    header = json.loads(f.readline())
+    if header.get("version") != REPLAY_VERSION:
+        f.close()
+        raise ValueError(f"Unsupported replay version {header.get('version')} in {path}.")
+
+    def frames():
+        with f:
+            for line in f:
+                yield json.loads(line)
+    return header, frames()
+
+
+class VirtualClock(object):
+    """A clock set by hand, to replay the recorded time of each frame."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class InlineExecutor(Executor):
+    """Run submitted work at once on the calling thread, so it finishes within the frame."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+def replay(path: str, screen: pygame.Surface, users: str = None) -> dict:
+    """
+    Replay a recorded session headless, as fast as it will go.
+
+    Parameters
+    ----------
+    path : str
+        The recorded session.
+    screen : pygame.Surface
+        The surface rendered to.
+    users : str
+        The user file the session starts from, usermanagement.FILEPATH by
+        default. The replay runs on a copy of it.
+
+    Returns
+    -------
+    results : dict
+        The frames replayed, the wall time, the status the replay ended on
+        and the p50/p95/total render time of each status.
+
+    """
+    users = usermanagement.FILEPATH if users is None else users
+    with tempfile.TemporaryDirectory() as folder:
+        filepath, usermanagement.FILEPATH = usermanagement.FILEPATH, os.path.join(folder, "user_details.json")
+        try:
+            shutil.copyfile(users, usermanagement.FILEPATH)
+            return _replay(path, screen)
+        finally:
+            # write what the replay changed before the copy goes
+            userstore.get_store(usermanagement.FILEPATH).close()
+            usermanagement.FILEPATH = filepath
+
+
+def _replay(path: str, screen: pygame.Surface) -> dict:
+    """Replay a recorded session on the user file in usermanagement.FILEPATH, see replay."""
+    header, frames = load_session(path)
+    random.seed(header["seed"])
+    clock = VirtualClock()
+    game = GameWrapper(status=header["status"], clock=clock, io_executor=InlineExecutor())
+
+    times = {}
+    mouse_pos = None
+    count = 0
+    start = time.perf_counter()
+    for record in frames:
+        inputs = snapshot_from_record(record, mouse_pos)
+        mouse_pos = inputs.mouse_pos
+        if inputs.quit:
+            break
+        clock.now = record["t"]
+        if inputs.expose:
+            game.dirty.mark_full()
+        # the card art decodes on the loader threads, let it catch up
+        game.card_art.loader.settle()
+
+        status = game.game_status
+        frame_start = time.perf_counter()
+        try:
+            game.render(screen, inputs.click_pos, inputs.key_press, inputs.click_event, inputs=inputs)
+        except SystemExit:
+            # the outro quits the game
+            break
+        finally:
+            times.setdefault(status, []).append(time.perf_counter() - frame_start)
+            count += 1
+        game.dirty.consume()
+    wall = time.perf_counter() - start
+    game.card_art.clear()
+
+    statuses = {}
+    for status, values in times.items():
+        ordered = sorted(values)
+        statuses[status] = {"frames": len(values),
+                            "p50_ms": 1000 * statistics.median(ordered),
+                            "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                            "total_ms": 1000 * sum(values)}
+    return {"frames": count, "wall_s": wall, "status_end": game.game_status, "statuses": statuses}
+
+
+def main():
+    """Replay a recorded session and report the render time of each screen."""
+    parser = argparse.ArgumentParser(description="Replay a recorded Cryptids session headless.")
+    parser.add_argument("session", help="a file recorded with `python run.py --record`")
+    parser.add_argument("--users", default=usermanagement.FILEPATH,
+                        help="the user file as it was when the session was recorded, replayed on a copy")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((get.WINWIDTH, get.WINHEIGHT))
+    results = replay(args.session, screen, users=args.users)
+    if pygame.get_init():
+        pygame.quit()
+
+    print(f"replayed {results['frames']} frames in {results['wall_s']:.3f} s, ending on {results['status_end']}")
+    for status, result in results["statuses"].items():
+        print(f"{status:>10}: p50 {result['p50_ms']:7.3f} ms, p95 {result['p95_ms']:7.3f} ms, "
+              f"total {result['total_ms']:9.1f} ms over {result['frames']} frames")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Frame scheduler.
+
+Animated screens run at settings.CLOCKSPEED. Static screens drop to
+settings.IDLE_CLOCKSPEED once nothing has happened for a while, by sleeping
+until an event is queued, and return to the full rate as soon as an event arrives or an
+animation starts. The CPU time of each screen is recorded for reporting.
+
+The asyncio main loop awaits its frames with wait_async instead, so the event
+loop runs whilst the frame waits.
+"""
+import logging
+import sys
+import time
+
+import pygame
+
+from cryptids import settings as get
+from cryptids import utils
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+class FrameScheduler(object):
+    """
+    Wait for the next frame, idling on static screens.
+
+    Parameters
+    ----------
+        active_rate : int,
+            Frames per second whilst animating or receiving input.
+        idle_rate : int,
+            Frames per second of an idle static screen.
+        idle_after : int,
+            Frames without activity before a static screen idles.
+
+    Methods
+    -------
+        wait(status, animating, active)
+            Wait for the next frame and record the CPU time of the screen.
+
+        wait_async(status, animating, active)
+            Await the next frame and record the CPU time of the screen.
+
+        stats()
+            Get the frames, CPU and wall time of each screen.
+    """
+
+    def __init__(self,
+                 active_rate: int = get.CLOCKSPEED,
+                 idle_rate: int = get.IDLE_CLOCKSPEED,
+                 idle_after: int = get.IDLE_AFTER_FRAMES):
+        utils.check_type(active_rate, "active_rate", int)
+        utils.check_type(idle_rate, "idle_rate", int)
+        utils.check_type(idle_after, "idle_after", int)
+        self.active_rate = active_rate
+        self.idle_rate = idle_rate
+        self.idle_after = idle_after
+        self.clock = pygame.time.Clock()
+        self.quiet_frames = 0
+        self.wakeups = 0
+        self._screens = {}
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+
+    @property
+    def idle(self) -> bool:
+        """Whether the next frame will idle."""
+        return self.quiet_frames >= self.idle_after
+
+    def wait(self, status: str, animating: bool, active: bool) -> None:
+        """
+        Wait for the next frame.
+
+        Parameters
+        ----------
+        status : str
+            The game status rendered this frame, to attribute the CPU time to.
+        animating : bool
+            Whether the screen changes without input.
+        active : bool
+            Whether there was input or anything was drawn this frame.
+
+        """
+        idle = self._settle(animating, active)
+        if idle:
+            # sleep until an event is queued or the idle frame is due, an active frame at a time.
+            # The events are only peeked at, taking one off the queue and posting it back would reorder them
+            frame = 1 / self.active_rate
+            deadline = self._wall + 1 / self.idle_rate
+            while (remaining := deadline - time.perf_counter()) > 0:
+                if pygame.event.peek():
+                    # woken by input
+                    self.wakeups += 1
+                    self.quiet_frames = 0
+                    break
+                time.sleep(min(frame, remaining))
+            # keep the clock's frame timing in step
+            self.clock.tick()
+        else:
+            self.clock.tick(self.active_rate)
+        self._record(status, idle)
+
+    async def wait_async(self, status: str, animating: bool, active: bool) -> None:
+        """
+        Await the next frame, as wait, running the event loop meanwhile.
+
+        The event queue cannot be awaited, so an idle frame sleeps an active
+        frame at a time and wakes early as soon as an event is queued.
+
+        Parameters
+        ----------
+        status : str
+            The game status rendered this frame, to attribute the CPU time to.
+        animating : bool
+            Whether the screen changes without input.
+        active : bool
+            Whether there was input or anything was drawn this frame.
+
+        """
+        # imported here, so the plain loop starts without asyncio
+        import asyncio
+
+        idle = self._settle(animating, active)
+        frame = 1 / self.active_rate
+        if idle:
+            deadline = self._wall + 1 / self.idle_rate
+            while (remaining := deadline - time.perf_counter()) > 0:
+                if pygame.event.peek():
+                    # woken by input
+                    self.wakeups += 1
+                    self.quiet_frames = 0
+                    break
+                await asyncio.sleep(min(frame, remaining))
+        else:
+            # the frame started when the last one was recorded
+            await asyncio.sleep(max(0.0, self._wall + frame - time.perf_counter()))
+        # keep the clock's frame timing in step
+        self.clock.tick()
+        self._record(status, idle)
+
+    def _settle(self, animating, active) -> bool:
+        """Count the quiet frames, returning whether the next frame idles."""
+        if animating or active:
+            self.quiet_frames = 0
+        else:
+            self.quiet_frames += 1
+        return self.idle
+
+    def _record(self, status, idle):
+        """Attribute the CPU and wall time since the last frame to a screen."""
+        cpu, wall = time.process_time(), time.perf_counter()
+        screen = self._screens.setdefault(status, {"frames": 0, "idle_frames": 0, "cpu_s": 0.0, "wall_s": 0.0})
+        screen["frames"] += 1
+        screen["idle_frames"] += idle
+        screen["cpu_s"] += cpu - self._cpu
+        screen["wall_s"] += wall - self._wall
+        self._cpu, self._wall = cpu, wall
+
+    def stats(self) -> dict:
+        """Get the frames, idle frames, CPU and wall time and CPU % of each screen."""
+        stats = {}
+        for status, screen in self._screens.items():
+            stats[status] = dict(screen, cpu_percent=100 * screen["cpu_s"] / screen["wall_s"] if screen["wall_s"] else 0.0)
+        return stats
@@ -0,0 +1,318 @@
+"""
+Screen lifecycle.
+
+Each game status is a Screen: its draw function, optional enter, exit and
+update hooks, and the resources it draws with. Those are the names of its
+static layers in the LayerCache and the images it needs, decoded through an
+AssetLoader into the loader's manager (the asset manager or the card art).
+
+The ScreenRegistry switches between the screens as the game status changes.
+On entering a screen, the images of the screens likely to follow it are
+preloaded in the background, e.g. the card art of the deck whilst on the
+pre-play screen. The resources of screens not shown for a while are released,
+unless a screen that is kept still uses them, e.g. the logo shared by most
+menus. The surface memory held by each screen is reported by memory().
+"""
+import logging
+import sys
+import time
+from typing import Callable, Dict, Iterable, List
+
+from cryptids import settings as get
+from cryptids import utils
+from cryptids.layers import LayerCache
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+class Screen(object):
+    """
+    A game status, its lifecycle hooks and the resources it draws with.
+
+    Parameters
+    ----------
+        name : str,
+            The game status of the screen.
+        draw : Callable,
+            Called as draw(screen, click_pos, key_press, click_event) each frame.
+        layers : Iterable[str],
+            Names of the static layers the screen composites.
+        images : (Iterable[str], Callable),
+            Paths of the images the screen needs, or a function returning
+            them when they depend on the game, e.g. the cards of a deck.
+        loader : AssetLoader,
+            Decodes the images into its manager, where they are held.
+        next_screens : Iterable[str],
+            The screens likely to be shown next, preloaded on entering.
+        enter, exit, update : Callable,
+            Optional hooks called on entering, on leaving and before each draw.
+
+    Methods
+    -------
+        enter()
+            Called when the screen is switched to.
+
+        exit()
+            Called when the screen is switched from.
+
+        update()
+            Called each frame, before drawing.
+
+        draw(screen, click_pos, key_press, click_event)
+            Draw a frame of the screen.
+
+        resources()
+            Get the paths of the images the screen needs.
+    """
+
+    def __init__(self,
+                 name: str,
+                 draw: Callable,
+                 layers: Iterable[str] = (),
+                 images=(),
+                 loader=None,
+                 next_screens: Iterable[str] = (),
+                 enter: Callable = None,
+                 exit: Callable = None,
+                 update: Callable = None):
+        utils.check_type(name, "name", str)
+        self.name = name
+        self._draw = draw
+        self.layers = list(layers)
+        self._images = images
+        self.loader = loader
+        self.next_screens = list(next_screens)
+        self._enter = enter
+        self._exit = exit
+        self._update = update
+        # the time the screen was last shown, None if never
+        self.last_shown = None
+        # whether the screen may be holding resources
+        self.held = False
+
+    def enter(self) -> None:
+        """Called when the screen is switched to."""
+        if self._enter is not None:
+            self._enter()
+
+    def exit(self) -> None:
+        """Called when the screen is switched from."""
+        if self._exit is not None:
+            self._exit()
+
+    def update(self) -> None:
+        """Called each frame, before drawing."""
+        if self._update is not None:
+            self._update()
+
+    def draw(self, screen, click_pos, key_press, click_event: bool) -> None:
+        """Draw a frame of the screen."""
+        self._draw(screen, click_pos, key_press, click_event)
+
+    def resources(self) -> List[str]:
+        """Get the paths of the images the screen needs."""
+        images = self._images() if callable(self._images) else self._images
+        return list(images)
+
+
+class ScreenRegistry(object):
+    """
+    Switch between screens, preloading the next and releasing the stale.
+
+    Parameters
+    ----------
+        layers : LayerCache,
+            Where the static layers of the screens are held.
+        clock : Callable,
+            Returns the time in seconds, monotonic.
+        release_after : float,
+            Seconds since a screen was last shown before its resources are released.
+        preload_limit : int,
+            The most images preloaded for a screen.
+
+    Methods
+    -------
+        register(screen)
+            Add a screen.
+
+        switch(name)
+            Get the screen of a game status, entering it if it is not current.
+
+        update()
+            Convert preloaded images and update the current screen. Call once a frame.
+
+        preload()
+            Preload the images of the screens likely to follow the current one.
+
+        release_stale()
+            Release the resources of the screens not shown lately.
+
+        memory()
+            Get the bytes of surface memory held by each screen.
+    """
+
+    def __init__(self,
+                 layers: LayerCache,
+                 clock: Callable = time.monotonic,
+                 release_after: float = get.SCREEN_RELEASE_AFTER,
+                 preload_limit: int = get.SCREEN_PRELOAD_LIMIT):
+        utils.check_type(release_after, "release_after", float)
+        utils.check_type(preload_limit, "preload_limit", int)
+        self.layers = layers
+        self.clock = clock
+        self.release_after = release_after
+        self.preload_limit = preload_limit
+        self.screens = {}
+        self.current = None
+        self.switches = 0
+        self.releases = 0
+        # loaders with preloaded images left to convert
+        self._preloading = []
+        self._last_release_check = None
+
+    def register(self, screen: Screen) -> Screen:
+        """Add a screen, returning it."""
+        self.screens[screen.name] = screen
+        return screen
+
+    def switch(self, name: str) -> Screen:
+        """
+        Get the screen of a game status, entering it if it is not current.
+
+        Parameters
+        ----------
+        name : str
+            The game status.
+
+        Returns
+        -------
+        screen : Screen
+            The current screen.
+
+        """
+        if self.current is not None and self.current.name == name:
+            return self.current
+        screen = self.screens.get(name)
+        if screen is None:
+            raise ValueError(f"Unrecognised game_status: {name}")
+
+        now = self.clock()
+        previous = self.current
+        if previous is not None:
+            previous.last_shown = now
+            previous.exit()
+        logger.debug(f"Switching screen from {previous.name if previous is not None else None} to {name}.")
+        self.current = screen
+        self.switches += 1
+        screen.last_shown = now
+        screen.held = True
+        screen.enter()
+        self.preload()
+        self.release_stale()
+        return screen
+
+    def update(self) -> None:
+        """Convert preloaded images, release stale screens now and then, and update the current screen."""
+        for loader in list(self._preloading):
+            loader.poll()
+            if loader.is_done():
+                self._preloading.remove(loader)
+        if self.current is None:
+            return
+        now = self.clock()
+        # a screen may go stale whilst another is shown for a long time
+        if self._last_release_check is None or now - self._last_release_check >= self.release_after:
+            self.release_stale()
+        self.current.update()
+
+    def preload(self) -> None:
+        """Queue the images of the screens likely to follow the current one on their loaders."""
+        if self.current is None:
+            return
+        for name in self.current.next_screens:
+            screen = self.screens.get(name)
+            if screen is None or screen.loader is None:
+                continue
+            paths = screen.resources()[:self.preload_limit]
+            if not paths:
+                continue
+            logger.debug(f"Preloading {len(paths)} images of the {name} screen.")
+            screen.loader.submit(paths)
+            screen.held = True
+            if screen.loader not in self._preloading:
+                self._preloading.append(screen.loader)
+
+    def _kept(self) -> List[Screen]:
+        """Get the screens whose resources are kept: the current, those likely next and those shown lately."""
+        now = self.clock()
+        kept = []
+        for screen in self.screens.values():
+            if (screen is self.current
+                    or (self.current is not None and screen.name in self.current.next_screens)
+                    or (screen.last_shown is not None and now - screen.last_shown < self.release_after)):
+                kept.append(screen)
+        return kept
+
+    def release_stale(self) -> List[str]:
+        """
+        Release the resources of the screens not shown lately.
+
+        Layers and images still used by a kept screen are not released.
+
+        Returns
+        -------
+        released : List[str]
+            The names of the screens released.
+
+        """
+        self._last_release_check = self.clock()
+        kept = self._kept()
+        kept_layers = {name for screen in kept for name in screen.layers}
+        kept_images = {path for screen in kept if screen.loader is not None for path in screen.resources()}
+        released = []
+        for screen in self.screens.values():
+            if not screen.held or screen in kept:
+                continue
+            self.layers.release([name for name in screen.layers if name not in kept_layers])
+            if screen.loader is not None:
+                screen.loader.manager.release([path for path in screen.resources() if path not in kept_images])
+            screen.held = False
+            released.append(screen.name)
+        if released:
+            self.releases += len(released)
+            logger.debug(f"Released the resources of the {released} screens.")
+        return released
+
+    def memory(self) -> Dict[str, int]:
+        """
+        Get the bytes of surface memory held by each screen.
+
+        Resources shared by screens, such as the logo, are counted for each.
+
+        Returns
+        -------
+        memory : Dict[str, int]
+            The bytes held by the layers and images of each screen.
+
+        """
+        memory = {}
+        for name, screen in self.screens.items():
+            held = self.layers.bytes_of(screen.layers)
+            if screen.loader is not None:
+                held += screen.loader.manager.bytes_of(screen.resources())
+            memory[name] = held
+        return memory
+
+    def stats(self) -> dict:
+        """Get the switch/release counters and the memory of each screen."""
+        return {"current": self.current.name if self.current is not None else None,
+                "switches": self.switches,
+                "releases": self.releases,
+                "memory": self.memory()}
@@ -23,6 +23,48 @@ PALE_GREEN = (215, 236, 215)
 ASSET_ROOT = os.path.join("assets")
 CARD_ROOT = os.path.join(ASSET_ROOT, "cards")
 
+# ASSET CACHE
+ASSET_CACHE_BYTE_BUDGET = 64 * 1024 * 1024  # bytes of decoded surfaces
+ASSET_LOADER_WORKERS = 4  # threads decoding images behind loading screens
+ASSET_LOADER_CONVERTS_PER_FRAME = 8  # decoded images converted per frame
+CARD_STREAM_BYTE_BUDGET = 16 * 1024 * 1024  # bytes of streamed card art
+CARD_STREAM_PREFETCH = 4  # cards decoded ahead from the top of the deck
+CARD_STREAM_TIERS = ("field", "hand")  # atlas tiers the cards in play are drawn at, their sheets decoded with the art
+
+# SCREENS
+SCREEN_RELEASE_AFTER = 60.0  # seconds since a screen was shown before its layers and images are released
+SCREEN_PRELOAD_LIMIT = 32  # most images preloaded for the next screen, e.g. the card art of a deck
+
+# USER STORE
+USER_STORE_BACKEND = "json"  # "json" for users/user_details.json, "sqlite" for USER_SQLITE_PATH, "journal" for USER_JOURNAL_PATH
+USER_SQLITE_PATH = os.path.join("users", "user_details.db")  # made with `python -m cryptids.usersqlite`
+USER_SQLITE_TIMEOUT = 5.0  # seconds a write waits for another to finish
+USER_JOURNAL_PATH = os.path.join("users", "user_details.journal")  # each change appended
+USER_JOURNAL_SNAPSHOT_PATH = os.path.join("users", "user_details.snapshot.json")  # the journal folded in
+USER_JOURNAL_COMPACT_BYTES = 1024 * 1024  # size of journal folded into the snapshot in the background
+USER_JOURNAL_FSYNC = True  # sync each change to disk before it is seen
+USER_STORE_FLUSH_DELAY = 0.5  # seconds the committed user changes gather before they are written
+USER_STORE_METRICS_SIZE = 1000  # latest user file reads and writes timed
+
+# CREDENTIALS
+# tune the costs with `python benchmarks/bench_credentials.py`
+CREDENTIALS_ALGORITHM = "pbkdf2_sha256"  # or "scrypt", for new password hashes
+CREDENTIALS_PBKDF2_ITERATIONS = 600_000  # about 0.3 s a hash
+CREDENTIALS_SCRYPT_N = 2 ** 15  # with r = 8 and p = 1, 32 MB and about 0.15 s a hash
+CREDENTIALS_TARGET_SECONDS = 0.25  # time of a hash the benchmark tunes the costs to
+CREDENTIALS_WORKERS = 2  # threads hashing passwords, hashlib leaves the GIL whilst hashing
+
+# CARD ATLAS
+# baked offline with `python -m cryptids.atlas`
+ATLAS_ROOT = os.path.join(ASSET_ROOT, "atlas")
+ATLAS_INDEX_PATH = os.path.join(ATLAS_ROOT, "index.json")
+ATLAS_TIERS = {"thumbnail": 60,  # card height in pixels per tier
+               "field": 96,
+               "hand": 120,
+               "inspect": 360}
+ATLAS_SHEET_SIZE = 2048  # width and height of an atlas sheet
+ATLAS_PADDING = 1  # pixels between packed cards
+
 # WINDOW
 WINWIDTH = 800
 WINHEIGHT = 500
@@ -37,10 +79,38 @@ WINTITLE = "Cryptids TGC"
 
 # FRAME RATES
 CLOCKSPEED = 60
+IDLE_CLOCKSPEED = 4  # frame rate of static screens without input
+IDLE_AFTER_FRAMES = CLOCKSPEED // 2  # frames without activity before idling
+
+# MAIN LOOP
+ASYNC_MAIN_LOOP = True  # asyncio main loop, `python run.py --sync` for the plain loop
+STARTUP_LOG_CAPACITY = 10000  # log records held until the log file is built after the first frame
+IO_WORKERS = 2  # threads reading and writing the user and NFT files
 
 # APPEARANCE
 FONT = os.path.join("assets", "fonts", "Cabin_Sketch", "CabinSketch-Regular.ttf")
 
+# DISPLAY UPDATES
+DIRTY_RECTS_MAX = 32  # beyond this many changed regions, update the whole window
+DEBUG_DIRTY_RECTS = False  # outline the changed regions of each frame
+DIRTY_RECT_OVERLAY_COLOUR = GREEN
+DIRTY_RECT_OVERLAY_FONT = FONT
+DIRTY_RECT_OVERLAY_FONT_SIZE = 16
+
+# FRAME TIMING
+FRAME_TIMER_ENABLED = True  # time the phases of each frame
+FRAME_TIMER_FRAMES = 600  # frames kept in the ring buffer
+FRAME_TIMER_DUMP_PATH = os.path.join("logs", "frame_times.csv")  # written on F4, .json for JSON
+FRAME_TIMER_OVERLAY_REFRESH = 0.5  # seconds between overlay updates, shown on F3
+FRAME_TIMER_OVERLAY_COLOUR = GREEN
+FRAME_TIMER_OVERLAY_FONT = FONT
+FRAME_TIMER_OVERLAY_FONT_SIZE = 16
+
+# PROFILING
+# opt in with `python run.py --profile` or CRYPTIDS_PROFILE=1, F9 stops/restarts
+PROFILE_ENV_VAR = "CRYPTIDS_PROFILE"
+PROFILE_DIR = os.path.join("logs", "profiles")  # one pstats file per game status
+
 # BUTTON DEFAULTS
 DEFAULT_BUTTON_DELAY_ON_CLICK = 0.1  # seconds
 BUTTON_DEFAULT_FONTNAME = FONT
@@ -81,9 +151,13 @@ STATUS_PAUSE = "pause"
 STATUS_POPUP = "popup"
 STATUS_REGISTER = "register"
 GAME_STATUSES = [STATUS_INTRO, STATUS_HOME, STATUS_SETTINGS, STATUS_PREPLAY, STATUS_OUTRO, STATUS_GAMEPLAY, STATUS_PAUSE, STATUS_POPUP, STATUS_REGISTER]
+# screens that change without input, these always run at CLOCKSPEED
+ANIMATED_STATUSES = [STATUS_INTRO, STATUS_OUTRO, STATUS_GAMEPLAY]
 
 # set duration for the INTRO/OUTRO
 DURATIONS = 0.5
+TIMELINE_TIMESTEP = 1 / CLOCKSPEED  # secs, the sequences advance in fixed timesteps
+SEQUENCE_FADE_DURATION = 0.1  # secs, each step of the sequences fades in and out
 # TITLE SCREEN
 TITLE_DURATION = DURATIONS  # secs
 TITLE_SCREEN_BACKGROUND_COLOR = SLATE_GRAY
@@ -193,7 +267,10 @@ LOADING_SCREEN_FONT_SIZE = 200
 LOADING_SCREEN_FONT_COLOUR = RED
 LOADING_SCREEN_BUTTON_BG_COLOUR = SLATE_GRAY
 LOADING_SCREEN_BG_COLOUR = SLATE_GRAY
-LOADING_SCREEN_ENFORCED_DELAY = 3
+LOADING_SCREEN_PROGRESS_BAR_COLOUR = RED
+LOADING_SCREEN_PROGRESS_BAR_WIDTH = WINWIDTH // 2
+LOADING_SCREEN_PROGRESS_BAR_HEIGHT = 20
+LOADING_SCREEN_PROGRESS_BAR_BORDER = 2
 
 # GAME STYLING
 GAME_FONT = FONT
@@ -216,3 +293,23 @@ GRID_BORDER_DEFAULT_COLOUR = RED
 
 # CARD SETTINGS
 CARD_ASPECT_RATIO_WH = (4, 7)  # width, height
+
+# FONT PRELOADING
+# every (font, size) used by the screens, built once at start up.
+PRELOAD_FONTS = sorted(set([
+    (BUTTON_DEFAULT_FONTNAME, BUTTON_DEFAULT_FONTSIZE),
+    (BUTTON_INTPUTTEXT_FONTNAME, BUTTON_INTPUTTEXT_FONTSIZE),
+    (TITLE_SCREEN_FONT, TITLE_SCREEN_FONT_SIZE),
+    (CREDIT_SCREEN_FONT, CREDIT_SCREEN_FONT_SIZE),
+    (OUTRO_SCREEN_FONT, OUTRO_SCREEN_FONT_SIZE1),
+    (OUTRO_SCREEN_FONT, OUTRO_SCREEN_FONT_SIZE2),
+    (OUTRO_SCREEN_FONT, OUTRO_SCREEN_FONT_SIZE3),
+    (HOME_SCREEN_FONT, HOME_SCREEN_FONT_SIZE),
+    (SETTINGS_SCREEN_FONT, SETTINGS_SCREEN_FONT_SIZE),
+    (PAUSE_SCREEN_PAUSE_TEXT_FONT, PAUSE_SCREEN_PAUSE_TEXT_FONTSIZE),
+    (POPUP_SCREEN_POPUP_HEADING_FONT, POPUP_SCREEN_POPUP_HEADING_FONTSIZE),
+    (POPUP_SCREEN_POPUP_BODY_FONT, POPUP_SCREEN_POPUP_BODY_FONTSIZE),
+    (PREPLAY_LOGIN_TEXT_FONT, PREPLAY_LOGIN_TEXT_FONTSIZE),
+    (LOADING_SCREEN_FONT, LOADING_SCREEN_FONT_SIZE),
+    (GAME_FONT, GAME_FONT_SIZE),
+]))
@@ -0,0 +1,264 @@
+"""
+Card art streaming.
+
+Only the art of the cards a player can see (hand, field and magic) is kept
+decoded, plus the next few cards on top of the deck, which are decoded in the
+background before they are drawn. Everything else is evicted, least recently
+used first, once the streamed art exceeds its memory budget.
+
+The cards are drawn small from the baked card atlas, see cryptids.atlas. The
+atlas sheets holding the cards needed at settings.CARD_STREAM_TIERS are
+decoded in the background along with the full size art.
+"""
+from collections import OrderedDict
+import logging
+import sys
+from typing import List, Tuple
+
+import pygame
+
+from cryptids import settings as get
+from cryptids import utils
+from cryptids.assets import surface_bytes
+from cryptids.atlas import CardAtlas, card_atlas, card_image_path
+from cryptids.loader import AssetLoader
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def resident_card_ids(player) -> List[int]:
+    """Get the ids of the cards in the hand, field and magic of a player."""
+    field = [card for card in player.field.values() if card is not None]
+    return [card.card_id for card in player.hand + field + player.magic]
+
+
+def upcoming_card_ids(player, n: int) -> List[int]:
+    """Get the ids of the next n cards drawn from the deck, next first."""
+    # cards are drawn with deck.pop(), the top of the deck is its end
+    return [card.card_id for card in reversed(player.deck[-n:])] if n > 0 else []
+
+
+class CardArtStreamer(object):
+    """
+    Keep the art of the visible cards decoded and prefetch the deck top.
+
+    Parameters
+    ----------
+        byte_budget : int,
+            Bytes of decoded art to keep before evicting cards not in use.
+        prefetch : int,
+            The number of cards decoded ahead from the top of the deck.
+        card_root : str,
+            Folder of the card images.
+        atlas : CardAtlas,
+            The atlas the cards are drawn small from, the process wide one by default.
+        tiers : Tuple[str],
+            The atlas tiers whose sheets are decoded ahead.
+
+    Methods
+    -------
+        update(*players)
+            Decode the art the players need and evict the rest. Call once a frame.
+
+        wanted_paths(*players)
+            Get the paths of the art the players need.
+
+        get(card_id, tier)
+            Get the art of a card, full size or at an atlas tier, blocking if it is not decoded yet.
+
+        is_done()
+            Check if all of the art the players need is decoded.
+
+        release(paths)
+            Drop the art at some paths, e.g. once the game is left.
+
+        bytes_of(paths)
+            Get the surface memory held by the art at some paths.
+
+        stats()
+            Get the prefetch hit/stall counters and memory use.
+    """
+
+    def __init__(self,
+                 byte_budget: int = get.CARD_STREAM_BYTE_BUDGET,
+                 prefetch: int = get.CARD_STREAM_PREFETCH,
+                 card_root: str = get.CARD_ROOT,
+                 atlas: CardAtlas = None,
+                 tiers: Tuple[str] = get.CARD_STREAM_TIERS):
+        utils.check_type(byte_budget, "byte_budget", int)
+        utils.check_type(prefetch, "prefetch", int)
+        self.byte_budget = byte_budget
+        self.prefetch = prefetch
+        self.card_root = card_root
+        self.atlas = card_atlas if atlas is None else atlas
+        self.tiers = tiers
+        self.loader = AssetLoader(manager=self)
+        # the atlas keeps its own sheets, a few large images
+        self.sheet_loader = AssetLoader(max_workers=1, manager=self.atlas)
+        self._surfaces = OrderedDict()
+        self._wanted = set()
+        # art decoded ahead and not drawn yet, its first get is a prefetch hit
+        self._prefetched = set()
+        self.bytes_used = 0
+        self.prefetch_hits = 0
+        self.stalls = 0
+        self.evictions = 0
+
+    @property
+    def progress(self) -> float:
+        """The fraction (0-1) of the queued art that is decoded."""
+        return min(self.loader.progress, self.sheet_loader.progress)
+
+    # the AssetLoader puts decoded images here
+    def has_image(self, path: str, convert_alpha: bool = True) -> bool:
+        """Check if the art at a path is decoded."""
+        return path in self._surfaces
+
+    def put_image(self, path: str, surface: pygame.Surface, convert_alpha: bool = True) -> pygame.Surface:
+        """Convert and keep the decoded art at a path."""
+        if path in self._surfaces:
+            return self._surfaces[path]
+        surface = surface.convert_alpha() if convert_alpha else surface.convert()
+        self._surfaces[path] = surface
+        self._prefetched.add(path)
+        self.bytes_used += surface_bytes(surface)
+        return surface
+
+    def update(self, *players) -> float:
+        """
+        Decode the art the players need and evict the rest.
+
+        Parameters
+        ----------
+        *players : gameplay.Player
+            The players whose hand, field, magic and deck top are needed.
+
+        Returns
+        -------
+        progress : float
+            The fraction (0-1) of the queued art that is decoded.
+
+        """
+        card_ids = self._wanted_card_ids(*players)
+        wanted = [self._path(card_id) for card_id in card_ids]
+        self._wanted = set(wanted)
+        self.loader.submit(wanted)
+        self.sheet_loader.submit(dict.fromkeys(path for card_id in card_ids for tier in self.tiers
+                                               if (path := self.atlas.sheet_path(card_id, tier)) is not None))
+        self.sheet_loader.poll()
+        self.loader.poll()
+        self._evict()
+        return self.progress
+
+    def wanted_paths(self, *players) -> List[str]:
+        """Get the paths of the art the players need: the cards in play, then the next few on top of the deck."""
+        return [self._path(card_id) for card_id in self._wanted_card_ids(*players)]
+
+    def _wanted_card_ids(self, *players) -> List[int]:
+        """Get the ids of the cards the players need, the visible cards first."""
+        resident, upcoming = [], []
+        for player in players:
+            resident += resident_card_ids(player)
+            upcoming += upcoming_card_ids(player, self.prefetch)
+        return resident + upcoming
+
+    def get(self, card_id: int, tier: str = None):
+        """
+        Get the art of a card, blocking if it is not decoded yet.
+
+        Parameters
+        ----------
+        card_id : int
+            The id of the card.
+        tier : str
+            An atlas tier, e.g. "hand", to draw the card small. None for the full size art.
+
+        Returns
+        -------
+        surface : (pygame.Surface, None)
+            The art of the card, None if the card has no full size art.
+
+        """
+        if tier is not None:
+            # a subsurface of an atlas sheet, decoded in update
+            return self.atlas.get(card_id, tier)
+        path = self._path(card_id)
+        surface = self._surfaces.get(path)
+        if surface is not None:
+            # count the first draw of prefetched art, not every frame it is drawn
+            if path in self._prefetched:
+                self._prefetched.discard(path)
+                self.prefetch_hits += 1
+            self._surfaces.move_to_end(path)
+            return surface
+
+        # not prefetched in time, wait for it
+        self.stalls += 1
+        logger.debug(f"Stalled on the art of card {card_id}.")
+        if path in self.loader.failed_paths:
+            return None
+        surface = self.loader.wait(path)
+        if surface is None and path not in self.loader.failed_paths:
+            # it was never queued
+            self.loader.submit([path])
+            surface = self.loader.wait(path)
+        self._prefetched.discard(path)
+        self._evict()
+        return surface
+
+    def is_done(self) -> bool:
+        """Check if all of the queued art and atlas sheets are decoded."""
+        return self.loader.is_done() and self.sheet_loader.is_done()
+
+    def _path(self, card_id: int) -> str:
+        return card_image_path(card_id, self.card_root)
+
+    def _evict(self) -> None:
+        """Evict the least recently used art not in use until under budget."""
+        if self.bytes_used <= self.byte_budget:
+            return
+        for path in list(self._surfaces):
+            if self.bytes_used <= self.byte_budget:
+                break
+            if path in self._wanted:
+                continue
+            self.bytes_used -= surface_bytes(self._surfaces.pop(path))
+            self._prefetched.discard(path)
+            self.evictions += 1
+
+    def release(self, paths) -> None:
+        """Drop the decoded art at some paths, unless a player needs it."""
+        for path in paths:
+            if path in self._surfaces and path not in self._wanted:
+                self.bytes_used -= surface_bytes(self._surfaces.pop(path))
+                self._prefetched.discard(path)
+
+    def bytes_of(self, paths) -> int:
+        """Get the bytes of surface memory held by the decoded art at some paths."""
+        return sum(surface_bytes(self._surfaces[path]) for path in set(paths) if path in self._surfaces)
+
+    def clear(self) -> None:
+        """Drop all streamed art, e.g. at the end of a game."""
+        self.loader.shutdown()
+        self.sheet_loader.shutdown()
+        self._surfaces.clear()
+        self._wanted = set()
+        self._prefetched = set()
+        self.bytes_used = 0
+
+    def stats(self) -> dict:
+        """Get the prefetch hit/stall counters and memory use."""
+        return {"prefetch_hits": self.prefetch_hits,
+                "stalls": self.stalls,
+                "evictions": self.evictions,
+                "entries": len(self._surfaces),
+                "bytes_used": self.bytes_used,
+                "byte_budget": self.byte_budget,
+                "atlas": self.atlas.stats()}
@@ -0,0 +1,179 @@
+"""
+Frame-stepped tasks.
+
+Behaviour that spans several frames (click delays, popups, text entry) is
+written as a generator and advanced once per main loop frame, rather than
+running its own event loop. Each `yield` ends the task's frame, and receives
+the InputSnapshot of the next frame:
+
+    def task():
+        # setup, run on the task's first frame
+        while True:
+            inputs = yield
+            ...
+
+A task may yield True or False to say whether it is animating, i.e. whether it
+changes the screen without input.
+
+Modal tasks take the input away from the screen underneath, and run one at a
+time in the order they were started.
+"""
+from collections import deque
+import logging
+import sys
+from typing import Callable, Generator
+
+from cryptids import settings as get
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def delay(num_frames: int) -> Generator:
+    """Wait a number of frames, e.g. `yield from delay(6)`."""
+    for _ in range(int(num_frames)):
+        yield
+
+
+def wait_for(future) -> Generator:
+    """
+    Wait for a future, e.g. `result = yield from wait_for(future)`.
+
+    Works with concurrent.futures and asyncio futures alike, the frame goes on
+    animating until the work finishes, and its result (or exception) is
+    returned (or raised) in the task.
+    """
+    while not future.done():
+        yield True
+    return future.result()
+
+
+class Task(object):
+    """A generator task and what to do when it finishes."""
+
+    def __init__(self, generator: Generator, name: str, modal: bool, animated: bool, on_done: Callable = None):
+        self.generator = generator
+        self.name = name
+        self.modal = modal
+        self.animated = animated
+        self.on_done = on_done
+        self.started = False
+
+    def step(self, inputs) -> bool:
+        """Run the task for a frame, returning False once it has finished."""
+        try:
+            if not self.started:
+                # run the setup up to the first yield
+                self.started = True
+                next(self.generator)
+            animated = self.generator.send(inputs)
+            if animated is not None:
+                self.animated = animated
+        except StopIteration as stop:
+            logger.debug(f"Task {self.name} finished.")
+            if self.on_done is not None:
+                self.on_done(stop.value)
+            return False
+        return True
+
+
+class TaskRunner(object):
+    """
+    Advance tasks once per frame.
+
+    Methods
+    -------
+        start(generator, name, modal, animated, on_done)
+            Start a task on the next frame.
+
+        step(inputs)
+            Advance every running task by a frame.
+
+        cancel()
+            Stop every task.
+    """
+
+    def __init__(self):
+        self._tasks = []
+        self._modal = deque()
+        self._started = []
+        self.steps = 0
+
+    @property
+    def modal(self) -> bool:
+        """Whether a modal task is running, so the screen gets no input."""
+        return bool(self._modal)
+
+    @property
+    def animating(self) -> bool:
+        """Whether a running task changes the screen without input."""
+        return any(task.animated for task in self._tasks + list(self._modal) + self._started)
+
+    @property
+    def busy(self) -> bool:
+        """Whether any task is running."""
+        return bool(self._tasks or self._modal or self._started)
+
+    def is_running(self, name: str) -> bool:
+        """Whether a task of this name is running or queued."""
+        return any(task.name == name for task in self._tasks + list(self._modal) + self._started)
+
+    def start(self, generator: Generator, name: str = "task", modal: bool = False, animated: bool = True, on_done: Callable = None) -> Task:
+        """
+        Start a task, first advanced on the next frame.
+
+        Parameters
+        ----------
+        generator : Generator
+            The task.
+        name : str, optional
+            The name of the task, for logging. The default is "task".
+        modal : bool, optional
+            Whether the screen underneath gets no input whilst the task runs.
+            The default is False.
+        animated : bool, optional
+            Whether the task changes the screen without input, False if it
+            only waits for input (so the frame rate may idle). The default
+            is True.
+        on_done : Callable, optional
+            Called with the return value of the task when it finishes.
+
+        Returns
+        -------
+        task : Task
+            The started task.
+
+        """
+        logger.debug(f"Starting task {name}.")
+        task = Task(generator, name, modal, animated, on_done)
+        self._started.append(task)
+        return task
+
+    def step(self, inputs) -> None:
+        """Advance the running tasks, and the first modal task, by a frame."""
+        self._tasks = [task for task in self._tasks if task.step(inputs)]
+        if self._modal and not self._modal[0].step(inputs):
+            self._modal.popleft()
+        self.steps += 1
+
+        # tasks started this frame run from the next one
+        for task in self._started:
+            if task.modal:
+                self._modal.append(task)
+            else:
+                self._tasks.append(task)
+        self._started = []
+
+    def cancel(self) -> None:
+        """Stop every task without calling on_done."""
+        for task in self._tasks + list(self._modal) + self._started:
+            task.generator.close()
+        self._tasks = []
+        self._modal.clear()
+        self._started = []
@@ -0,0 +1,165 @@
+"""
+Timed sequences.
+
+A Timeline plays named steps of fixed durations, such as the title, credit
+and logo of the intro, by elapsed time rather than by counting frames, so a
+slow frame does not stretch the sequence. The elapsed time is consumed in
+fixed timesteps, which decide the current step, and the time left over is used
+to interpolate between them, e.g. for fades:
+
+    intro = Timeline([("title", 0.5), ("credit", 0.5)])
+    match intro.update():
+        case "title":
+            draw_title(alpha=intro.fade(0.1))
+        case None:
+            ...  # finished
+
+The clock is injectable, so the sequences can be driven by a virtual clock.
+"""
+import logging
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from cryptids import settings as get
+from cryptids import utils
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+# slack in comparing times built from whole timesteps with step durations
+EPSILON = 1e-9
+
+
+class Timeline(object):
+    """
+    Play a sequence of named steps by elapsed time.
+
+    Parameters
+    ----------
+        steps : List[Tuple[str, float]],
+            The name and duration in seconds of each step, in order.
+        timestep : float,
+            The fixed timestep in seconds the elapsed time is consumed in.
+        clock : Callable,
+            Returns the time in seconds, monotonic.
+
+    Methods
+    -------
+        update()
+            Advance by the time elapsed since the last update.
+
+        fade(duration)
+            Get the opacity (0-1) of the current step, fading in and out.
+
+        skip()
+            Jump to the end of the sequence.
+
+        reset()
+            Play the sequence again from the start.
+    """
+
+    def __init__(self,
+                 steps: List[Tuple[str, float]],
+                 timestep: float = get.TIMELINE_TIMESTEP,
+                 clock: Callable = time.monotonic):
+        utils.check_type(steps, "steps", list)
+        utils.check_type(timestep, "timestep", float)
+        self.steps = steps
+        self.timestep = timestep
+        self.clock = clock
+        self.duration = sum(duration for _, duration in steps)
+        self.reset()
+
+    def reset(self) -> None:
+        """Play the sequence again from the start, on the next update."""
+        self.ticks = 0
+        self._accumulator = 0.0
+        self._last = None
+        self._step = None
+
+    @property
+    def time(self) -> float:
+        """The time played in whole timesteps."""
+        return self.ticks * self.timestep
+
+    @property
+    def finished(self) -> bool:
+        """Whether the whole sequence has played."""
+        return self.time >= self.duration - EPSILON
+
+    @property
+    def current(self) -> str:
+        """The name of the current step, None once finished."""
+        return self._locate(self.time)[0]
+
+    def update(self) -> str:
+        """
+        Advance by the time elapsed since the last update.
+
+        The clock starts on the first update.
+
+        Returns
+        -------
+        step : str
+            The name of the current step, None once finished.
+
+        """
+        now = self.clock()
+        if self._last is None:
+            self._last = now
+        self._accumulator += now - self._last
+        self._last = now
+        # consume the elapsed time in fixed timesteps
+        steps = int(self._accumulator / self.timestep)
+        if steps:
+            self.ticks += steps
+            self._accumulator -= steps * self.timestep
+        step = self.current
+        if step != self._step:
+            logger.debug(f"Timeline moved to step {step}.")
+            self._step = step
+        return step
+
+    def fade(self, duration: float) -> float:
+        """
+        Get the opacity of the current step, fading in at its start and out at its end.
+
+        Parameters
+        ----------
+        duration : float
+            Seconds of each fade.
+
+        Returns
+        -------
+        opacity : float
+            From 0 (hidden) to 1 (opaque), interpolated between timesteps.
+
+        """
+        if self.finished or duration <= 0:
+            return 1.0
+        name, start, step_duration = self._locate(self.time)
+        # interpolate the time within the step between fixed timesteps
+        t = min(self.time + self._accumulator, start + step_duration) - start
+        return max(0.0, min(1.0, t / duration, (step_duration - t) / duration))
+
+    def skip(self) -> None:
+        """Jump to the end of the sequence."""
+        logger.debug("Timeline skipped.")
+        self.ticks = int(-(-self.duration // self.timestep))
+        self._accumulator = 0.0
+
+    def _locate(self, t: float) -> tuple:
+        """Get the (name, start, duration) of the step at a time, (None, duration, 0) once finished."""
+        start = 0.0
+        for name, duration in self.steps:
+            if t < start + duration - EPSILON:
+                return name, start, duration
+            start += duration
+        return None, start, 0.0
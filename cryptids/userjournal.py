@@ -0,0 +1,465 @@
+"""
+Journaled user store.
+
+Instead of rewriting the whole user file on each change, each transaction is
+appended to a journal as one line, listing the changes it made in order:
+
+    1c2d3e4f {"seq":12,"ops":[["set","default",3,"records","wins",null,false]]}
+
+The line starts with the CRC-32 of its JSON, so a line cut short by a crash
+is recognised. An append that fails is cut off again before the error is
+raised, so no later record is lost behind it. The latest state of every user
+is held in memory, with an index of the emails, so reads are served from
+memory and a write costs one append however many users there are.
+
+Once the journal grows past settings.USER_JOURNAL_COMPACT_BYTES a background
+thread folds it into a snapshot of all the users. The journal is first moved
+aside (the writes go on to a new journal), then the snapshot is written
+atomically and the old journal removed. Starting up is recovery: the latest
+snapshot is read and the journals replayed over it, skipping the changes the
+snapshot already holds and stopping at a damaged line, which is cut off.
+
+Pick it with settings.USER_STORE_BACKEND = "journal". If there is neither a
+snapshot nor a journal yet, the users of the JSON user file are taken as the
+first snapshot.
+"""
+import contextlib
+import copy
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+
+from cryptids import settings as get
+from cryptids import usermanagement
+from cryptids import userstore
+from cryptids.utils import check_type
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def encode_record(record: dict) -> bytes:
+    """Get the journal line of a record: the CRC-32 of its JSON, then the JSON."""
+    payload = json.dumps(record, separators=(",", ":")).encode()
+    return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+
+def decode_record(line: bytes):
+    """Get the record of a journal line, None if the line is damaged."""
+    if not line.endswith(b"\n") or len(line) < 10:
+        return None
+    crc, payload = line[:8], line[9:-1]
+    try:
+        if int(crc, 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def apply_ops(users: dict, ops: list) -> None:
+    """Replay the changes of a record onto the users, in place."""
+    for op in ops:
+        match op:
+            case ["set", username, new_value, depth1, depth2, depth3, force_new_user]:
+                if force_new_user:
+                    users[username] = {}
+                if username not in users:
+                    logger.warning(f"Journal sets {depth1} of unknown user '{username}', skipped.")
+                    continue
+                usermanagement.apply_setting(users[username], new_value, depth1, depth2, depth3)
+            case ["delete", username]:
+                users.pop(username, None)
+            case _:
+                raise ValueError(f"Unrecognised journal change: {op}")
+
+
+class JournalUserStore(object):
+    """
+    The users held in memory, each change appended to a journal.
+
+    Parameters
+    ----------
+        journal_path : str,
+            The journal, made on first use. Journals moved aside for
+            compaction get the sequence number of their last change appended.
+        snapshot_path : str,
+            The snapshot the journal is folded into.
+        seed_path : str,
+            A JSON user file taken as the first snapshot, if there is none.
+        compact_bytes : int,
+            The size of journal that starts a compaction.
+        fsync : bool,
+            Sync each append to disk before the transaction returns.
+
+    Methods
+    -------
+        get_user(username)
+            Get the dictionary of a user.
+
+        check_user_exists(username), check_email_exists(email)
+            Check for a username or an email, in memory.
+
+        transaction()
+            Collect changes to the users, appended together.
+
+        load_all_users()
+            Get every user.
+
+        compact()
+            Fold the journal into the snapshot now.
+
+        close()
+            Stop the compaction thread and close the journal.
+
+        stats()
+            Get the journal size and the append, compaction and recovery counters.
+    """
+
+    def __init__(self,
+                 journal_path: str = get.USER_JOURNAL_PATH,
+                 snapshot_path: str = get.USER_JOURNAL_SNAPSHOT_PATH,
+                 seed_path: str = None,
+                 compact_bytes: int = get.USER_JOURNAL_COMPACT_BYTES,
+                 fsync: bool = get.USER_JOURNAL_FSYNC):
+        check_type(journal_path, "journal_path", str)
+        check_type(snapshot_path, "snapshot_path", str)
+        check_type(compact_bytes, "compact_bytes", int)
+        check_type(fsync, "fsync", bool)
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.seed_path = seed_path
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        # the latest state of every user, and the user of every email
+        self._users = None
+        self._emails = {}
+        self._journal = None
+        self._journal_bytes = 0
+        self._seq = 0
+        # transactions are serialised, and joined by nested calls on the same thread
+        self._lock = threading.RLock()
+        # the readers don't wait for transactions, only for the held users being updated
+        self._view_lock = threading.Lock()
+        # the error of an append that could not be undone, no more are taken
+        self._failed = None
+        self._local = threading.local()
+        self._wake = threading.Condition(threading.Lock())
+        self._compact_lock = threading.Lock()
+        self._compact_wanted = False
+        self._closed = False
+        self._thread = None
+        self.appends = 0
+        self.compactions = 0
+        self.recovered = 0
+        self.truncated_bytes = 0
+
+    def _open(self) -> None:
+        """Recover the users from the snapshot and the journals, on first use."""
+        if self._users is not None:
+            return
+        start = time.perf_counter()
+        folder = os.path.dirname(self.journal_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        # the latest snapshot
+        users, seq = {}, 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            users, seq = snapshot["users"], snapshot["seq"]
+        elif not os.path.exists(self.journal_path) and self.seed_path is not None and os.path.exists(self.seed_path):
+            with open(self.seed_path, "r") as f:
+                users = json.load(f)
+            userstore.write_atomic(self.snapshot_path, {"seq": 0, "users": users})
+            logger.info(f"Took the {len(users)} users of {self.seed_path} as the first snapshot.")
+        snapshot_seq = seq
+
+        # then the journals moved aside but not yet folded, oldest first, then the journal
+        for path in self._rotated() + [self.journal_path]:
+            if os.path.exists(path):
+                seq = self._replay(path, users, seq, snapshot_seq)
+        self._users = users
+        self._emails = {user.get("email"): username for username, user in users.items()}
+        self._seq = seq
+        # unbuffered, so a failed append leaves nothing behind to be written later
+        self._journal = open(self.journal_path, "ab", buffering=0)
+        self._journal_bytes = self._journal.tell()
+        self._closed = False
+        self._failed = None
+        logger.info(f"Recovered {len(users)} users, {self.recovered} changes replayed, in {time.perf_counter() - start:.3f} s.")
+        # fold what an interrupted compaction left
+        if self._rotated():
+            self._request_compaction()
+
+    def _rotated(self) -> list:
+        """Get the journals moved aside for compaction, oldest first."""
+        paths = glob.glob(glob.escape(self.journal_path) + ".*")
+        return sorted((path for path in paths if path.rsplit(".", 1)[1].isdigit()), key=lambda path: int(path.rsplit(".", 1)[1]))
+
+    def _replay(self, path: str, users: dict, seq: int, snapshot_seq: int) -> int:
+        """Replay a journal onto the users, cutting off a damaged end. Returns the last sequence number."""
+        good = 0
+        with open(path, "rb") as f:
+            for line in f:
+                record = decode_record(line)
+                if record is None:
+                    break
+                good += len(line)
+                # the snapshot already holds the earlier changes
+                if record["seq"] > snapshot_seq:
+                    apply_ops(users, record["ops"])
+                    seq = record["seq"]
+                    self.recovered += 1
+        size = os.path.getsize(path)
+        if good < size:
+            logger.warning(f"Cut {size - good} damaged bytes off the end of {path}.")
+            self.truncated_bytes += size - good
+            with open(path, "r+b") as f:
+                f.truncate(good)
+        return seq
+
+    def _transaction(self):
+        """Get the transaction open on this thread, if any."""
+        return getattr(self._local, "transaction", None)
+
+    def _held(self) -> dict:
+        """Get the held users, recovering them on first use."""
+        if self._users is None:
+            with self._lock:
+                self._open()
+        return self._users
+
+    def _read_user(self, username: str):
+        """Get a copy of a user to change, None if there is no such user."""
+        user = self._users.get(username)
+        return copy.deepcopy(user) if user is not None else None
+
+    def get_user(self, username: str):
+        """Get the dictionary of a user, as changed by the open transaction if any."""
+        tx = self._transaction()
+        if tx is not None:
+            return tx.get_user(username)
+        users = self._held()
+        with self._view_lock:
+            return users.get(username)
+
+    def check_user_exists(self, username: str) -> bool:
+        """Check whether a user already exists."""
+        tx = self._transaction()
+        if tx is not None and username in tx.users:
+            return tx.users[username] is not None
+        users = self._held()
+        with self._view_lock:
+            return username in users
+
+    def check_email_exists(self, email: str) -> bool:
+        """Check whether an email is already registered."""
+        self._held()
+        with self._view_lock:
+            owner = self._emails.get(email)
+        tx = self._transaction()
+        if tx is not None:
+            return tx.email_exists(email, owner)
+        return owner is not None
+
+    def load_all_users(self) -> dict:
+        """Get every user, by username. Do not change it."""
+        tx = self._transaction()
+        users = self._held()
+        with self._view_lock:
+            users = dict(users)
+        if tx is not None:
+            for username, user in tx.users.items():
+                if user is None:
+                    users.pop(username, None)
+                else:
+                    users[username] = user
+        return users
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Collect changes to the users, appended to the journal as one record when it closes.
+
+        A transaction opened whilst another is open on this thread joins it.
+        If the block raises, nothing is written.
+
+        Yields
+        ------
+            tx : usermanagement.OverlayTransaction
+                Apply the changes with tx.set_setting and tx.delete_user.
+
+        """
+        tx = self._transaction()
+        if tx is not None:
+            yield tx
+            return
+        with self._lock:
+            self._open()
+            if self._failed is not None:
+                raise OSError(f"Journal {self.journal_path} could not be repaired after a failed append, reopen it to recover.") from self._failed
+            tx = usermanagement.OverlayTransaction(self._read_user)
+            self._local.transaction = tx
+            try:
+                yield tx
+            finally:
+                self._local.transaction = None
+            if tx.changes:
+                self._check_emails(tx)
+                self._append(tx)
+
+    def _check_emails(self, tx: usermanagement.OverlayTransaction) -> None:
+        """Refuse a transaction that leaves an email registered to two users."""
+        seen = {}
+        for username, user in tx.users.items():
+            email = user.get("email") if user is not None else None
+            if email is None:
+                continue
+            owner = seen.get(email, self._emails.get(email))
+            # the owner may have been changed or deleted in the same transaction
+            if owner is not None and owner != username and (owner in seen or owner not in tx.users or
+                                                            (tx.users[owner] or {}).get("email") == email):
+                raise ValueError(f"Email {email} is already registered to '{owner}'.")
+            seen[email] = username
+
+    def _append(self, tx: usermanagement.OverlayTransaction) -> None:
+        """Append the changes of a transaction to the journal, then show them."""
+        line = encode_record({"seq": self._seq + 1, "ops": tx.ops})
+        try:
+            # a raw write may write only part of the line
+            view = memoryview(line)
+            while view:
+                view = view[self._journal.write(view):]
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+        except BaseException as error:
+            self._undo_append(error)
+            raise
+        self._seq += 1
+        self._journal_bytes += len(line)
+        self.appends += 1
+        # the changed users replace the held ones, the user dictionaries are never changed in place
+        with self._view_lock:
+            for username, user in tx.users.items():
+                old = self._users.get(username)
+                if old is not None and self._emails.get(old.get("email")) == username:
+                    del self._emails[old.get("email")]
+                if user is None:
+                    self._users.pop(username, None)
+                else:
+                    self._users[username] = user
+                    self._emails[user.get("email")] = username
+        if self._journal_bytes >= self.compact_bytes:
+            self._request_compaction()
+
+    def _undo_append(self, error: BaseException) -> None:
+        """Cut a failed append off the journal, so the records appended after it are recovered."""
+        try:
+            # synced along with the next append
+            self._journal.truncate(self._journal_bytes)
+            logger.error(f"Could not append to {self.journal_path}, the change was dropped: {error}")
+        except OSError as truncate_error:
+            # a damaged line would hide every later record from recovery, take no more
+            self._failed = error
+            logger.critical(f"Could not cut the failed append off {self.journal_path}, no more changes are taken: {truncate_error}")
+
+    def _request_compaction(self) -> None:
+        """Wake the compaction thread, starting it on first use."""
+        with self._wake:
+            self._compact_wanted = True
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="user-journal-compact", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def _run(self) -> None:
+        """Compact whenever asked to, until closed."""
+        while True:
+            with self._wake:
+                while not self._compact_wanted and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+                self._compact_wanted = False
+            try:
+                self.compact()
+            except OSError as error:
+                logger.error(f"Could not compact {self.journal_path}: {error}")
+
+    def compact(self) -> bool:
+        """
+        Fold the journal into the snapshot.
+
+        Only moving the journal aside holds up the writes. The snapshot is
+        written whilst they go on to a new journal.
+
+        Returns
+        -------
+        compacted : bool
+            Whether there was anything to fold.
+
+        """
+        with self._compact_lock:
+            with self._lock:
+                self._open()
+                if self._journal_bytes == 0 and not self._rotated():
+                    return False
+                start = time.perf_counter()
+                # the held users are never changed in place, a shallow copy is a snapshot
+                users = dict(self._users)
+                seq = self._seq
+                if self._journal_bytes:
+                    self._journal.close()
+                    os.replace(self.journal_path, f"{self.journal_path}.{seq}")
+                    self._journal = open(self.journal_path, "ab", buffering=0)
+                    self._journal_bytes = 0
+            userstore.write_atomic(self.snapshot_path, {"seq": seq, "users": users})
+            # the snapshot holds every change of the journals moved aside
+            for path in self._rotated():
+                if int(path.rsplit(".", 1)[1]) <= seq:
+                    os.remove(path)
+            self.compactions += 1
+        logger.debug(f"Compacted {len(users)} users up to change {seq} in {time.perf_counter() - start:.3f} s.")
+        return True
+
+    def close(self) -> None:
+        """Stop the compaction thread and close the journal."""
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._users = None
+            self._emails = {}
+
+    def stats(self) -> dict:
+        """Get the journal size and the append, compaction and recovery counters."""
+        return {"users": len(self._users) if self._users is not None else None,
+                "seq": self._seq,
+                "journal_bytes": self._journal_bytes,
+                "appends": self.appends,
+                "compactions": self.compactions,
+                "recovered": self.recovered,
+                "truncated_bytes": self.truncated_bytes}
+
+
+# the process wide store, recovered on first use
+user_journal = JournalUserStore(get.USER_JOURNAL_PATH, get.USER_JOURNAL_SNAPSHOT_PATH, seed_path=usermanagement.FILEPATH)
@@ -1,10 +1,39 @@
-"""Manage all the user stored settings."""
-import json
+"""
+Manage all the user stored settings.
+
+The users are read from the process wide cache of the user file, see
+cryptids.userstore. Changes are made in transactions: any number of changes
+are applied to a copy of the users, which is committed to the cache at once
+and written behind in one atomic write.
+
+    with transaction() as tx:
+        tx.set_setting(username, email, "email", force_new_user=True)
+        tx.set_setting(username, password, "password")
+
+Functions called whilst a transaction is open on the thread, such as
+set_setting or check_user_exists, join it, so they see its changes and are
+committed with it. Nothing is committed if the transaction raises.
+
+settings.USER_STORE_BACKEND picks where the users are kept. The JSON file is
+the default, "sqlite" keeps them in an SQLite database, see
+cryptids.usersqlite, and "journal" in memory with each change appended to a
+journal, see cryptids.userjournal. The backends provide get_user, check_user_exists,
+check_email_exists, load_all_users and transaction, the rest of this module
+is built on those.
+
+Passwords are stored hashed, see cryptids.credentials. Passwords stored in
+plaintext before then are hashed in place the next time their user logs in.
+"""
+import contextlib
+import copy
 import logging
 import os
 import sys
+import threading
 
 from cryptids.utils import check_type, clean_string
+from cryptids import credentials
+from cryptids import userstore
 import cryptids.settings as get
 
 FILEPATH = os.path.join(os.getcwd(), "users", "user_details.json")
@@ -18,11 +47,254 @@ if get.VERBOSE:
     logger.addHandler(handler)
 
 
+# transactions are serialised, and joined by nested calls on the same thread
+_lock = threading.RLock()
+_local = threading.local()
+
+
+def _backend():
+    """Get the store of the users in settings.USER_STORE_BACKEND, None for the JSON file."""
+    match get.USER_STORE_BACKEND:
+        case "json":
+            return None
+        case "sqlite":
+            from cryptids.usersqlite import user_db
+            return user_db
+        case "journal":
+            from cryptids.userjournal import user_journal
+            return user_journal
+        case _:
+            raise ValueError(f"Unrecognised USER_STORE_BACKEND: {get.USER_STORE_BACKEND}")
+
+
+def apply_setting(user: dict,
+                  new_value,
+                  setting_depth1: str,
+                  setting_depth2: str = None,
+                  setting_depth3: str = None) -> None:
+    """Replace a setting of a user's dictionary, in place."""
+    if setting_depth2 is None:
+        user[setting_depth1] = new_value
+    elif setting_depth3 is None:
+        user[setting_depth1][setting_depth2] = new_value
+    else:
+        user[setting_depth1][setting_depth2][setting_depth3] = new_value
+
+
 def load_all_users():
-    """Load all the user data."""
-    with open(FILEPATH, "r") as f:
-        data = json.load(f)
-    return data
+    """Load all the user data, as changed by the open transaction if any."""
+    backend = _backend()
+    if backend is not None:
+        return backend.load_all_users()
+    tx = getattr(_local, "transaction", None)
+    if tx is not None:
+        return tx.data
+    return userstore.get_store(FILEPATH).read()
+
+
+class Transaction(object):
+    """
+    Changes to the user data made in memory, committed when the transaction closes.
+
+    The users are copied the first time they are changed, so the users read
+    from the cache are never changed in place.
+
+    Parameters
+    ----------
+        data : dict,
+            All the user data, as read from the cache.
+
+    Methods
+    -------
+        set_setting(username, new_value, setting_depth1, setting_depth2, setting_depth3, force_new_user)
+            Change a setting of a user.
+
+        delete_user(username)
+            Remove a user.
+    """
+
+    def __init__(self, data: dict):
+        check_type(data, "data", dict)
+        self.data = dict(data)
+        self.changes = 0
+        # the users changed, added or removed
+        self.usernames = set()
+
+    def _user(self, username: str) -> dict:
+        """Get a user to change, copying it the first time."""
+        if username not in self.usernames:
+            self.data[username] = copy.deepcopy(self.data[username])
+            self.usernames.add(username)
+        return self.data[username]
+
+    def set_setting(self,
+                    username: str,
+                    new_value,
+                    setting_depth1: str,
+                    setting_depth2: str = None,
+                    setting_depth3: str = None,
+                    force_new_user: bool = False) -> None:
+        """Change a setting of a user, see set_setting."""
+        # checks
+        check_type(username, "usename", str)
+        check_type(setting_depth1, "setting_depth1", str)
+        if setting_depth2 is not None:
+            check_type(setting_depth2, "setting_depth2", str)
+
+        # check if the user exists
+        stripped_username = clean_string(username)
+        if not force_new_user:
+            if stripped_username not in self.data.keys():
+                logger.error(f"user '{stripped_username}' not in list.")
+                raise ValueError(f"Unrecognised username: {stripped_username}")
+
+        # if this is a new user, need to initialize the dictionary
+        if force_new_user:
+            self.data[stripped_username] = {}
+            self.usernames.add(stripped_username)
+
+        # replace the settings
+        apply_setting(self._user(stripped_username), new_value, setting_depth1, setting_depth2, setting_depth3)
+        self.changes += 1
+
+    def delete_user(self, username: str) -> None:
+        """Remove a user, see delete_user."""
+        # checks
+        check_type(username, "usename", str)
+
+        # check the user exists
+        if username not in self.data.keys():
+            logger.error(f"user '{username}' not in list.")
+            raise ValueError(f"Unrecognised username: {username}")
+
+        # remove the user
+        self.data.pop(username, None)
+        self.usernames.add(username)
+        self.changes += 1
+
+
+class OverlayTransaction(object):
+    """
+    Changes to some users collected in memory, for the backends that store users one by one.
+
+    The users changed are read through the backend, changed here and handed
+    back to it when the transaction closes, along with the list of changes
+    made, in order.
+
+    Parameters
+    ----------
+        read_user : Callable,
+            Gets a copy of a user from the backend, None if there is no such user.
+
+    Methods
+    -------
+        get_user(username)
+            Get a user as changed in the transaction.
+
+        set_setting(username, new_value, setting_depth1, setting_depth2, setting_depth3, force_new_user)
+            Change a setting of a user.
+
+        delete_user(username)
+            Remove a user.
+
+        email_exists(email, owner)
+            Check for an email, as changed in the transaction.
+    """
+
+    def __init__(self, read_user):
+        self.read_user = read_user
+        # the users changed in the transaction, None once deleted
+        self.users = {}
+        # the changes made, as ["set", username, new_value, depth1, depth2, depth3, force_new_user] or ["delete", username]
+        self.ops = []
+        self.changes = 0
+
+    def get_user(self, username: str):
+        """Get a user as changed in the transaction, None if there is no such user."""
+        if username in self.users:
+            return self.users[username]
+        return self.read_user(username)
+
+    def set_setting(self,
+                    username: str,
+                    new_value,
+                    setting_depth1: str,
+                    setting_depth2: str = None,
+                    setting_depth3: str = None,
+                    force_new_user: bool = False) -> None:
+        """Change a setting of a user, see set_setting."""
+        # checks
+        check_type(username, "usename", str)
+        check_type(setting_depth1, "setting_depth1", str)
+        if setting_depth2 is not None:
+            check_type(setting_depth2, "setting_depth2", str)
+
+        # check if the user exists, if this is a new user it starts empty
+        stripped_username = clean_string(username)
+        user = {} if force_new_user else self.get_user(stripped_username)
+        if user is None:
+            logger.error(f"user '{stripped_username}' not in list.")
+            raise ValueError(f"Unrecognised username: {stripped_username}")
+
+        # replace the settings, the user read from the backend is a copy already
+        apply_setting(user, new_value, setting_depth1, setting_depth2, setting_depth3)
+        self.users[stripped_username] = user
+        self.ops.append(["set", stripped_username, new_value, setting_depth1, setting_depth2, setting_depth3, force_new_user])
+        self.changes += 1
+
+    def delete_user(self, username: str) -> None:
+        """Remove a user, see delete_user."""
+        check_type(username, "usename", str)
+        if self.get_user(username) is None:
+            logger.error(f"user '{username}' not in list.")
+            raise ValueError(f"Unrecognised username: {username}")
+        self.users[username] = None
+        self.ops.append(["delete", username])
+        self.changes += 1
+
+    def email_exists(self, email: str, owner: str) -> bool:
+        """Check for an email, given the user the backend has it registered to, None if none."""
+        if any(user is not None and user.get("email") == email for user in self.users.values()):
+            return True
+        # unless the transaction has changed that user
+        return owner is not None and owner not in self.users
+
+
+@contextlib.contextmanager
+def transaction():
+    """
+    Open a transaction on the user data, joining the open one on this thread.
+
+    The users are read from the cache when the outermost transaction opens,
+    and committed to it when it closes if anything changed, to be written
+    behind. If the block raises, nothing is committed.
+
+    Yields
+    ------
+        tx : Transaction
+            Apply the changes with tx.set_setting and tx.delete_user.
+
+    """
+    backend = _backend()
+    if backend is not None:
+        with backend.transaction() as tx:
+            yield tx
+        return
+    with _lock:
+        tx = getattr(_local, "transaction", None)
+        if tx is not None:
+            yield tx
+            return
+        store = userstore.get_store(FILEPATH)
+        tx = Transaction(store.read())
+        _local.transaction = tx
+        try:
+            yield tx
+        finally:
+            _local.transaction = None
+        if tx.changes:
+            logger.debug(f"Committing {tx.changes} changes to {len(tx.usernames)} users.")
+            store.commit(tx.data, tx.usernames)
 
 
 def load_user(username: str = "default", password: str = "Password123!"):
@@ -56,26 +328,49 @@ def load_user(username: str = "default", password: str = "Password123!"):
     stripped_password = clean_string(password)
 
     # log
-    logger.info(f"checking user: '{stripped_username}' and password: '{stripped_password}'.")
+    logger.info(f"checking user: '{stripped_username}'.")
 
-    # load all the users
-    all_users = load_all_users()
+    # load the user
+    user = get_user(stripped_username)
 
     # check if the user exists
-    if username not in all_users.keys():
+    if user is None:
         logger.error(f"user '{stripped_username}' not in list.")
         return (1, "Unrecognised username")
 
-    # if not, then load user
-    user = all_users[stripped_username]
-
-    # check the credentials
-    if user["password"] != stripped_password:
+    # check the credentials, hashed on the credential workers
+    matches, rehash = credentials.credential_pool.verify(stripped_password, user["password"]).result()
+    if not matches:
         return (2, "Incorrect password")
 
+    # replace a plaintext password, or a hash below the current cost
+    if rehash:
+        user = upgrade_password(stripped_username, stripped_password, user["password"])
+
     return (0, user)
 
 
+def upgrade_password(username: str, password: str, old_password: str) -> dict:
+    """
+    Store a new hash of a user's password, in place of a plaintext one or an outdated hash.
+
+    The password is left alone if it was changed whilst hashing.
+
+    Returns
+    -------
+        user : dict,
+            The dictionary of the user.
+
+    """
+    new_password = credentials.credential_pool.hash(password).result()
+    with transaction() as tx:
+        user = get_user(username)
+        if user is not None and user["password"] == old_password:
+            tx.set_setting(username, new_password, "password")
+            logger.info(f"upgraded the password of user '{username}'.")
+    return get_user(username)
+
+
 def get_setting(user: dict,
                 setting_depth1: str,
                 setting_depth2: str = None,
@@ -130,48 +425,33 @@ def set_setting(username: str,
                 setting_depth2: str = None,
                 setting_depth3: str = None,
                 force_new_user: bool = False):
-    """Setter for user setting."""
-    # checks
-    check_type(username, "usename", str)
-    check_type(setting_depth1, "setting_depth1", str)
-    if setting_depth2 is not None:
-        check_type(setting_depth2, "setting_depth2", str)
-
-    # get all the information
-    data = load_all_users()
-
-    # check if the user exists
-    stripped_username = clean_string(username)
-    if not force_new_user:
-        if stripped_username not in data.keys():
-            logger.error(f"user '{stripped_username}' not in list.")
-            raise ValueError(f"Unrecognised username: {stripped_username}")
-
-    # if this is a new user, need to initialize the dictionary
-    if force_new_user:
-        data[stripped_username] = {}
+    """Setter for user setting, written at once unless a transaction is open."""
+    with transaction() as tx:
+        tx.set_setting(username, new_value, setting_depth1, setting_depth2, setting_depth3, force_new_user)
 
-    # replace the settings
-    if setting_depth2 is None:
-        data[stripped_username][setting_depth1] = new_value
-    elif setting_depth3 is None:
-        data[stripped_username][setting_depth1][setting_depth2] = new_value
-    else:
-        data[stripped_username][setting_depth1][setting_depth2][setting_depth3] = new_value
 
-    # Save the modified data back to the JSON file
-    with open(FILEPATH, "w") as f:
-        json.dump(data, f)
+def get_user(username: str):
+    """Get the dictionary of a user, None if there is no such user."""
+    backend = _backend()
+    if backend is not None:
+        return backend.get_user(username)
+    return load_all_users().get(username)
 
 
 def check_user_exists(username):
     """Check whether a user already exists."""
+    backend = _backend()
+    if backend is not None:
+        return backend.check_user_exists(username)
     users = load_all_users()
     return username in users.keys()
 
 
 def check_email_exists(email):
     """Check whether a user already exists."""
+    backend = _backend()
+    if backend is not None:
+        return backend.check_email_exists(email)
     users = load_all_users()
     for user in users.keys():
         if email == users[user]["email"]:
@@ -179,43 +459,74 @@ def check_email_exists(email):
     return False
 
 
-def make_new_user(username, password, email):
-    """Make a new user."""
-    if not check_user_exists(username):
-        # make user
-        set_setting(username, email, "email", force_new_user=True)
-        set_setting(username, password, "password")
-        set_setting(username, {}, "settings")
-        set_setting(username, "[-1]", "settings", "nfts")
-        set_setting(username, {}, "settings", "loadouts")
-        set_setting(username, str([x + 1 for x in range(get.DECK_SIZE)]), "settings", "loadouts", "default")
-        set_setting(username, {}, "records")
-        set_setting(username, 0, "records", "wins")
-        set_setting(username, 0, "records", "losses")
-        return (0, "user created")
-    else:
-        return (1, "user already exists")
+def hash_password(password: str) -> str:
+    """Hash a password for storing, on the credential workers. Logging in cleans the password too."""
+    return credentials.credential_pool.hash(clean_string(password)).result()
 
 
-def delete_user(username):
-    """Delete a user from the data base."""
-    # checks
-    check_type(username, "usename", str)
+def make_new_user(username, password, email, password_hash: str = None):
+    """
+    Make a new user.
 
-    # get all the information
-    data = load_all_users()
+    The password is hashed first, which takes a while, unless its hash is
+    given. Called in an open transaction, hash it beforehand with
+    hash_password, so the users are not held whilst hashing.
+    """
+    if check_user_exists(username):
+        return (1, "user already exists")
+    if password_hash is None:
+        password_hash = hash_password(password)
+    # the checks and all the settings are one read and one write
+    with transaction() as tx:
+        if check_user_exists(username):
+            return (1, "user already exists")
+        # make user
+        tx.set_setting(username, email, "email", force_new_user=True)
+        tx.set_setting(username, password_hash, "password")
+        tx.set_setting(username, {}, "settings")
+        tx.set_setting(username, "[-1]", "settings", "nfts")
+        tx.set_setting(username, {}, "settings", "loadouts")
+        tx.set_setting(username, str([x + 1 for x in range(get.DECK_SIZE)]), "settings", "loadouts", "default")
+        tx.set_setting(username, {}, "records")
+        tx.set_setting(username, 0, "records", "wins")
+        tx.set_setting(username, 0, "records", "losses")
+    return (0, "user created")
+
+
+def register_user(email: str, username: str, password: str):
+    """
+    Check a registration and make the new user.
+
+    The email and username must be free and the password at least 8 letters
+    long. The password is hashed between the checks and the transaction making
+    the user, which checks again, so the users are not held whilst hashing.
+
+    Returns
+    -------
+        (email_check, username_check, password_check, status_code) : Tuple[bool, bool, bool, int],
+            Whether each check passed, and the status code of make_new_user,
+            None if the user was not made.
 
-    # check the user exists
-    if username not in data.keys():
-        logger.error(f"user '{username}' not in list.")
-        raise ValueError(f"Unrecognised username: {username}")
+    """
+    email_check = not check_email_exists(email)
+    username_check = not check_user_exists(username)
+    password_check = len(password) >= 8
+    status_code = None
+    if email_check and username_check and password_check:
+        password_hash = hash_password(password)
+        with transaction():
+            # registered by another thread whilst hashing
+            email_check = not check_email_exists(email)
+            username_check = not check_user_exists(username)
+            if email_check and username_check:
+                (status_code, status_msg) = make_new_user(username, password, email, password_hash=password_hash)
+    return email_check, username_check, password_check, status_code
 
-    # remove the user
-    data.pop(username, None)
 
-    # Save the modified data back to the JSON file
-    with open(FILEPATH, "w") as f:
-        json.dump(data, f)
+def delete_user(username):
+    """Delete a user from the data base."""
+    with transaction() as tx:
+        tx.delete_user(username)
 
 
 def update_nfts(username):
@@ -228,7 +539,21 @@ def update_nfts(username):
     # Get NFTS
     nfts_from_web3 = [0]
     # update the user
-    set_setting(username, nfts_from_web3, "settings", "nfts")
+    with transaction() as tx:
+        tx.set_setting(username, nfts_from_web3, "settings", "nfts")
+
+
+def update_records(username: str, won: bool):
+    """Count a win or a loss for a user."""
+    check_type(won, "won", bool)
+    record = "wins" if won else "losses"
+    with transaction() as tx:
+        stripped_username = clean_string(username)
+        user = get_user(stripped_username)
+        if user is None:
+            logger.error(f"user '{stripped_username}' not in list.")
+            raise ValueError(f"Unrecognised username: {stripped_username}")
+        tx.set_setting(username, user["records"][record] + 1, "records", record)
 
 
 class User(object):
@@ -241,14 +566,16 @@ class User(object):
 
     def __init__(self, username: str, user: dict):
         logger.info(f"Making User class for {username}.")
-        if not check_user_exists(username):
-            logger.fatal(f"Should not be able to make a User object for a non existent user: {username}.")
-            raise ValueError("This function should not be hit for an unknocn user.")
-        self.username = username
-
-        # force web3 update before gameplay
-        logger.info("Updating the NFTs for this user.")
-        update_nfts(username)
+        # the check and the NFT update are one read and one write
+        with transaction():
+            if not check_user_exists(username):
+                logger.fatal(f"Should not be able to make a User object for a non existent user: {username}.")
+                raise ValueError("This function should not be hit for an unknocn user.")
+            self.username = username
+
+            # force web3 update before gameplay
+            logger.info("Updating the NFTs for this user.")
+            update_nfts(username)
 
         # get settings
         self.loadouts = get_setting(user, "settings", "loadouts")
@@ -0,0 +1,272 @@
+"""
+SQLite user store.
+
+The users are kept one row each in an SQLite database, with unique indexes on
+the username and the email, so logging in, checking a username or an email
+and changing a user cost the same however many users there are. The rest of
+each user (password, settings and records) is kept as JSON in the row, in the
+same shape as in the JSON file.
+
+Pick it with settings.USER_STORE_BACKEND = "sqlite", after migrating the JSON
+file into the database from the repository root:
+
+    python -m cryptids.usersqlite users/user_details.json users/user_details.db
+
+The database runs in WAL mode, so the game's threads can read whilst one of
+them writes. Each thread has its own connection. Changes are made in
+transactions, as for the JSON file: a transaction collects the changed users
+and writes them in one SQL transaction when it closes.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Tuple
+
+from cryptids import settings as get
+from cryptids import usermanagement
+from cryptids.utils import check_type
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT,
+    user TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users (username);
+CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (email);
+"""
+
+UPSERT = """
+INSERT INTO users (username, email, user) VALUES (?, ?, ?)
+ON CONFLICT (username) DO UPDATE SET email = excluded.email, user = excluded.user
+"""
+
+
+class SQLiteUserStore(object):
+    """
+    The users kept in an SQLite database.
+
+    Parameters
+    ----------
+        path : str,
+            The database file, made on first use.
+
+    Methods
+    -------
+        get_user(username)
+            Get the dictionary of a user.
+
+        check_user_exists(username), check_email_exists(email)
+            Check for a username or an email, by index.
+
+        transaction()
+            Collect changes to the users, written together.
+
+        load_all_users()
+            Get every user, e.g. to export them.
+
+        close()
+            Close the connection of this thread.
+    """
+
+    def __init__(self, path: str = get.USER_SQLITE_PATH):
+        check_type(path, "path", str)
+        self.path = path
+        self._local = threading.local()
+        # the tables are made by the first connection
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connection(self) -> sqlite3.Connection:
+        """Get the connection of this thread, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            # transactions are begun and ended explicitly
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=get.USER_SQLITE_TIMEOUT)
+            connection.execute("PRAGMA journal_mode = WAL")
+            # in WAL mode this syncs at checkpoints, a power cut may lose the last commits but not corrupt the file
+            connection.execute("PRAGMA synchronous = NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    connection.executescript(SCHEMA)
+                    self._schema_ready = True
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self):
+        """Get the transaction open on this thread, if any."""
+        return getattr(self._local, "transaction", None)
+
+    def _write(self, tx: usermanagement.OverlayTransaction) -> None:
+        """Write the users changed by a transaction."""
+        connection = self.connection()
+        deleted = [(username,) for username, user in tx.users.items() if user is None]
+        changed = [(username, user.get("email"), json.dumps(user)) for username, user in tx.users.items() if user is not None]
+        if deleted:
+            connection.executemany("DELETE FROM users WHERE username = ?", deleted)
+        if changed:
+            connection.executemany(UPSERT, changed)
+
+    def select_user(self, username: str):
+        """Read a user from the database, None if there is no such user."""
+        row = self.connection().execute("SELECT user FROM users WHERE username = ?", (username,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_user(self, username: str):
+        """Get the dictionary of a user, as changed by the open transaction if any."""
+        tx = self._transaction()
+        if tx is not None:
+            return tx.get_user(username)
+        return self.select_user(username)
+
+    def check_user_exists(self, username: str) -> bool:
+        """Check whether a user already exists."""
+        tx = self._transaction()
+        if tx is not None and username in tx.users:
+            return tx.users[username] is not None
+        return self.connection().execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+
+    def check_email_exists(self, email: str) -> bool:
+        """Check whether an email is already registered."""
+        row = self.connection().execute("SELECT username FROM users WHERE email = ?", (email,)).fetchone()
+        owner = row[0] if row is not None else None
+        tx = self._transaction()
+        if tx is not None:
+            return tx.email_exists(email, owner)
+        return owner is not None
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Collect changes to the users, written in one SQL transaction when it closes.
+
+        A transaction opened whilst another is open on this thread joins it.
+        If the block raises, nothing is written.
+
+        Yields
+        ------
+            tx : usermanagement.OverlayTransaction
+                Apply the changes with tx.set_setting and tx.delete_user.
+
+        """
+        tx = self._transaction()
+        if tx is not None:
+            yield tx
+            return
+        connection = self.connection()
+        tx = usermanagement.OverlayTransaction(self.select_user)
+        # take the write lock up front, so the checks made in the block hold when it commits
+        connection.execute("BEGIN IMMEDIATE")
+        self._local.transaction = tx
+        try:
+            yield tx
+            self._write(tx)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            self._local.transaction = None
+        if tx.changes:
+            logger.debug(f"Committed {tx.changes} changes to {len(tx.users)} users.")
+
+    def load_all_users(self) -> dict:
+        """Get every user, by username. This reads the whole table."""
+        rows = self.connection().execute("SELECT username, user FROM users ORDER BY id")
+        users = {username: json.loads(user) for username, user in rows}
+        tx = self._transaction()
+        if tx is not None:
+            for username, user in tx.users.items():
+                if user is None:
+                    users.pop(username, None)
+                else:
+                    users[username] = user
+        return users
+
+    def count(self) -> int:
+        """Get the number of users."""
+        return self.connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection of this thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def migrate(json_path: str, db_path: str) -> Tuple[int, int]:
+    """
+    Copy the users of a JSON user file into an SQLite database.
+
+    Users already in the database are replaced, as are any others there with
+    the email of a user copied. Users of the file whose email is registered
+    to an earlier user of the file are skipped, and logged.
+
+    Returns
+    -------
+    (migrated, skipped) : Tuple[int, int]
+        The number of users copied and skipped.
+
+    """
+    with open(json_path, "r") as f:
+        users = json.load(f)
+    store = SQLiteUserStore(db_path)
+    migrated, skipped = 0, 0
+    with store.transaction() as tx:
+        connection = store.connection()
+        emails = {}
+        for username, user in users.items():
+            email = user.get("email")
+            if email is not None and email in emails:
+                logger.warning(f"Skipping user '{username}', the email of '{emails[email]}' is registered to them too.")
+                skipped += 1
+                continue
+            emails[email] = username
+            tx.users[username] = user
+            migrated += 1
+        # drop users whose email is taken by a migrated user, so the index holds
+        connection.executemany("DELETE FROM users WHERE email = ? AND username != ?",
+                               [(email, username) for email, username in emails.items() if email is not None])
+    store.close()
+    logger.info(f"Migrated {migrated} users from {json_path} to {db_path}, skipped {skipped}.")
+    return migrated, skipped
+
+
+# the process wide store, opened on first use
+user_db = SQLiteUserStore(get.USER_SQLITE_PATH)
+
+
+def main():
+    """Migrate the JSON user file into an SQLite database."""
+    parser = argparse.ArgumentParser(description="Migrate the Cryptids user file into an SQLite database.")
+    parser.add_argument("json_path", nargs="?", default=usermanagement.FILEPATH)
+    parser.add_argument("db_path", nargs="?", default=get.USER_SQLITE_PATH)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    migrated, skipped = migrate(args.json_path, args.db_path)
+    print(f"migrated {migrated} users to {args.db_path} in {time.perf_counter() - start:.2f} s, skipped {skipped}")
+    print("set USER_STORE_BACKEND = \"sqlite\" in cryptids/settings.py to use it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Cached user store.
+
+The user file is parsed once per process and its users are served from
+memory. The file is parsed again only when its modification time or size
+changes, i.e. when something other than this process wrote it.
+
+Committed changes are written behind: a background thread flushes the dirty
+users a moment after they are committed, so a burst of changes is written
+once. The whole file is written to a temporary file beside it, fsynced, then
+renamed over it, so a crash leaves either the old or the new file. Whatever
+is dirty at exit is flushed then.
+
+Users are never changed in place once committed (transactions copy the users
+they change), so a dict handed out by read() is a consistent snapshot and the
+flush can serialise it without holding up the game.
+
+The time taken by each read and each flush is kept for the latest reads and
+flushes, see UserStore.stats().
+"""
+import atexit
+from collections import deque
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Iterable
+
+from cryptids import settings as get
+from cryptids import utils
+
+# get the logger
+logger = logging.getLogger(__name__)
+if get.VERBOSE:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def file_signature(stat: os.stat_result) -> tuple:
+    """Get what identifies a version of a file: its modification time and size."""
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def write_atomic(path: str, data: dict) -> tuple:
+    """
+    Write JSON to a file in one atomic step.
+
+    The data is written to a temporary file beside the file, flushed to disk
+    and renamed over the file.
+
+    Returns
+    -------
+    signature : tuple
+        The modification time and size of the file written.
+
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".user_details.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return file_signature(os.stat(path))
+
+
+def _latency_summary(times) -> dict:
+    """Get the count, mean, p95 and max in ms of a window of timings."""
+    if not times:
+        return {"count": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(times)
+    return {"count": len(ordered),
+            "mean_ms": 1000 * statistics.fmean(ordered),
+            "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+            "max_ms": 1000 * ordered[-1]}
+
+
+class UserStore(object):
+    """
+    The users of a user file, held in memory and written behind.
+
+    Parameters
+    ----------
+        path : str,
+            The user file.
+        flush_delay : float,
+            Seconds after a commit before the dirty users are flushed, so
+            changes made together are written together.
+        metrics_size : int,
+            The number of latest reads and flushes timed.
+
+    Methods
+    -------
+        read()
+            Get all the users, parsing the file only if it changed on disk.
+
+        commit(data, usernames)
+            Replace the users with a changed copy, flushing in the background.
+
+        flush()
+            Write the dirty users now.
+
+        close()
+            Flush and stop the background thread.
+
+        stats()
+            Get the read and flush counters and latencies.
+    """
+
+    def __init__(self,
+                 path: str,
+                 flush_delay: float = get.USER_STORE_FLUSH_DELAY,
+                 metrics_size: int = get.USER_STORE_METRICS_SIZE):
+        utils.check_type(path, "path", str)
+        utils.check_type(flush_delay, "flush_delay", float)
+        utils.check_type(metrics_size, "metrics_size", int)
+        self.path = path
+        self.flush_delay = flush_delay
+        self._data = None
+        self._signature = None
+        # users committed but not yet written, and whether a write is under way
+        self._dirty = set()
+        self._flushing = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        # one flush at a time, from the thread or from flush()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self.read_times = deque(maxlen=metrics_size)
+        self.flush_times = deque(maxlen=metrics_size)
+        self.reads = 0
+        self.reloads = 0
+        self.commits = 0
+        self.flushes = 0
+
+    def read(self) -> dict:
+        """
+        Get all the users, parsing the file only if it changed on disk.
+
+        Unwritten changes are newer than the file, so it is not checked
+        whilst there are any.
+
+        Returns
+        -------
+        users : dict
+            All the users, by username. Do not change it, commit a copy.
+
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if self._data is None or not (self._dirty or self._flushing):
+                signature = file_signature(os.stat(self.path))
+                if signature != self._signature:
+                    self._load()
+            data = self._data
+            self.reads += 1
+            self.read_times.append(time.perf_counter() - start)
+        return data
+
+    def _load(self) -> None:
+        """Parse the file, remembering the version read."""
+        with open(self.path, "r") as f:
+            signature = file_signature(os.fstat(f.fileno()))
+            data = json.load(f)
+        if self._data is not None:
+            logger.info(f"{self.path} changed on disk, reloaded {len(data)} users.")
+        self._data = data
+        self._signature = signature
+        self.reloads += 1
+
+    def commit(self, data: dict, usernames: Iterable[str]) -> None:
+        """
+        Replace the users with a changed copy, flushing in the background.
+
+        Parameters
+        ----------
+        data : dict
+            All the users, with the changed ones copied rather than changed in place.
+        usernames : Iterable[str]
+            The users changed, added or removed.
+
+        """
+        with self._lock:
+            self._data = data
+            self._dirty.update(usernames)
+            self.commits += 1
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="user-store-flush", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def _run(self) -> None:
+        """Flush the dirty users a moment after they are committed, until closed."""
+        while True:
+            with self._lock:
+                while not self._dirty and not self._closed:
+                    self._wake.wait()
+                # let the changes made together gather
+                deadline = time.monotonic() + self.flush_delay
+                while not self._closed and deadline > time.monotonic():
+                    self._wake.wait(deadline - time.monotonic())
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except OSError as error:
+                logger.error(f"Could not write {self.path}: {error}")
+                time.sleep(self.flush_delay)
+
+    def flush(self) -> int:
+        """
+        Write the dirty users now.
+
+        Returns
+        -------
+        n : int
+            The number of users written.
+
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                # the users are not changed once committed, a shallow copy is a snapshot
+                snapshot = dict(self._data)
+                dirty = self._dirty
+                self._dirty = set()
+                self._flushing = True
+            start = time.perf_counter()
+            try:
+                signature = write_atomic(self.path, snapshot)
+            except BaseException:
+                with self._lock:
+                    self._dirty |= dirty
+                    self._flushing = False
+                raise
+            # in one step with the end of the flush, so a read in between does not take our write for another's
+            with self._lock:
+                self._signature = signature
+                self._flushing = False
+                self.flushes += 1
+                self.flush_times.append(time.perf_counter() - start)
+        logger.debug(f"Flushed {len(dirty)} users to {self.path}.")
+        return len(dirty)
+
+    def close(self) -> None:
+        """Flush and stop the background thread."""
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        self.flush()
+        if self.reads or self.commits:
+            logger.info(f"User store {self.path}: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Get the read and flush counters and latencies."""
+        return {"reads": self.reads,
+                "reloads": self.reloads,
+                "commits": self.commits,
+                "flushes": self.flushes,
+                "dirty": len(self._dirty),
+                "read": _latency_summary(list(self.read_times)),
+                "flush": _latency_summary(list(self.flush_times))}
+
+
+# the process wide stores, one per user file
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str) -> UserStore:
+    """Get the process wide store of a user file."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = UserStore(path)
+        return store
+
+
+@atexit.register
+def close_stores() -> None:
+    """Flush every store, e.g. on exit."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.close()
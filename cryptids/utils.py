@@ -130,43 +130,3 @@ def reshape_keep_aspect(img, new_height=None, new_width=None):
 
     img = pygame.transform.scale(img, (int(new_width), int(new_height)))
     return img
-
-
-def delay_n_frames(num_frames: int,
-                   clockspeed: int):
-    """
-    Delay a fixed number of frames.
-
-    Parameters
-    ----------
-    num_frames : int
-        Number of framaes to delay.
-
-    Returns
-    -------
-    None.
-
-    """
-    logger.debug(f"Delaying for {num_frames} frames")
-    # initialaise the frame count
-    frame_count = 0
-    # initialise the infinite loop
-    running = True
-
-    # Set up game clock
-    clock = pygame.time.Clock()
-    # enter the event loop
-    while running and frame_count < num_frames:
-        # Check for quit events, which would override this delay
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                # break the loop if a quit event
-                running = False
-            # increment the frame count
-        frame_count += 1
-
-        # tick the clock
-        clock.tick(clockspeed)
-        # Update the display
-        pygame.display.update()
-    return None
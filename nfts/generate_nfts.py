@@ -8,7 +8,6 @@ existing data will be overwritten.
 """
 import os
 import numpy as np
-from faker import Faker
 from random import randint, random
 import pygame
 import sys
@@ -20,8 +19,17 @@ NFT_FNAME = os.path.join(os.getcwd(), "nfts", "nft_info.json")
 
 # Generate names for the cards
 locales = ["en_GB", "de", "es_ES", "fr_FR", "en_IN", "en_IE", "sl_SI", "pl_PL"]
-fake = Faker(locales)
-fake.name()
+# built on first use, the game imports TYPE_CHART from here and never needs it
+_fake = None
+
+
+def get_fake():
+    """Get the name generator, building it the first time."""
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker(locales)
+    return _fake
 
 # about the cards
 TOTAL_UNIQUE_CARDS = 300
@@ -209,7 +217,7 @@ def mint_cryptid(CLASS, SUMMON_LEVEL):
     card_data = {}
     card_data["card_type"] = "cryptid"
     card_data["summon_level"] = SUMMON_LEVEL
-    card_data["name"] = fake.name()
+    card_data["name"] = get_fake().name()
     card_data["class"] = CLASS
     r = random()
     p = np.cumsum(PROBABILITY_PER_SUMMON_TYPE)
@@ -233,7 +241,7 @@ def mint_magic(CLASS, MAGIC_LEVEL):
     card_data = {}
     card_data["card_type"] = "magic"
     card_data["magic_level"] = MAGIC_LEVEL
-    card_data["name"] = fake.name()
+    card_data["name"] = get_fake().name()
     card_data["class"] = CLASS
     R = randint(1, 3)
 
@@ -3,18 +3,27 @@ Cryptids.
 
 Run the Cryptids trading card game.
 """
+import argparse
 import logging
+from logging.handlers import BufferingHandler
+import random
 import sys
+import time
 import traceback
 
 import pygame
 
 from cryptids import settings
+from cryptids.dirty import DirtyRectOverlay
+from cryptids.frametimer import frame_timer
+from cryptids.profiler import profiling_requested, status_profiler
 from cryptids.gamewrapper import GameWrapper
-from cryptids.loggingdecorator import build_logger
+from cryptids.inputs import InputCounters, poll_inputs
+from cryptids.scheduler import FrameScheduler
+from cryptids import loggingdecorator
 
-# build the game logger
-logger = build_logger(logging_level=logging.DEBUG)
+# the game logger, its log file is built once the first frame is on screen
+logger = logging.getLogger(loggingdecorator.__name__)
 if settings.VERBOSE:
     handler = logging.StreamHandler(sys.stdout)
     handler.setLevel(logging.DEBUG)
@@ -23,30 +32,42 @@ if settings.VERBOSE:
     logger.addHandler(handler)
 
 
-# Initialize Pygame
-pygame.init()
-logger.info("Game initialised")
+def start_display():
+    """Initialise pygame and open the window."""
+    # Initialize Pygame
+    pygame.init()
+    logger.info("Game initialised")
 
-# Set window size and title
-screen = pygame.display.set_mode((settings.WINWIDTH, settings.WINHEIGHT))
-logger.info(f"Screen size set to {(settings.WINWIDTH, settings.WINHEIGHT)}")
+    # Set window size and title
+    screen = pygame.display.set_mode((settings.WINWIDTH, settings.WINHEIGHT))
+    logger.info(f"Screen size set to {(settings.WINWIDTH, settings.WINHEIGHT)}")
 
-# set the caption
-pygame.display.set_caption(settings.WINTITLE)
-logger.info(f"Screen size set to {settings.WINTITLE}")
+    # set the caption
+    pygame.display.set_caption(settings.WINTITLE)
+    logger.info(f"Screen size set to {settings.WINTITLE}")
+    return screen
 
-# Set up game clock
-clock = pygame.time.Clock()
 
+def start_logging(startup_log: BufferingHandler) -> None:
+    """Build the log file, then write the records buffered during startup into it."""
+    root = logging.getLogger()
+    root.removeHandler(startup_log)
+    loggingdecorator.build_logger(logging_level=logging.DEBUG)
+    for record in startup_log.buffer:
+        root.handle(record)
+    startup_log.close()
 
-def render(game, screen, click_pos, key_press, running, click_event):
+
+def render(game, screen, inputs, running):
     """Render the frame in safety."""
     # update display
     try:
-        game = game.render(screen, click_pos, key_press, click_event)
+        with status_profiler.profile(game.game_status):
+            game = game.render(screen, inputs.click_pos, inputs.key_press, inputs.click_event, inputs=inputs)
 
     except SystemExit:
         logger.info("Force closing the game.")
+        status_profiler.dump()
         sys.exit()
 
     except BaseException:
@@ -58,62 +79,124 @@ def render(game, screen, click_pos, key_press, running, click_event):
     return game, running
 
 
+def parse_args(argv=None):
+    """Parse the command line switches."""
+    parser = argparse.ArgumentParser(description="Run the Cryptids trading card game.")
+    parser.add_argument("--sync", action="store_true", help="run the plain main loop instead of the asyncio loop")
+    parser.add_argument("--profile", action="store_true", help="profile each game status, F9 stops/restarts")
+    parser.add_argument("--record", metavar="PATH", help="record the session for `python -m cryptids.replay PATH`")
+    parser.add_argument("--seed", type=int, help="seed the random module, e.g. to repeat a recorded session")
+    return parser.parse_known_args(argv)[0]
+
+
+def frame(game, screen, dirty_overlay, counters, scheduler, recorder=None):
+    """Run one frame: fold the input, render once and update the display."""
+    # time the phases of the frame
+    frame_timer.start_frame(game.game_status)
+
+    # Fold all of this frame's events into one snapshot
+    with frame_timer.phase("events"):
+        inputs = poll_inputs()
+        if recorder is not None:
+            recorder.record(inputs)
+
+    # check if the window is closed
+    if inputs.quit:
+        logger.info("Quit event detected. Closing the game.")
+        logger.info(f"Input per frame: {counters.stats()}")
+        logger.info(f"CPU per screen: {scheduler.stats()}")
+        logger.info(f"Frame phases: {frame_timer.stats()}")
+        status_profiler.dump()
+        # Quit Pygame
+        pygame.quit()
+        sys.exit()
+
+    # if the window was uncovered, it must be redrawn in full
+    if inputs.expose:
+        game.dirty.mark_full()
+
+    # F3 shows the frame timing overlay, F4 writes it to file
+    if pygame.K_F3 in inputs.keys and not frame_timer.toggle_overlay():
+        # wipe the overlay
+        game.dirty.mark_full()
+    if pygame.K_F4 in inputs.keys:
+        frame_timer.dump(settings.FRAME_TIMER_DUMP_PATH)
+    # F9 stops and restarts profiling, when it is opted in to
+    if pygame.K_F9 in inputs.keys:
+        status_profiler.toggle()
+
+    # log the input
+    for click_pos in inputs.clicks:
+        logger.debug(f"CLICK at {click_pos}")
+    for key_press in inputs.key_presses:
+        logger.debug(f"KEYSTROKE with {key_press}")
+
+    # render exactly once per frame
+    renders = game.renders
+    with frame_timer.phase("render"):
+        game, running = render(game, screen, inputs, True)
+    counters.record(inputs, game.renders - renders)
+
+    # Update only the regions of the display that changed
+    with frame_timer.phase("display"):
+        rects = dirty_overlay.draw(screen, game.dirty.consume())
+        # the timing overlay alone does not keep the frame rate up
+        pygame.display.update(rects + frame_timer.draw(screen))
+    return game, inputs, rects
+
+
 def main():
     """Run Cryptids."""
+    # hold the log records until the first frame is on screen
+    startup_log = BufferingHandler(settings.STARTUP_LOG_CAPACITY)
+    logging.getLogger().addHandler(startup_log)
+    logging.getLogger().setLevel(logging.DEBUG)
+
+    args = parse_args()
+    # seed the session, so a recording can be replayed with the same shuffles
+    seed = args.seed if args.seed is not None else time.time_ns() % 2**32
+    random.seed(seed)
+    recorder = None
+    if args.record:
+        from cryptids.replay import SessionRecorder
+        recorder = SessionRecorder(args.record, seed)
+
+    screen = start_display()
     # initialize the game
     logger.info("Initialising the game class: GameWrapper.")
     game = GameWrapper()
+    # debug overlay for the regions updated each frame
+    dirty_overlay = DirtyRectOverlay()
+    # events and renders per frame
+    counters = InputCounters()
+    # frame rate, idling on static screens
+    scheduler = FrameScheduler()
+    # profile each screen, if asked to
+    if args.profile or profiling_requested():
+        status_profiler.enable()
 
-    # Game event loop
-    running = True
-    logger.info("Game initialisation sequence event loop starting.")
-    while running:
-        # Handle events
-        events = pygame.event.get()
-        # flags
-        click_event = False
-        key_event = False
-        # if we have any, process them.
-        if events:
-            for event in events:
-
-                # check if the window is closed
-                if event.type == pygame.QUIT:
-                    logger.info("Quit event detected. Closing the game.")
-                    # if so, end the script by breaking the while loop
-                    running = False
-                    # Quit Pygame
-                    pygame.quit()
-                    sys.exit()
-
-                # check if a click event occured
-                if event.type == pygame.MOUSEBUTTONUP:
-                    click_pos = event.pos
-                    click_event = True
-                    logger.debug(f"CLICK at {click_pos}")
-                else:
-                    click_pos = None
-
-                # check if any buttons were pressed
-                if event.type == pygame.KEYDOWN:
-                    key_press = event.unicode
-                    key_event = True
-                    logger.debug(f"KEYSTROKE with {key_press}")
-                else:
-                    key_press = None
-
-                # call the render for this event
-                game, running = render(game, screen, click_pos, key_press, running, click_event)
-
-        else:
-            # call the render in absence of events
-            game, running = render(game, screen, click_pos, key_press, running, click_event)
-
-        # Update the display
-        pygame.display.update()
-
-        # Limit frame rate to set FPS
-        clock.tick(settings.CLOCKSPEED)
+    try:
+        # get the first frame on screen, then do what can wait
+        game, inputs, rects = frame(game, screen, dirty_overlay, counters, scheduler, recorder)
+        start_logging(startup_log)
+
+        # the asyncio loop keeps rendering whilst the user files are read and written
+        if settings.ASYNC_MAIN_LOOP and not args.sync:
+            from cryptids import asyncloop
+            asyncloop.run(game, lambda game: frame(game, screen, dirty_overlay, counters, scheduler, recorder), scheduler)
+            return
+
+        # Game event loop
+        logger.info("Game initialisation sequence event loop starting.")
+        while True:
+            game, inputs, rects = frame(game, screen, dirty_overlay, counters, scheduler, recorder)
+
+            # Limit frame rate to set FPS, or idle until input on static screens
+            with frame_timer.phase("wait"):
+                scheduler.wait(game.game_status, game.is_animating(), inputs.events > 0 or bool(rects))
+    finally:
+        if recorder is not None:
+            recorder.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+"""
+Fixtures shared by the tests of the users: a user file, and cheap password hashes.
+"""
+import json
+
+import pytest
+
+from cryptids import credentials
+from cryptids import settings as get
+from cryptids import usermanagement
+from cryptids.credentials import CredentialPool
+from cryptids.userstore import get_store
+
+
+@pytest.fixture
+def cheap_hashes(monkeypatch):
+    """Hash at a low cost, on a pool of this test's own."""
+    monkeypatch.setattr(get, "CREDENTIALS_PBKDF2_ITERATIONS", 1000)
+    monkeypatch.setattr(get, "CREDENTIALS_SCRYPT_N", 2 ** 8)
+    pool = CredentialPool(1)
+    monkeypatch.setattr(credentials, "credential_pool", pool)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def usernames():
+    """The users in the user file, override in a test module for others."""
+    return ["default"]
+
+
+@pytest.fixture
+def user_details(tmp_path, usernames):
+    """A user file of the users in usernames, each with a plaintext password."""
+    path = tmp_path / "user_details.json"
+    path.write_text(json.dumps({name: {"email": f"{name}@cryptids-tcg.com",
+                                       "password": "Password123",
+                                       "settings": {"nfts": [0], "loadouts": {"default": "[1, 2]"}},
+                                       "records": {"wins": 0, "losses": 0}} for name in usernames}))
+    return path
+
+
+@pytest.fixture
+def user_file(user_details, monkeypatch, cheap_hashes):
+    """The user file, picked as usermanagement's, and its store."""
+    monkeypatch.setattr(usermanagement, "FILEPATH", str(user_details))
+    store = get_store(str(user_details))
+    yield user_details, store
+    store.close()
@@ -0,0 +1,48 @@
+"""
+Test the asset manager.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from cryptids import settings as get  # noqa: E402
+from cryptids.assets import AssetManager, surface_bytes  # noqa: E402
+
+pg.display.init()
+pg.display.set_mode((1, 1))
+
+
+def test_get_image_is_cached():
+    """Test a repeated request is served without reloading."""
+    manager = AssetManager()
+    first = manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=100)
+    second = manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=100)
+    assert first is second
+    assert first.get_height() == 100
+    # one miss for the scaled image and one for its source
+    assert manager.misses == 2
+    assert manager.hits == 1
+
+
+def test_get_image_keys():
+    """Test size and alpha give separate entries sharing one source."""
+    manager = AssetManager()
+    plain = manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=100)
+    faded = manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=100, alpha=70)
+    small = manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=50)
+    assert plain is not faded
+    assert small.get_height() == 50
+    assert manager.stats()["entries"] == 4
+
+
+def test_lru_eviction():
+    """Test the least recently used surface is evicted over budget."""
+    manager = AssetManager(byte_budget=0)
+    manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=10)
+    newest = manager.get_image(get.LOGO_SCREEN_IMAGE_PATH, new_height=20)
+    stats = manager.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes_used"] == surface_bytes(newest)
+    assert stats["evictions"] > 0
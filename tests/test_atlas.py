@@ -0,0 +1,44 @@
+"""
+Test the card art atlas.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from cryptids.atlas import CardAtlas, bake_atlas, pack_shelves  # noqa: E402
+
+
+def test_pack_shelves_does_not_overlap():
+    """Test packed cards stay on their sheet and never overlap."""
+    sizes = {card_id: (40 + card_id % 3, 70) for card_id in range(1, 30)}
+    placements = pack_shelves(sizes, sheet_size=200, padding=1)
+    assert set(placements) == set(sizes)
+    rects = {}
+    for card_id, (sheet, x, y, width, height) in placements.items():
+        rect = pg.Rect(x, y, width, height)
+        assert pg.Rect(0, 0, 200, 200).contains(rect)
+        assert rect.collidelist(rects.get(sheet, [])) == -1
+        rects.setdefault(sheet, []).append(rect)
+    assert len(rects) > 1
+
+
+def test_bake_and_get(tmp_path):
+    """Test baked cards are served from the atlas at the tier height."""
+    pg.display.init()
+    pg.display.set_mode((10, 10))
+    card_root = tmp_path / "cards"
+    card_root.mkdir()
+    for card_id, colour in ((1, (255, 0, 0)), (2, (0, 255, 0))):
+        card = pg.Surface((40, 60))
+        card.fill(colour)
+        pg.image.save(card, str(card_root / f"{card_id}.png"))
+
+    bake_atlas(str(card_root), str(tmp_path / "atlas"), tiers={"hand": 30}, sheet_size=64)
+    atlas = CardAtlas(str(tmp_path / "atlas" / "index.json"), str(card_root), tiers={"hand": 30})
+    card = atlas.get(2, "hand")
+    assert card.get_size() == (20, 30)
+    assert card.get_at((10, 15))[:3] == (0, 255, 0)
+    assert atlas.get(2, "hand") is card
+    assert atlas.stats()["fallbacks"] == 0
@@ -0,0 +1,73 @@
+"""
+Test the Button class.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+import pytest  # noqa: E402
+
+from cryptids.button import Button  # noqa: E402
+from cryptids.inputs import InputSnapshot  # noqa: E402
+
+pg.init()
+pg.display.set_mode((1, 1))
+
+
+def test_surface_is_retained():
+    """Test the surface is only rendered once while nothing changes."""
+    button = Button(text="PLAY", x=10, y=10)
+    first = button.update(None, False).surface
+    for _ in range(10):
+        assert button.update(None, False).surface is first
+    assert button.renders == 1
+
+
+def test_surface_per_state():
+    """Test each visual state has its own retained surface."""
+    button = Button(text="PLAY", x=10, y=10)
+    normal = button.surface
+    button.set_access(False)
+    disabled = button.surface
+    assert button.get_state() == "disabled"
+    assert disabled is not normal
+    button.set_access(True)
+    assert button.surface is normal
+    assert button.renders == 2
+
+
+def test_set_text_rerenders():
+    """Test changing the text rebuilds the surfaces."""
+    button = Button(text="PLAY", x=10, y=10)
+    first = button.surface
+    button.set_text("PLAY")
+    assert button.surface is first
+    button.set_text("QUIT")
+    assert button.surface is not first
+    assert button.text == "QUIT"
+
+
+def test_private_text():
+    """Test private text is masked."""
+    button = Button(text="secret", private=True, input_text=True)
+    assert button.text == "******"
+    button.set_text("abc")
+    assert button.text == "***"
+
+
+def test_text_input_task():
+    """Test typing into a text box until enter is pressed."""
+    def key(key, unicode):
+        return pg.event.Event(pg.KEYDOWN, key=key, unicode=unicode, mod=0, scancode=0)
+
+    button = Button(text="", x=10, y=10, input_text=True)
+    task = button.text_input_task("ab")
+    next(task)
+    assert button.active
+    task.send(InputSnapshot.from_events([key(pg.K_c, "c"), key(pg.K_BACKSPACE, "\b"), key(pg.K_d, "d")]))
+    assert button.text == "abd"
+    with pytest.raises(StopIteration) as stop:
+        task.send(InputSnapshot.from_events([key(pg.K_RETURN, "\r")]))
+    assert stop.value.value == "abd"
+    assert not button.active
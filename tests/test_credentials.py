@@ -0,0 +1,88 @@
+"""
+Test the password hashing, and the upgrade of plaintext passwords on login.
+"""
+import json
+
+import pytest
+
+from cryptids import credentials
+from cryptids import settings as get
+from cryptids import usermanagement
+from cryptids.credentials import calibrate, hash_password, needs_rehash, parse_hash, verify_password
+
+
+@pytest.mark.parametrize("algorithm", credentials.ALGORITHMS)
+def test_hash_and_verify(cheap_hashes, algorithm):
+    """Test a hash checks its password only, and holds its own function and cost."""
+    stored = hash_password("Password123", algorithm=algorithm)
+    assert stored != hash_password("Password123", algorithm=algorithm)
+    assert parse_hash(stored)[:2] == (algorithm, credentials.default_cost(algorithm))
+    assert verify_password("Password123", stored) == (True, algorithm != get.CREDENTIALS_ALGORITHM)
+    assert not verify_password("Password124", stored)[0]
+    assert verify_password("Password123", "Password123") == (True, True)
+    assert not verify_password("Password123", "password123")[0]
+
+
+def test_rehash_below_cost(cheap_hashes, monkeypatch):
+    """Test hashes below the cost in settings are to be hashed again, and still check."""
+    stored = hash_password("Password123")
+    assert not needs_rehash(stored)
+    monkeypatch.setattr(get, "CREDENTIALS_PBKDF2_ITERATIONS", 2000)
+    assert verify_password("Password123", stored) == (True, True)
+    assert cheap_hashes.verify("Password123", stored).result() == (True, True)
+    assert cheap_hashes.stats()["hashes"] == 1
+
+
+def test_calibrate():
+    """Test the cost found takes about the target time."""
+    cost, seconds = calibrate(0.01, "pbkdf2_sha256", start_cost=1000)
+    assert cost >= 1000 and cost % 1000 == 0
+    assert seconds < 0.1
+    cost, seconds = calibrate(0.01, "scrypt", start_cost=2 ** 4)
+    assert cost & (cost - 1) == 0
+
+
+def test_plaintext_upgraded_on_login(user_file):
+    """Test a plaintext password is replaced by its hash on login, once."""
+    path, store = user_file
+    assert usermanagement.load_user("default", "Wrong123")[0] == 2
+    assert store.commits == 0
+    return_code, user = usermanagement.load_user("default", "Password123")
+    assert return_code == 0
+    assert verify_password("Password123", user["password"]) == (True, False)
+    assert store.commits == 1
+    store.flush()
+    assert json.loads(path.read_text())["default"]["password"] == user["password"]
+    assert usermanagement.load_user("default", "Password123")[0] == 0
+    assert store.commits == 1
+
+
+def test_registration_stores_a_hash(user_file):
+    """Test a new user's password is stored hashed, and logs in as typed."""
+    path, store = user_file
+    assert usermanagement.make_new_user("newbie", "Password456!", "newbie@cryptids-tcg.com") == (0, "user created")
+    stored = usermanagement.get_user("newbie")["password"]
+    assert parse_hash(stored) is not None
+    assert usermanagement.load_user("newbie", "Password456!")[0] == 0
+    assert usermanagement.load_user("newbie", "Password456")[0] == 0
+    assert usermanagement.load_user("newbie", "Password457")[0] == 2
+
+
+def test_registration_hashes_outside_the_transaction(user_file, monkeypatch):
+    """Test the users are not held whilst the password of a registration is hashed."""
+    held = []
+    hash_password = credentials.hash_password
+
+    def checking_hash(password):
+        # run on the credential worker, the lock is free unless the registering thread holds it
+        free = usermanagement._lock.acquire(blocking=False)
+        if free:
+            usermanagement._lock.release()
+        held.append(not free)
+        return hash_password(password)
+    monkeypatch.setattr(credentials, "hash_password", checking_hash)
+    assert usermanagement.register_user("newbie@cryptids-tcg.com", "newbie", "Password456") == (True, True, True, 0)
+    assert held == [False]
+    assert usermanagement.register_user("newbie@cryptids-tcg.com", "newbie2", "Password456") == (False, True, True, None)
+    assert usermanagement.register_user("other@cryptids-tcg.com", "other", "short") == (True, True, False, None)
+    assert held == [False]
@@ -0,0 +1,39 @@
+"""
+Test the dirty rectangle tracking.
+"""
+import pygame as pg
+
+from cryptids.dirty import DirtyRects, count_pixels
+
+
+def test_first_frame_is_full():
+    """Test the first frame updates the whole window."""
+    dirty = DirtyRects(size=(100, 50))
+    dirty.mark((0, 0, 10, 10))
+    assert dirty.consume() == [pg.Rect(0, 0, 100, 50)]
+    # nothing changed on the next frame
+    assert dirty.consume() == []
+
+
+def test_mark_clips_and_ignores_none():
+    """Test marked rects are clipped to the window."""
+    dirty = DirtyRects(size=(100, 50))
+    dirty.consume()
+    dirty.mark(None)
+    dirty.mark((90, 40, 20, 20))
+    dirty.mark((200, 200, 5, 5))
+    assert dirty.consume() == [pg.Rect(90, 40, 10, 10)]
+
+
+def test_too_many_rects_is_full():
+    """Test many small updates become one full update."""
+    dirty = DirtyRects(size=(100, 50), max_rects=2)
+    dirty.consume()
+    for i in range(3):
+        dirty.mark((i, i, 1, 1))
+    assert dirty.consume() == [pg.Rect(0, 0, 100, 50)]
+
+
+def test_count_pixels():
+    """Test the pixel count of a frame."""
+    assert count_pixels([pg.Rect(0, 0, 10, 10), pg.Rect(0, 0, 2, 3)]) == 106
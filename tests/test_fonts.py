@@ -0,0 +1,53 @@
+"""
+Test the font registry.
+"""
+import pygame as pg
+
+from cryptids import settings as get
+from cryptids.fonts import FontRegistry
+
+pg.font.init()
+
+
+def test_get_font_is_shared():
+    """Test the same (path, size) returns the same Font."""
+    registry = FontRegistry()
+    first = registry.get_font(get.FONT, 32)
+    second = registry.get_font(get.FONT, 32)
+    other = registry.get_font(get.FONT, 30)
+    assert first is second
+    assert first is not other
+    assert registry.hits == 1
+    assert registry.misses == 2
+
+
+def test_preload_opens_once_per_size():
+    """Test preloading then rendering never reopens a font."""
+    registry = FontRegistry()
+    registry.preload(get.PRELOAD_FONTS)
+    for path, size in get.PRELOAD_FONTS:
+        registry.get_font(path, size)
+    stats = registry.stats()
+    assert stats["fonts"] == len(get.PRELOAD_FONTS)
+    assert stats["max_opens_per_font"] == 1
+    assert stats["hits"] == len(get.PRELOAD_FONTS)
+
+
+def test_fit_size():
+    """Test the fitted size is the largest that fits the width."""
+    registry = FontRegistry()
+    text = "Don't have an account? Register now."
+    size = registry.fit_size(get.FONT, text, 32, 280)
+    assert registry.get_font(get.FONT, size).size(text)[0] < 280
+    assert registry.get_font(get.FONT, size + 1).size(text)[0] >= 280
+    # short text keeps the maximum size
+    assert registry.fit_size(get.FONT, "OK", 32, 280) == 32
+
+
+def test_fit_size_is_memoised():
+    """Test a repeated fit does not touch the fonts again."""
+    registry = FontRegistry()
+    registry.fit_size(get.FONT, "Logged in as default.", 32, 160)
+    lookups = registry.hits + registry.misses
+    registry.fit_size(get.FONT, "Logged in as default.", 32, 160)
+    assert registry.hits + registry.misses == lookups
@@ -0,0 +1,66 @@
+"""
+Test the per phase frame timer.
+"""
+import csv
+import json
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from cryptids.frametimer import PHASES, FrameTimer  # noqa: E402
+
+
+def _run_frames(timer, frames, status="home"):
+    for _ in range(frames):
+        timer.start_frame(status)
+        for name in PHASES:
+            with timer.phase(name):
+                pass
+    # record the last frame
+    timer.start_frame(status)
+
+
+def test_ring_buffer_keeps_the_latest_frames():
+    """Test the buffer wraps, keeping the latest frames in order."""
+    timer = FrameTimer(size=4, enabled=True)
+    _run_frames(timer, 6)
+    assert timer.frames == 6
+    rows = timer.rows()
+    assert [row["frame"] for row in rows] == [2, 3, 4, 5]
+    assert all(row["status"] == "home" for row in rows)
+    stats = timer.stats()
+    assert set(stats) == set(PHASES) | {"total"}
+    assert stats["total"]["max_ms"] >= stats["render"]["max_ms"]
+
+
+def test_dump_csv_and_json(tmp_path):
+    """Test the frames are written as CSV or JSON by extension."""
+    timer = FrameTimer(size=8, enabled=True)
+    _run_frames(timer, 3)
+    with open(timer.dump(str(tmp_path / "times.csv")), newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 3
+    assert "render_ms" in rows[0]
+    with open(timer.dump(str(tmp_path / "times.json"))) as f:
+        data = json.load(f)
+    assert len(data["frames"]) == 3
+    assert data["phases"] == PHASES
+
+
+def test_disabled_timer_records_nothing():
+    """Test a disabled timer is a no-op."""
+    timer = FrameTimer(size=4, enabled=False)
+    _run_frames(timer, 3)
+    assert timer.frames == 0
+    assert timer.stats() == {}
+
+
+def test_overhead_is_small():
+    """Test timing every phase costs well under 1% of a 60 fps frame."""
+    timer = FrameTimer(size=600, enabled=True)
+    frames = 2000
+    start = time.perf_counter()
+    _run_frames(timer, frames)
+    per_frame = (time.perf_counter() - start) / frames
+    assert per_frame < 0.01 / 60
@@ -0,0 +1,41 @@
+"""
+Test folding a frame's events into one input snapshot.
+"""
+import pygame as pg
+
+from cryptids.inputs import InputCounters, InputSnapshot
+
+
+def test_snapshot_folds_events():
+    """Test clicks, keys and motion fold into one snapshot."""
+    events = [pg.event.Event(pg.MOUSEMOTION, pos=(1, 1), rel=(1, 1), buttons=(0, 0, 0)),
+              pg.event.Event(pg.MOUSEBUTTONUP, pos=(5, 6), button=1),
+              pg.event.Event(pg.KEYDOWN, key=pg.K_h, unicode="h", mod=0, scancode=0),
+              pg.event.Event(pg.KEYDOWN, key=pg.K_i, unicode="i", mod=0, scancode=0),
+              pg.event.Event(pg.MOUSEMOTION, pos=(9, 9), rel=(1, 1), buttons=(0, 0, 0))]
+    snapshot = InputSnapshot.from_events(events, mouse_pos=(0, 0))
+    assert snapshot.events == 5
+    assert snapshot.click_event and snapshot.click_pos == (5, 6)
+    assert snapshot.key_press == "i"
+    assert snapshot.text == "hi"
+    assert snapshot.mouse_pos == (9, 9)
+    assert not snapshot.quit
+
+
+def test_empty_snapshot():
+    """Test a frame without events."""
+    snapshot = InputSnapshot.from_events([], mouse_pos=(3, 4))
+    assert snapshot.click_pos is None and not snapshot.click_event
+    assert snapshot.key_press is None
+    assert snapshot.mouse_pos == (3, 4)
+
+
+def test_counters():
+    """Test the events and renders per frame."""
+    counters = InputCounters()
+    counters.record(InputSnapshot.from_events([pg.event.Event(pg.QUIT)] * 4), 1)
+    counters.record(InputSnapshot(), 1)
+    stats = counters.stats()
+    assert stats["events_per_frame"] == 2
+    assert stats["max_events_per_frame"] == 4
+    assert stats["renders_per_frame"] == 1
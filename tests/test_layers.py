@@ -0,0 +1,32 @@
+"""
+Test the static layer cache.
+"""
+import pygame as pg
+
+from cryptids.layers import LayerCache
+
+
+def _build(size, colour):
+    layer = pg.Surface(size)
+    layer.fill(colour)
+    return layer
+
+
+def test_layer_is_built_once():
+    """Test a layer is composited on the first request only."""
+    layers = LayerCache()
+    first = layers.get("home", (10, 10), _build, (1, 2, 3))
+    second = layers.get("home", (10, 10), _build, (1, 2, 3))
+    assert first is second
+    assert layers.stats() == {"hits": 1, "misses": 1, "layers": 1}
+
+
+def test_layer_key_includes_size_and_args():
+    """Test a new size or argument builds a new layer."""
+    layers = LayerCache()
+    layers.get("popup", (10, 10), _build, (1, 2, 3))
+    layers.get("popup", (20, 10), _build, (1, 2, 3))
+    layers.get("popup", (10, 10), _build, (4, 5, 6))
+    assert layers.misses == 3
+    layers.invalidate()
+    assert layers.stats()["layers"] == 0
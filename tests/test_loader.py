@@ -0,0 +1,38 @@
+"""
+Test the background asset loader.
+"""
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from cryptids.assets import AssetManager  # noqa: E402
+from cryptids.loader import AssetLoader  # noqa: E402
+
+
+def test_loader_fills_the_asset_manager(tmp_path):
+    """Test decoded images end up converted in the asset manager."""
+    pg.display.init()
+    pg.display.set_mode((10, 10))
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"{i}.png")
+        pg.image.save(pg.Surface((4, 4)), path)
+        paths.append(path)
+    manager = AssetManager()
+    loader = AssetLoader(max_workers=2, converts_per_frame=1, manager=manager)
+    loader.submit(paths + [str(tmp_path / "missing.png")])
+    # queueing the same image twice does nothing
+    loader.submit(paths)
+    assert loader.total == 4
+
+    deadline = time.monotonic() + 10
+    while not loader.is_done() and time.monotonic() < deadline:
+        loader.poll()
+        time.sleep(0.01)
+    loader.shutdown()
+    assert loader.progress == 1.0
+    assert (loader.loaded, loader.failed) == (3, 1)
+    assert all(manager.has_image(path) for path in paths)
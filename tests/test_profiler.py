@@ -0,0 +1,41 @@
+"""
+Test the profiler split by game status.
+"""
+import os
+import pstats
+
+from cryptids.profiler import StatusProfiler, profiling_requested
+
+
+def _work():
+    return sum(range(1000))
+
+
+def test_opt_in_switches():
+    """Test profiling is opted in to by the switch or environment variable."""
+    assert not profiling_requested(["run.py"], {})
+    assert profiling_requested(["run.py", "--profile"], {})
+    assert profiling_requested(["run.py"], {"CRYPTIDS_PROFILE": "1"})
+    assert not profiling_requested(["run.py"], {"CRYPTIDS_PROFILE": "0"})
+
+
+def test_profiles_each_status_and_toggles(tmp_path):
+    """Test each status gets its own profile, and nothing is collected when stopped."""
+    profiler = StatusProfiler(out_dir=str(tmp_path))
+    with profiler.profile("home"):
+        _work()
+    assert profiler.dump() == []
+
+    profiler.enable()
+    with profiler.profile("home"):
+        _work()
+    with profiler.profile("play"):
+        _work()
+    assert not profiler.toggle()
+    with profiler.profile("settings"):
+        _work()
+
+    paths = profiler.dump()
+    assert sorted(os.path.basename(path) for path in paths) == ["home.pstats", "play.pstats"]
+    stats = pstats.Stats(paths[0])
+    assert any(name == "_work" for (_, _, name) in stats.stats)
@@ -0,0 +1,91 @@
+"""
+Test session recording and replay.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from cryptids import replay as replay_module  # noqa: E402
+from cryptids import settings as get  # noqa: E402
+from cryptids import usermanagement  # noqa: E402
+from cryptids.gamewrapper import GameWrapper  # noqa: E402
+from cryptids.inputs import InputSnapshot  # noqa: E402
+from cryptids.replay import (InlineExecutor, SessionRecorder, VirtualClock, load_session, replay,  # noqa: E402
+                             snapshot_from_record, snapshot_to_record)
+
+
+def _snapshot(events, mouse_pos=(0, 0)):
+    return InputSnapshot.from_events(events, mouse_pos)
+
+
+def test_record_round_trip():
+    """Test a frame's input survives its compact record."""
+    inputs = _snapshot([pg.event.Event(pg.MOUSEBUTTONUP, pos=(5, 6), button=1),
+                        pg.event.Event(pg.KEYDOWN, key=pg.K_a, unicode="a", mod=0, scancode=0)])
+    record = snapshot_to_record(inputs, 1.5, mouse_pos=None)
+    rebuilt = snapshot_from_record(record)
+    assert rebuilt.clicks == [(5, 6)]
+    assert rebuilt.key_press == "a"
+    assert rebuilt.mouse_pos == (5, 6)
+    assert rebuilt.events == 2
+    # an empty frame with the mouse unmoved records only its time
+    assert snapshot_to_record(_snapshot([], (5, 6)), 2.0, mouse_pos=(5, 6)) == {"t": 2.0}
+
+
+def test_inline_executor_finishes_within_the_call():
+    """Test work submitted to the inline executor is done at once."""
+    future = InlineExecutor().submit(sum, [1, 2])
+    assert future.done() and future.result() == 3
+
+
+def test_replay_is_repeatable(tmp_path):
+    """Test a recorded intro, skipped by a key press, replays the same frames each time."""
+    pg.init()
+    screen = pg.display.set_mode((get.WINWIDTH, get.WINHEIGHT))
+    path = str(tmp_path / "session.jsonl.gz")
+    clock = VirtualClock()
+    recorder = SessionRecorder(path, seed=3, clock=clock)
+    for frame in range(30):
+        clock.now = frame / 60
+        events = [pg.event.Event(pg.KEYDOWN, key=pg.K_a, unicode="a", mod=0, scancode=0)] if frame == 20 else []
+        recorder.record(_snapshot(events))
+    recorder.close()
+
+    header, frames = load_session(path)
+    assert header["seed"] == 3
+    assert len(list(frames)) == 30
+
+    first, second = replay(path, screen), replay(path, screen)
+    assert first["frames"] == second["frames"] == 30
+    assert first["status_end"] == get.STATUS_HOME
+    assert first["statuses"]["intro"]["frames"] == second["statuses"]["intro"]["frames"] == 21
+
+
+def test_replay_runs_on_a_copy_of_the_users(tmp_path, user_details, cheap_hashes, monkeypatch):
+    """Test a login during a replay changes a fresh copy of the user file, never the file."""
+    pg.init()
+    screen = pg.display.set_mode((get.WINWIDTH, get.WINHEIGHT))
+    path = str(tmp_path / "session.jsonl.gz")
+    recorder = SessionRecorder(path, seed=3, clock=VirtualClock())
+    recorder.record(_snapshot([]))
+    recorder.close()
+    users = user_details
+    logins = []
+
+    class LoggingInGame(GameWrapper):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # the plaintext password is hashed on login
+            logins.append((usermanagement.FILEPATH, usermanagement.load_user("default", "Password123")[0]))
+    monkeypatch.setattr(replay_module, "GameWrapper", LoggingInGame)
+    filepath = usermanagement.FILEPATH
+
+    before = users.read_text()
+    replay(path, screen, users=str(users))
+    replay(path, screen, users=str(users))
+    assert users.read_text() == before
+    assert usermanagement.FILEPATH == filepath
+    assert [code for _, code in logins] == [0, 0]
+    assert str(users) not in [copy for copy, _ in logins]
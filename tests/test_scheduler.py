@@ -0,0 +1,66 @@
+"""
+Test the idle aware frame scheduler.
+"""
+import asyncio
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from cryptids.scheduler import FrameScheduler  # noqa: E402
+
+
+def test_idles_after_quiet_frames_and_wakes_on_input():
+    """Test a static screen idles, and input brings back the full rate."""
+    pg.display.init()
+    pg.display.set_mode((10, 10))
+    pg.event.clear()
+    scheduler = FrameScheduler(active_rate=1000, idle_rate=100, idle_after=3)
+    for _ in range(3):
+        assert not scheduler.idle
+        scheduler.wait("home", animating=False, active=False)
+    assert scheduler.idle
+
+    # an event wakes the idle wait and is left on the queue, in order with those after it
+    pg.event.post(pg.event.Event(pg.KEYDOWN, key=pg.K_a, unicode="a", mod=0, scancode=0))
+    pg.event.post(pg.event.Event(pg.KEYUP, key=pg.K_a, unicode="a", mod=0, scancode=0))
+    scheduler.wait("home", animating=False, active=False)
+    assert not scheduler.idle
+    assert scheduler.wakeups == 1
+    assert [event.type for event in pg.event.get()] == [pg.KEYDOWN, pg.KEYUP]
+
+    stats = scheduler.stats()["home"]
+    assert stats["frames"] == 4
+    assert stats["idle_frames"] == 2
+
+
+def test_animating_screens_never_idle():
+    """Test an animated screen keeps the full rate."""
+    scheduler = FrameScheduler(active_rate=1000, idle_rate=100, idle_after=1)
+    for _ in range(3):
+        scheduler.wait("intro", animating=True, active=False)
+    assert not scheduler.idle
+    assert scheduler.stats()["intro"]["idle_frames"] == 0
+
+
+def test_wait_async_idles_and_wakes_on_input():
+    """Test the asyncio frame wait idles the same way, and wakes on input."""
+    pg.display.init()
+    pg.display.set_mode((10, 10))
+    pg.event.clear()
+    scheduler = FrameScheduler(active_rate=1000, idle_rate=100, idle_after=2)
+
+    async def frames():
+        for _ in range(2):
+            await scheduler.wait_async("home", animating=False, active=False)
+        assert scheduler.idle
+        pg.event.post(pg.event.Event(pg.KEYDOWN, key=pg.K_a, unicode="a", mod=0, scancode=0))
+        await scheduler.wait_async("home", animating=False, active=False)
+
+    asyncio.run(frames())
+    assert not scheduler.idle
+    assert scheduler.wakeups == 1
+    # the event is left on the queue for the next frame
+    assert [event.type for event in pg.event.get()] == [pg.KEYDOWN]
+    assert scheduler.stats()["home"]["frames"] == 3
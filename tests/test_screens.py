@@ -0,0 +1,90 @@
+"""
+Test the screen lifecycle registry.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+import pytest  # noqa: E402
+
+from cryptids.assets import AssetManager  # noqa: E402
+from cryptids.layers import LayerCache  # noqa: E402
+from cryptids.loader import AssetLoader  # noqa: E402
+from cryptids.screens import Screen, ScreenRegistry  # noqa: E402
+
+pg.display.init()
+pg.display.set_mode((1, 1))
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _build(size):
+    return pg.Surface(size)
+
+
+def _draw_layer(layers, name):
+    return lambda screen, *args: layers.get(name, (10, 10), _build)
+
+
+def test_switch_calls_hooks():
+    """Test entering and leaving a screen calls its hooks once."""
+    calls = []
+    registry = ScreenRegistry(LayerCache(), clock=_Clock())
+    registry.register(Screen("home", lambda *args: calls.append("draw"), exit=lambda: calls.append("exit home")))
+    registry.register(Screen("play", lambda *args: None, enter=lambda: calls.append("enter play")))
+    registry.switch("home").draw(None, None, None, False)
+    assert registry.switch("home") is registry.current
+    registry.switch("play")
+    assert calls == ["draw", "exit home", "enter play"]
+    assert registry.switches == 2
+    with pytest.raises(ValueError):
+        registry.switch("nowhere")
+
+
+def test_next_screen_is_preloaded(tmp_path):
+    """Test the images of the screen likely next are decoded whilst on the current one."""
+    path = str(tmp_path / "art.png")
+    pg.image.save(pg.Surface((16, 16)), path)
+    manager = AssetManager()
+    loader = AssetLoader(manager=manager)
+    registry = ScreenRegistry(LayerCache(), clock=_Clock())
+    registry.register(Screen("play", lambda *args: None, next_screens=["gameplay"]))
+    registry.register(Screen("gameplay", lambda *args: None, images=lambda: [path], loader=loader))
+    registry.switch("play")
+    loader.settle()
+    registry.update()
+    assert manager.has_image(path)
+    assert registry.memory()["gameplay"] == 16 * 16 * 4
+    loader.shutdown()
+
+
+def test_stale_screens_are_released():
+    """Test a screen not shown lately is released, keeping layers still in use."""
+    clock = _Clock()
+    layers = LayerCache()
+    registry = ScreenRegistry(layers, clock=clock, release_after=10.0)
+    for name, screen_layers in [("intro", ["intro.title", "logo"]), ("home", ["logo"]), ("settings", ["settings"])]:
+        registry.register(Screen(name, lambda *args: None, layers=screen_layers))
+    for name, layer in [("intro", "intro.title"), ("intro", "logo"), ("settings", "settings")]:
+        registry.switch(name)
+        _draw_layer(layers, layer)(None)
+    memory = registry.memory()
+    assert memory["intro"] == 2 * memory["settings"] > 0
+
+    # shown lately, nothing is released
+    registry.switch("home")
+    assert layers.stats()["layers"] == 3
+
+    clock.now = 11.0
+    assert sorted(registry.release_stale()) == ["intro", "settings"]
+    memory = registry.memory()
+    # the logo is kept for the home screen
+    assert memory["settings"] == 0
+    assert memory["intro"] == memory["home"] > 0
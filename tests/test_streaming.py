@@ -0,0 +1,100 @@
+"""
+Test the card art streamer.
+"""
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from cryptids.atlas import CardAtlas, bake_atlas  # noqa: E402
+from cryptids.streaming import CardArtStreamer, upcoming_card_ids  # noqa: E402
+
+
+def _player(hand, deck, field=(), magic=()):
+    card = lambda card_id: SimpleNamespace(card_id=card_id)  # noqa: E731
+    slots = {i: card(card_id) for i, card_id in enumerate(field)}
+    return SimpleNamespace(hand=[card(c) for c in hand],
+                           field=slots,
+                           magic=[card(c) for c in magic],
+                           deck=[card(c) for c in deck])
+
+
+def _cards(tmp_path, n):
+    pg.display.init()
+    pg.display.set_mode((10, 10))
+    for card_id in range(1, n + 1):
+        pg.image.save(pg.Surface((16, 16)), str(tmp_path / f"{card_id}.png"))
+
+
+def _settle(streamer, player):
+    while True:
+        streamer.update(player)
+        if streamer.is_done():
+            return
+
+
+def test_deck_top_is_the_end():
+    """Test the next card drawn is the last in the deck."""
+    player = _player([], [1, 2, 3, 4])
+    assert upcoming_card_ids(player, 2) == [4, 3]
+    assert upcoming_card_ids(player, 0) == []
+
+
+def test_wanted_paths_are_in_play_and_deck_top(tmp_path):
+    """Test only the cards in play and the prefetched deck top are wanted, in play first."""
+    streamer = CardArtStreamer(prefetch=2, card_root=str(tmp_path))
+    player = _player(hand=[1], deck=[7, 6, 5, 4], field=[2])
+    assert streamer.wanted_paths(player) == [str(tmp_path / f"{card_id}.png") for card_id in [1, 2, 4, 5]]
+
+
+def test_prefetch_hits_and_stalls(tmp_path):
+    """Test prefetched cards are hits and others stall."""
+    _cards(tmp_path, 6)
+    streamer = CardArtStreamer(prefetch=1, card_root=str(tmp_path))
+    _settle(streamer, _player(hand=[1], deck=[5, 2]))
+    assert streamer.get(1) is not None
+    assert streamer.get(2) is not None
+    assert streamer.get(5) is not None
+    assert streamer.get(99) is None
+    assert (streamer.prefetch_hits, streamer.stalls) == (2, 2)
+    # drawing the same cards again, frame after frame, is not a prefetch hit
+    for _ in range(3):
+        streamer.get(1)
+        streamer.get(5)
+    assert (streamer.prefetch_hits, streamer.stalls) == (2, 2)
+    # a newly prefetched card is, once
+    _settle(streamer, _player(hand=[1], deck=[3]))
+    streamer.get(3)
+    streamer.get(3)
+    assert (streamer.prefetch_hits, streamer.stalls) == (3, 2)
+
+
+def test_eviction_keeps_cards_in_use(tmp_path):
+    """Test cards out of play are evicted to meet the budget."""
+    _cards(tmp_path, 6)
+    one_card = 16 * 16 * 4
+    streamer = CardArtStreamer(byte_budget=2 * one_card, prefetch=1, card_root=str(tmp_path))
+    _settle(streamer, _player(hand=[1, 2], deck=[3]))
+    assert streamer.stats()["entries"] == 3
+    # the cards left play, so only the budget is kept
+    _settle(streamer, _player(hand=[4], deck=[]))
+    assert streamer.has_image(str(tmp_path / "4.png"))
+    assert streamer.bytes_used <= 2 * one_card
+    assert streamer.evictions == 2
+
+
+def test_atlas_sheets_are_streamed(tmp_path):
+    """Test the atlas sheets of the cards in play are decoded ahead, and cards are drawn small from them."""
+    _cards(tmp_path, 6)
+    bake_atlas(str(tmp_path), str(tmp_path / "atlas"), tiers={"hand": 8}, sheet_size=32)
+    atlas = CardAtlas(str(tmp_path / "atlas" / "index.json"), str(tmp_path), tiers={"hand": 8})
+    streamer = CardArtStreamer(prefetch=1, card_root=str(tmp_path), atlas=atlas, tiers=("hand",))
+    _settle(streamer, _player(hand=[1, 2], deck=[3]))
+    sheets = {atlas.sheet_path(card_id, "hand") for card_id in [1, 2, 3]}
+    assert all(atlas.has_image(path) for path in sheets)
+    assert streamer.stats()["atlas"]["sheets"] == len(sheets)
+    card = streamer.get(2, "hand")
+    assert card.get_height() == 8
+    assert atlas.stats()["fallbacks"] == 0
@@ -0,0 +1,88 @@
+"""
+Test the frame-stepped task runner.
+"""
+from concurrent.futures import Future
+
+from cryptids.inputs import InputSnapshot
+from cryptids import tasks
+from cryptids.tasks import TaskRunner, delay
+
+
+def _count(frames, log):
+    log.append("setup")
+    for i in range(frames):
+        yield
+        log.append(i)
+    return "done"
+
+
+def test_task_starts_next_frame_and_returns():
+    """Test a task runs from the frame after it is started."""
+    runner = TaskRunner()
+    log, results = [], []
+    runner.start(_count(2, log), on_done=results.append)
+    runner.step(InputSnapshot())
+    assert log == []
+    for _ in range(3):
+        runner.step(InputSnapshot())
+    assert log == ["setup", 0, 1]
+    assert results == ["done"]
+    assert not runner.busy
+
+
+def test_modal_tasks_run_in_turn():
+    """Test modal tasks run one at a time, in order."""
+    runner = TaskRunner()
+    log = []
+
+    def modal(name):
+        yield from delay(2)
+        log.append(name)
+
+    runner.start(modal("first"), modal=True)
+    runner.start(modal("second"), modal=True)
+    runner.step(InputSnapshot())
+    assert runner.modal
+    for _ in range(3):
+        runner.step(InputSnapshot())
+    assert log == ["first"]
+    for _ in range(3):
+        runner.step(InputSnapshot())
+    assert log == ["first", "second"]
+    assert not runner.modal
+
+
+def test_tasks_receive_the_frame_input():
+    """Test each frame's input is sent into the task."""
+    runner = TaskRunner()
+    seen = []
+
+    def typing():
+        while True:
+            inputs = yield False
+            seen.append(inputs.mouse_pos)
+
+    runner.start(typing(), animated=True)
+    runner.step(InputSnapshot((1, 1)))
+    assert runner.animating
+    runner.step(InputSnapshot((2, 2)))
+    assert seen == [(2, 2)]
+    assert not runner.animating
+    runner.cancel()
+    assert not runner.busy
+
+
+def test_wait_for_a_future_keeps_animating():
+    """Test a task waits for a future, animating, and finishes with its result."""
+    runner = TaskRunner()
+    results = []
+    future = Future()
+    runner.start(tasks.wait_for(future), animated=False, on_done=results.append)
+    runner.step(InputSnapshot())
+    for _ in range(3):
+        runner.step(InputSnapshot())
+        assert runner.animating
+    future.set_result("done")
+    runner.step(InputSnapshot())
+    assert results == ["done"]
+    assert not runner.busy
@@ -0,0 +1,58 @@
+"""
+Test the timed sequences.
+"""
+from cryptids.timeline import Timeline
+
+
+class FakeClock(object):
+    """A clock moved by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_steps_follow_elapsed_time_not_frames():
+    """Test a slow frame does not stretch the sequence."""
+    clock = FakeClock()
+    timeline = Timeline([("title", 0.5), ("logo", 0.5)], timestep=0.01, clock=clock)
+    assert timeline.update() == "title"
+    clock.now = 0.3
+    assert timeline.update() == "title"
+    # one slow frame crosses into the next step
+    clock.now = 0.75
+    assert timeline.update() == "logo"
+    clock.now = 1.0
+    assert timeline.update() is None
+    assert timeline.finished
+
+
+def test_fixed_timestep_and_interpolated_fade():
+    """Test the time advances in whole timesteps and fades interpolate between them."""
+    clock = FakeClock()
+    timeline = Timeline([("title", 1.0)], timestep=0.1, clock=clock)
+    timeline.update()
+    clock.now = 0.25
+    timeline.update()
+    assert timeline.ticks == 2
+    # halfway through the fade in, between timesteps
+    assert abs(timeline.fade(0.5) - 0.5) < 1e-6
+    clock.now = 0.5
+    timeline.update()
+    assert timeline.fade(0.2) == 1.0
+    clock.now = 0.9
+    timeline.update()
+    assert abs(timeline.fade(0.2) - 0.5) < 1e-6
+
+
+def test_skip_and_reset():
+    """Test skipping finishes the sequence and resetting plays it again."""
+    clock = FakeClock()
+    timeline = Timeline([("title", 0.5), ("logo", 0.5)], clock=clock)
+    timeline.update()
+    timeline.skip()
+    assert timeline.update() is None
+    timeline.reset()
+    assert timeline.update() == "title"
@@ -0,0 +1,197 @@
+"""
+Test the journaled user store, through the usermanagement API.
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from cryptids import settings as get
+from cryptids import usermanagement
+from cryptids import userjournal
+from cryptids.userjournal import JournalUserStore, decode_record, encode_record
+
+
+@pytest.fixture
+def usernames():
+    """The users the journal is seeded with."""
+    return ["default", "other"]
+
+
+@pytest.fixture
+def journal(tmp_path, user_details, cheap_hashes, monkeypatch):
+    """A journaled store seeded from the user file, picked as the backend."""
+    def make_store(**kwargs):
+        return JournalUserStore(str(tmp_path / "users.journal"), str(tmp_path / "users.snapshot.json"),
+                                seed_path=str(user_details), **kwargs)
+    store = make_store()
+    monkeypatch.setattr(userjournal, "user_journal", store)
+    monkeypatch.setattr(get, "USER_STORE_BACKEND", "journal")
+    yield store, make_store
+    store.close()
+
+
+def test_records():
+    """Test a journal line is recognised only whole and unchanged."""
+    line = encode_record({"seq": 1, "ops": [["delete", "default"]]})
+    assert decode_record(line) == {"seq": 1, "ops": [["delete", "default"]]}
+    assert decode_record(line[:-1]) is None
+    assert decode_record(line.replace(b"default", b"defaulT")) is None
+
+
+def test_changes_are_appended_and_recovered(journal):
+    """Test each transaction is one appended record, replayed by a new store."""
+    store, make_store = journal
+    assert usermanagement.load_user("default", "Password123")[0] == 0
+    assert usermanagement.make_new_user("newbie", "Password456", "newbie@cryptids-tcg.com") == (0, "user created")
+    assert usermanagement.make_new_user("newbie", "Password456", "newbie@cryptids-tcg.com") == (1, "user already exists")
+    usermanagement.update_records("newbie", True)
+    usermanagement.delete_user("other")
+    # logging in hashed the plaintext password in place
+    assert store.stats()["appends"] == 4
+    assert usermanagement.check_email_exists("newbie@cryptids-tcg.com")
+    assert not usermanagement.check_email_exists("other@cryptids-tcg.com")
+    with pytest.raises(ValueError):
+        usermanagement.set_setting("newbie", "default@cryptids-tcg.com", "email")
+    store.close()
+
+    recovered = make_store()
+    assert recovered.get_user("newbie")["records"]["wins"] == 1
+    assert not recovered.check_user_exists("other")
+    assert recovered.check_email_exists("newbie@cryptids-tcg.com")
+    assert recovered.stats()["recovered"] == 4
+    recovered.close()
+
+
+def test_damaged_end_is_cut_off(journal):
+    """Test a record cut short by a crash is dropped, and the journal appended after it."""
+    store, make_store = journal
+    usermanagement.update_records("default", True)
+    usermanagement.update_records("default", True)
+    store.close()
+    with open(store.journal_path, "r+b") as f:
+        f.truncate(os.path.getsize(store.journal_path) - 5)
+
+    recovered = make_store()
+    assert recovered.get_user("default")["records"]["wins"] == 1
+    assert recovered.stats()["truncated_bytes"] > 0
+    with recovered.transaction() as tx:
+        tx.set_setting("default", 7, "records", "losses")
+    recovered.close()
+    again = make_store()
+    assert again.get_user("default")["records"] == {"wins": 1, "losses": 7}
+    assert again.stats()["truncated_bytes"] == 0
+    again.close()
+
+
+class YieldingDict(dict):
+    """A dictionary handing over to the other threads on each change, to land their reads inside an update."""
+
+    def __setitem__(self, key, value):
+        time.sleep(0)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        time.sleep(0)
+        super().__delitem__(key)
+
+    def pop(self, *args):
+        time.sleep(0)
+        return super().pop(*args)
+
+
+def test_reads_during_commits(journal):
+    """Test readers on other threads always see every user whilst users are changed."""
+    store, make_store = journal
+    store = make_store(fsync=False)
+    names = [f"user{i}" for i in range(100)]
+    with store.transaction() as tx:
+        for name in names:
+            tx.set_setting(name, f"{name}@cryptids-tcg.com", "email", force_new_user=True)
+    store._users, store._emails = YieldingDict(store._users), YieldingDict(store._emails)
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                for name in names:
+                    if store.get_user(name) is None or not store.check_user_exists(name):
+                        errors.append(f"{name} missing")
+                    if not store.check_email_exists(f"{name}@cryptids-tcg.com"):
+                        errors.append(f"email of {name} missing")
+                if len(store.load_all_users()) != len(names) + 2:
+                    errors.append("users missing")
+            except RuntimeError as error:
+                errors.append(error)
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    # each commit replaces every user
+    for i in range(20):
+        with store.transaction() as tx:
+            for name in names:
+                tx.set_setting(name, i, "records")
+    done.set()
+    for reader in readers:
+        reader.join()
+    store.close()
+    assert errors == []
+
+
+def test_failed_append_is_cut_off(journal, monkeypatch):
+    """Test an append whose sync fails leaves nothing in the journal, and later ones are recovered."""
+    store, make_store = journal
+    usermanagement.update_records("default", True)
+    size = os.path.getsize(store.journal_path)
+    fsync = os.fsync
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        usermanagement.update_records("default", True)
+    assert os.path.getsize(store.journal_path) == size
+    assert usermanagement.get_user("default")["records"]["wins"] == 1
+    monkeypatch.setattr(os, "fsync", fsync)
+    usermanagement.update_records("default", False)
+    store.close()
+
+    recovered = make_store()
+    assert recovered.get_user("default")["records"] == {"wins": 1, "losses": 1}
+    assert recovered.stats()["truncated_bytes"] == 0
+    recovered.close()
+
+
+def test_compaction(journal):
+    """Test the journal is folded into the snapshot, and recovery starts from it."""
+    store, make_store = journal
+    for _ in range(3):
+        usermanagement.update_records("default", False)
+    assert store.compact()
+    assert not store.compact()
+    assert store.stats()["journal_bytes"] == 0
+    usermanagement.update_records("default", True)
+    folder = os.path.dirname(store.journal_path)
+    assert sorted(os.listdir(folder)) == ["user_details.json", "users.journal", "users.snapshot.json"]
+    with open(store.snapshot_path) as f:
+        assert json.load(f)["seq"] == 3
+    store.close()
+
+    recovered = make_store()
+    assert recovered.get_user("default")["records"] == {"wins": 1, "losses": 3}
+    assert recovered.stats()["recovered"] == 1
+    recovered.close()
+
+    # past the size limit the journal is folded in the background
+    background = make_store(compact_bytes=1)
+    with background.transaction() as tx:
+        tx.set_setting("other", 2, "records", "wins")
+    deadline = time.monotonic() + 5
+    while background.compactions == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert background.compactions == 1
+    background.close()
+    with open(store.snapshot_path) as f:
+        assert json.load(f)["users"]["other"]["records"]["wins"] == 2
@@ -0,0 +1,138 @@
+"""
+Test the transactions on the user file, and the cache it is written behind by.
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from cryptids import usermanagement
+from cryptids.userstore import UserStore
+
+
+def test_registration_is_one_write(user_file):
+    """Test making a user commits and writes the user file once, with every setting."""
+    path, store = user_file
+    assert usermanagement.make_new_user("newbie", "Password456", "newbie@cryptids-tcg.com") == (0, "user created")
+    assert store.commits == 1
+    store.flush()
+    assert store.flushes == 1
+    user = json.loads(path.read_text())["newbie"]
+    assert user["records"] == {"wins": 0, "losses": 0}
+    assert user["settings"]["nfts"] == "[-1]"
+    # no temporary files are left beside the user file
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+    assert usermanagement.make_new_user("newbie", "Password456", "newbie@cryptids-tcg.com") == (1, "user already exists")
+    assert store.commits == 1
+    # the file is parsed once, and not again after the store's own write
+    assert store.reloads == 1
+
+
+def test_transaction_batches_and_joins(user_file):
+    """Test changes made in a transaction, and by calls joining it, are written together."""
+    path, store = user_file
+    with usermanagement.transaction() as tx:
+        tx.set_setting("default", "[3, 4]", "settings", "loadouts", "default")
+        usermanagement.update_records("default", True)
+        usermanagement.update_records("default", True)
+        # the open transaction's changes are visible, but not yet written
+        assert usermanagement.load_all_users()["default"]["records"]["wins"] == 2
+        assert usermanagement.load_all_users() is not store.read()
+    assert store.commits == 1
+    store.flush()
+    user = json.loads(path.read_text())["default"]
+    assert user["records"]["wins"] == 2
+    assert user["settings"]["loadouts"]["default"] == "[3, 4]"
+
+
+def test_failed_transaction_writes_nothing(user_file):
+    """Test a transaction that raises leaves the user file as it was."""
+    path, store = user_file
+    before = path.read_text()
+    with pytest.raises(ValueError):
+        with usermanagement.transaction() as tx:
+            tx.set_setting("default", 5, "records", "losses")
+            tx.set_setting("nobody", 1, "records", "wins")
+    assert store.commits == 0
+    # the cached user was copied, not changed
+    assert store.read()["default"]["records"]["losses"] == 0
+    store.flush()
+    assert path.read_text() == before
+
+
+def test_store_reloads_when_the_file_changes(tmp_path):
+    """Test the file is parsed again only when its size or modification time changes."""
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({"a": {"email": "a"}}))
+    store = UserStore(str(path))
+    assert store.read() is store.read()
+    assert store.reloads == 1
+    path.write_text(json.dumps({"a": {"email": "a"}, "b": {"email": "b"}}))
+    assert set(store.read()) == {"a", "b"}
+    assert store.reloads == 2
+    assert store.stats()["read"]["count"] == 3
+
+
+def test_store_writes_behind(tmp_path):
+    """Test the background thread flushes the committed users, atomically."""
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({"a": {"email": "a"}}))
+    store = UserStore(str(path), flush_delay=0.01)
+    data = dict(store.read(), b={"email": "b"})
+    store.commit(data, ["b"])
+    # served from memory until written
+    assert store.read() is data
+    deadline = time.monotonic() + 5
+    while store.flushes == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.flushes == 1
+    assert json.loads(path.read_text()) == data
+    assert store.stats()["flush"]["max_ms"] > 0
+    assert os.listdir(tmp_path) == ["users.json"]
+    store.close()
+
+
+class YieldingLock(object):
+    """A lock handing over to the other threads on each release, to land their reads between two held blocks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def acquire(self, *args):
+        return self._lock.acquire(*args)
+
+    def release(self):
+        self._lock.release()
+        time.sleep(0)
+
+    __enter__ = acquire
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def test_reads_during_flushes(tmp_path):
+    """Test reads whilst the store writes the file never take its own write for a change on disk."""
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({"a": {"email": "a"}}))
+    store = UserStore(str(path))
+    store._lock = YieldingLock()
+    store._wake = threading.Condition(store._lock)
+    store.read()
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            store.read()
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(50):
+        store.commit(dict(store.read(), b={"email": str(i)}), ["b"])
+        store.flush()
+    done.set()
+    reader.join()
+    assert store.flushes == 50
+    assert store.reloads == 1
+    store.close()
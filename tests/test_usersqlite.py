@@ -0,0 +1,71 @@
+"""
+Test the SQLite user store, through the usermanagement API.
+"""
+import sqlite3
+
+import pytest
+
+from cryptids import settings as get
+from cryptids import usermanagement
+from cryptids import usersqlite
+from cryptids.usersqlite import SQLiteUserStore, migrate
+
+
+@pytest.fixture
+def usernames():
+    """The users migrated to the database."""
+    return ["default", "other"]
+
+
+@pytest.fixture
+def user_db(tmp_path, user_details, cheap_hashes, monkeypatch):
+    """An SQLite store migrated from the user file, picked as the backend."""
+    assert migrate(str(user_details), str(tmp_path / "users.db")) == (2, 0)
+    store = SQLiteUserStore(str(tmp_path / "users.db"))
+    monkeypatch.setattr(usersqlite, "user_db", store)
+    monkeypatch.setattr(get, "USER_STORE_BACKEND", "sqlite")
+    yield store
+    store.close()
+
+
+def test_login_and_checks(user_db):
+    """Test the migrated users log in and are found by username and email."""
+    assert user_db.connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    return_code, user = usermanagement.load_user("default", "Password123")
+    assert return_code == 0
+    assert usermanagement.get_setting(user, "settings", "loadouts", "default") == "[1, 2]"
+    assert usermanagement.load_user("default", "wrong")[0] == 2
+    assert usermanagement.load_user("nobody", "Password123")[0] == 1
+    assert usermanagement.check_user_exists("other")
+    assert usermanagement.check_email_exists("other@cryptids-tcg.com")
+    assert not usermanagement.check_email_exists("nobody@cryptids-tcg.com")
+
+
+def test_changes(user_db):
+    """Test registering, changing and deleting users."""
+    assert usermanagement.make_new_user("newbie", "Password456", "newbie@cryptids-tcg.com") == (0, "user created")
+    assert usermanagement.make_new_user("newbie", "Password456", "newbie@cryptids-tcg.com") == (1, "user already exists")
+    assert usermanagement.get_user("newbie")["records"] == {"wins": 0, "losses": 0}
+    usermanagement.update_records("newbie", False)
+    usermanagement.set_setting("newbie", "[3]", "settings", "loadouts", "default")
+    user = usermanagement.get_user("newbie")
+    assert user["records"]["losses"] == 1
+    assert user["settings"]["loadouts"]["default"] == "[3]"
+    usermanagement.delete_user("other")
+    assert not usermanagement.check_user_exists("other")
+    assert not usermanagement.check_email_exists("other@cryptids-tcg.com")
+    assert user_db.count() == 2
+
+
+def test_failed_transaction_rolls_back(user_db):
+    """Test nothing is written if a transaction raises, and the email index holds."""
+    with pytest.raises(ValueError):
+        with usermanagement.transaction() as tx:
+            tx.set_setting("default", 5, "records", "losses")
+            # seen within the transaction
+            assert usermanagement.get_user("default")["records"]["losses"] == 5
+            tx.set_setting("nobody", 1, "records", "wins")
+    assert usermanagement.get_user("default")["records"]["losses"] == 0
+    with pytest.raises(sqlite3.IntegrityError):
+        usermanagement.set_setting("other", "default@cryptids-tcg.com", "email")
+    assert usermanagement.get_user("other")["email"] == "other@cryptids-tcg.com"